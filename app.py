@@ -10,8 +10,20 @@ if "dances_index" not in st.session_state:
     st.session_state["dances_index"] = {}
 if "original_members" not in st.session_state:
     st.session_state["original_members"] = None
+if "dance_member_index" not in st.session_state:
+    st.session_state["dance_member_index"] = {}
+if "member_name_index" not in st.session_state:
+    st.session_state["member_name_index"] = None
 if "matching_results" not in st.session_state:
     st.session_state["matching_results"] = None
+if "matching_job" not in st.session_state:
+    st.session_state["matching_job"] = None
+if "run_history" not in st.session_state:
+    st.session_state["run_history"] = {}
+if "what_if_results" not in st.session_state:
+    st.session_state["what_if_results"] = None
+if "pending_changes" not in st.session_state:
+    st.session_state["pending_changes"] = {"members": set(), "dances": set()}
 
 st.title("K-Beats Dance Matcher")
 
@@ -0,0 +1,244 @@
+import argparse
+from collections.abc import Callable
+import io
+import json
+import math
+from pathlib import Path
+import random
+import time
+import tracemalloc
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from enums import MatchBackend
+from services import match, match_tls
+from synthetic import generate_dances_df, generate_rankings_df
+from utils import (
+    filter_member_rankings_by_valid_dances,
+    generate_dance_based_csv,
+    generate_dancer_based_csv,
+    process_dances_csv,
+    process_rankings_csv,
+)
+
+STAGES = [
+    "process_rankings_csv",
+    "filter_member_rankings_by_valid_dances",
+    "match_tls",
+    "match",
+    "generate_dance_based_csv",
+    "generate_dancer_based_csv",
+]
+
+
+class StageResult(NamedTuple):
+    sweep: str
+    num_members: int
+    num_dances: int
+    stage: str
+    seconds: float
+    peak_mib: float
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> tuple[Any, float, float]:
+    """Best wall time over `repeat` runs, then one traced run for peak memory."""
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak / 2**20
+
+
+def run_point(
+    sweep: str,
+    num_members: int,
+    num_dances: int,
+    stages: list[str],
+    repeat: int,
+    backend: MatchBackend,
+    seed: int,
+) -> list[StageResult]:
+    """Generate one synthetic club and time every pipeline stage on it."""
+    dances_df = generate_dances_df(num_dances, seed)
+    rankings_df = generate_rankings_df(num_members, dances_df["Dance"].tolist(), seed)
+    rankings_csv = rankings_df.to_csv(index=False).encode()
+    dances_csv = dances_df.to_csv(index=False).encode()
+
+    state: dict[str, Any] = {}
+
+    def ingest() -> Any:
+        return process_rankings_csv(io.BytesIO(rankings_csv))
+
+    def filter_rankings() -> Any:
+        valid_dances = {dance.name for dance in state["dances"]}
+        return filter_member_rankings_by_valid_dances(state["members"], valid_dances)
+
+    def tls() -> Any:
+        return match_tls(
+            state["filtered"], state["dances"], backend, rng=random.Random(seed)
+        )
+
+    def full_match() -> Any:
+        return match(
+            state["filtered"],
+            state["dances"],
+            backend=backend,
+            rng=random.Random(seed),
+        )
+
+    def dance_export() -> Any:
+        matching, tl_matching = state["match"]
+        return generate_dance_based_csv(matching, state["dances"], tl_matching)
+
+    def dancer_export() -> Any:
+        matching, _ = state["match"]
+        return generate_dancer_based_csv(matching, state["filtered"])
+
+    # every stage runs (to feed the next one), but only selected ones are timed
+    steps: list[tuple[str, Callable[[], Any]]] = [
+        ("process_rankings_csv", ingest),
+        ("filter_member_rankings_by_valid_dances", filter_rankings),
+        ("match_tls", tls),
+        ("match", full_match),
+        ("generate_dance_based_csv", dance_export),
+        ("generate_dancer_based_csv", dancer_export),
+    ]
+    outputs = {
+        "process_rankings_csv": "members",
+        "filter_member_rankings_by_valid_dances": "filtered",
+        "match": "match",
+    }
+
+    state["dances"] = process_dances_csv(io.BytesIO(dances_csv))
+    results = []
+    for name, step in steps:
+        if name in stages:
+            output, seconds, peak_mib = _measure(step, repeat)
+            results.append(
+                StageResult(sweep, num_members, num_dances, name, seconds, peak_mib)
+            )
+        else:
+            output = step()
+        if name in outputs:
+            state[outputs[name]] = output
+    return results
+
+
+def scaling_exponents(results: list[StageResult]) -> dict[tuple[str, str], float]:
+    """
+    Fit `seconds ~ size ** k` per sweep and stage by least squares on a log-log
+    scale. k close to 1 is linear scaling, 2 is quadratic.
+    """
+    exponents = {}
+    for sweep in sorted({r.sweep for r in results}):
+        for stage in STAGES:
+            points = [r for r in results if r.sweep == sweep and r.stage == stage]
+            if len(points) < 2:
+                continue
+            sizes = [
+                r.num_members if sweep == "members" else r.num_dances for r in points
+            ]
+            seconds = [max(r.seconds, 1e-9) for r in points]
+            slope, _ = np.polyfit(np.log(sizes), np.log(seconds), 1)
+            exponents[(sweep, stage)] = float(slope)
+    return exponents
+
+
+def print_report(
+    results: list[StageResult], exponents: dict[tuple[str, str], float]
+) -> None:
+    header = (
+        f"{'sweep':<8} {'members':>8} {'dances':>7}  {'stage':<40} "
+        f"{'time (s)':>10} {'peak (MiB)':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.sweep:<8} {r.num_members:>8} {r.num_dances:>7}  {r.stage:<40} "
+            f"{r.seconds:>10.4f} {r.peak_mib:>11.1f}"
+        )
+    print()
+    print("Scaling exponents (time ~ size^k):")
+    for (sweep, stage), k in exponents.items():
+        print(f"  {sweep:<8} {stage:<40} k = {k:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark ingestion, matching and export on synthetic clubs."
+    )
+    parser.add_argument(
+        "--members",
+        type=int,
+        nargs="*",
+        default=[100, 1000, 5000, 20000],
+        help="Member counts to sweep (at --fixed-dances dances).",
+    )
+    parser.add_argument(
+        "--dances",
+        type=int,
+        nargs="*",
+        default=[10, 100, 500, 1000],
+        help="Dance counts to sweep (at --fixed-members members).",
+    )
+    parser.add_argument("--fixed-members", type=int, default=1000)
+    parser.add_argument("--fixed-dances", type=int, default=50)
+    parser.add_argument("--stages", nargs="*", choices=STAGES, default=STAGES)
+    parser.add_argument(
+        "--backend",
+        type=MatchBackend,
+        choices=list(MatchBackend),
+        default=MatchBackend.PYTHON,
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", type=Path, help="Also write the raw results to this JSON file."
+    )
+    args = parser.parse_args()
+
+    points = [("members", n, args.fixed_dances) for n in args.members]
+    points += [("dances", args.fixed_members, n) for n in args.dances]
+
+    results: list[StageResult] = []
+    for sweep, num_members, num_dances in points:
+        results += run_point(
+            sweep,
+            num_members,
+            num_dances,
+            args.stages,
+            args.repeat,
+            args.backend,
+            args.seed,
+        )
+
+    exponents = scaling_exponents(results)
+    print_report(results, exponents)
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(
+                {
+                    "backend": str(args.backend),
+                    "results": [r._asdict() for r in results],
+                    "scaling_exponents": [
+                        {"sweep": sweep, "stage": stage, "exponent": k}
+                        for (sweep, stage), k in exponents.items()
+                    ],
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import json
+from pathlib import Path
+import random
+import sys
+
+import pandas as pd
+
+from enums import ExportFormat, MatchBackend
+from ensemble import run_ensemble
+from exports import result_tables, write_tables
+from instrumentation import MatchStats
+from local_search import improve_matching
+from metrics import satisfaction_report
+from schemas import Dance, Member
+from services import match
+from sweep import run_sweep
+from utils import (
+    filter_member_rankings_by_valid_dances,
+    process_dances_csv,
+    process_rankings_csv,
+)
+
+METRICS_NAME = "metrics.json"
+SWEEP_NAME = "sweep.csv"
+
+
+def _load(args: argparse.Namespace) -> tuple[list[Member], list[Dance]]:
+    # sorted by name like the setup tab does, so a seed reproduces an app run
+    members = sorted(
+        process_rankings_csv(args.rankings_csv), key=lambda x: x.name
+    )
+    dances = sorted(process_dances_csv(args.dances_csv), key=lambda x: x.name)
+    members = filter_member_rankings_by_valid_dances(
+        members, {dance.name for dance in dances}
+    )
+    return members, dances
+
+
+def run(args: argparse.Namespace) -> None:
+    members, dances = _load(args)
+
+    seed = args.seed
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    stats = MatchStats() if args.stats else None
+    if args.runs > 1:
+        result = run_ensemble(
+            members, dances, args.runs, seed=seed, backend=args.backend, stats=stats
+        )
+        matching, tl_matching, seed = result.matching, result.tl_matching, result.seed
+    else:
+        matching, tl_matching = match(
+            members, dances, backend=args.backend, rng=random.Random(seed), stats=stats
+        )
+    if args.improve > 0:
+        matching = improve_matching(
+            members,
+            dances,
+            matching,
+            tl_matching,
+            budget_seconds=args.improve,
+            rng=random.Random(seed),
+            stats=stats,
+        ).matching
+
+    write_tables(
+        result_tables(matching, tl_matching, dances, members),
+        args.out,
+        args.format or [ExportFormat.CSV],
+    )
+
+    report = satisfaction_report(matching, members, dances)
+    metrics = {
+        "seed": seed,
+        "backend": str(args.backend),
+        "runs": args.runs,
+        "improve_seconds": args.improve,
+        "seats_filled": sum(map(len, matching.dances_to_dancers.values())),
+        "total_seats": sum(dance.num_dancers for dance in dances),
+        "total_members": report.total_members,
+        "members_with_top1": report.members_with_top1,
+        "members_with_top3": report.members_with_top3,
+        "members_near_max_dances": report.members_near_max_dances,
+        # JSON keys are strings; unranked assignments are keyed "unranked"
+        "rank_distribution": {
+            "unranked" if rank is None else str(rank): count
+            for rank, count in report.rank_distribution.items()
+        },
+        "max_dances_gaps": report.max_dances_gaps,
+        "empty_seats": report.empty_seats,
+        "by_seniority": {
+            str(seniority): breakdown._asdict()
+            for seniority, breakdown in report.by_seniority.items()
+        },
+    }
+    if stats is not None:
+        metrics["stats"] = stats.to_dict()
+    (args.out / METRICS_NAME).write_text(json.dumps(metrics, indent=2))
+
+    print(
+        f"Seed {seed}: {report.members_with_top3}/{report.total_members} members got "
+        f"a top 3 dance, {report.members_near_max_dances}/{report.total_members} "
+        f"are within 2 dances of their max. Results written to {args.out}/",
+        file=sys.stderr,
+    )
+
+
+def sweep(args: argparse.Namespace) -> None:
+    members, dances = _load(args)
+    points = run_sweep(
+        members, dances, runs_per_scheme=args.runs_per_scheme, seed=args.seed
+    )
+    table = pd.DataFrame(
+        {
+            "scheme": [point.scheme.label for point in points],
+            "members_with_top3": [point.members_with_top3 for point in points],
+            "members_near_max_dances": [
+                point.members_near_max_dances for point in points
+            ],
+            "pareto_optimal": [point.pareto_optimal for point in points],
+        }
+    )
+    args.out.mkdir(parents=True, exist_ok=True)
+    table.to_csv(args.out / SWEEP_NAME, index=False)
+
+    total = len(members)
+    print(f"Pareto-optimal priority schemes ({total} members):", file=sys.stderr)
+    for point in points:
+        if point.pareto_optimal:
+            print(
+                f"  {point.scheme.label}: {point.members_with_top3:.1f} top 3, "
+                f"{point.members_near_max_dances:.1f} within 2 of max",
+                file=sys.stderr,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Match members to dances without starting the Streamlit app."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser(
+        "run", help="Match a rankings CSV against a dances CSV."
+    )
+    run_parser.add_argument("rankings_csv", type=Path)
+    run_parser.add_argument("dances_csv", type=Path)
+    run_parser.add_argument(
+        "--out",
+        type=Path,
+        default=Path("."),
+        help=f"Directory for the assignment tables and {METRICS_NAME}.",
+    )
+    run_parser.add_argument(
+        "--format",
+        type=ExportFormat,
+        choices=list(ExportFormat),
+        action="append",
+        help="Format of the assignment tables; repeat for several. Defaults to "
+        "csv. parquet and arrow need pyarrow installed.",
+    )
+    run_parser.add_argument(
+        "--seed", type=int, help="Seed of the (first) run. Random when omitted."
+    )
+    run_parser.add_argument(
+        "--runs",
+        type=int,
+        default=1,
+        help="Number of seeded runs; the most satisfying matching is kept.",
+    )
+    run_parser.add_argument(
+        "--backend",
+        type=MatchBackend,
+        choices=list(MatchBackend),
+        default=MatchBackend.PYTHON,
+    )
+    run_parser.add_argument(
+        "--improve",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Time budget for a local search pass over the final matching.",
+    )
+    run_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help=f"Include phase timings and round counters in {METRICS_NAME}.",
+    )
+    run_parser.set_defaults(func=run)
+
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="Compare priority weightings and orderings and report the Pareto "
+        "frontier of top 3 and max_dances satisfaction.",
+    )
+    sweep_parser.add_argument("rankings_csv", type=Path)
+    sweep_parser.add_argument("dances_csv", type=Path)
+    sweep_parser.add_argument(
+        "--out",
+        type=Path,
+        default=Path("."),
+        help=f"Directory for {SWEEP_NAME}.",
+    )
+    sweep_parser.add_argument(
+        "--seed",
+        type=int,
+        help="First seed of every scheme's runs. Random when omitted.",
+    )
+    sweep_parser.add_argument(
+        "--runs-per-scheme",
+        type=int,
+        default=3,
+        help="Seeded runs averaged per scheme.",
+    )
+    sweep_parser.set_defaults(func=sweep)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
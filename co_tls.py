@@ -0,0 +1,91 @@
+from collections.abc import Iterable, Iterator
+
+
+def _bits(mask: int) -> Iterator[int]:
+    # positions of the set bits, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CoTLCompatibility:
+    """
+    Who may co-TL with whom, over member IDs.
+
+    A member either accepts anyone, kept as one bit of the `anyone` bitset, or
+    a bitset of the specific members they named in `allowed[m]`.
+    `accepted_by[m]` is the reverse bitset of members who named m, so a
+    member's mutual partners are a couple of ANDs and "Yes, with anyone" costs
+    one bit instead of a set of every member name.
+    """
+
+    __slots__ = ("anyone", "allowed", "accepted_by", "_everyone")
+
+    def __init__(self, num_members: int) -> None:
+        self.anyone = 0
+        self.allowed = [0] * num_members
+        self.accepted_by = [0] * num_members
+        self._everyone = (1 << num_members) - 1
+
+    @classmethod
+    def build(
+        cls, anyone: Iterable[bool], allowed: Iterable[Iterable[int]]
+    ) -> "CoTLCompatibility":
+        """
+        Args:
+            anyone: Per member, whether they would co-TL with anyone.
+            allowed: Per member, the IDs of the specific members they named.
+        """
+        anyone = list(anyone)
+        compatibility = cls(len(anyone))
+        accepted_by = compatibility.accepted_by
+        for member_id, (member_anyone, member_allowed) in enumerate(
+            zip(anyone, allowed)
+        ):
+            bit = 1 << member_id
+            if member_anyone:
+                compatibility.anyone |= bit
+            mask = 0
+            for other in member_allowed:
+                mask |= 1 << other
+                accepted_by[other] |= bit
+            compatibility.allowed[member_id] = mask
+        return compatibility
+
+    def copy(self) -> "CoTLCompatibility":
+        compatibility = CoTLCompatibility.__new__(CoTLCompatibility)
+        compatibility.anyone = self.anyone
+        compatibility.allowed = self.allowed[:]
+        compatibility.accepted_by = self.accepted_by[:]
+        compatibility._everyone = self._everyone
+        return compatibility
+
+    def set_member(self, member_id: int, anyone: bool, allowed: Iterable[int]) -> None:
+        """Replace one member's answer, keeping the reverse bitsets in sync."""
+        bit = 1 << member_id
+        old_mask = self.allowed[member_id]
+        new_mask = 0
+        for other in allowed:
+            new_mask |= 1 << other
+        for other in _bits(old_mask & ~new_mask):
+            self.accepted_by[other] &= ~bit
+        for other in _bits(new_mask & ~old_mask):
+            self.accepted_by[other] |= bit
+        self.allowed[member_id] = new_mask
+        self.anyone = self.anyone | bit if anyone else self.anyone & ~bit
+
+    def partners(self, member_id: int) -> int:
+        """Bitset of the members who could co-TL with `member_id` both ways."""
+        bit = 1 << member_id
+        own = self._everyone if self.anyone & bit else self.allowed[member_id]
+        return own & (self.anyone | self.accepted_by[member_id]) & ~bit
+
+    def compatible(self, a: int, b: int) -> bool:
+        """Whether members `a` and `b` could co-TL a dance together."""
+        anyone = self.anyone
+        return (
+            a != b
+            and bool(anyone >> a & 1 or self.allowed[a] >> b & 1)
+            and bool(anyone >> b & 1 or self.allowed[b] >> a & 1)
+        )
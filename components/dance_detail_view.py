@@ -1,100 +1,111 @@
+import pandas as pd
 import streamlit as st
 
-from schemas import Dance, Member
+from dance_index import set_dance_inclusion
 
+EDITOR_KEY = "dance_editor"
 
-def update_members_for_dance(dance_idx: int, included: bool) -> None:
-    if not st.session_state["members"] or not st.session_state["original_members"]:
-        return
-
-    dance: Dance = st.session_state["dances"][dance_idx]
-    members: list[Member] = st.session_state["members"]
-    if included:
-        for member in members:
-            original_member: Member = st.session_state["original_members"][member.name]
-
-            # update dance_rankings
-            member.dance_rankings = [
-                dance_name
-                for dance_name in original_member.dance_rankings
-                if dance_name == dance.name
-                or st.session_state["dances_index"][dance_name].included
-            ]
-
-            # update max_rank
-            if dance.name in original_member.dance_rankings:
-                dance_idx = original_member.dance_rankings.index(dance.name)
-                if dance_idx < original_member.max_rank:
-                    member.max_rank += 1
-
-            # update dances_willing_to_tl
-            if dance.name in original_member.dances_willing_to_tl:
-                member.dances_willing_to_tl.add(dance.name)
-    else:
-        for member in members:
-            original_member: Member = st.session_state["original_members"][member.name]
 
-            # update dance_rankings
-            member.dance_rankings = [
-                dance_name
-                for dance_name in original_member.dance_rankings
-                if dance_name != dance.name
-                and st.session_state["dances_index"][dance_name].included
-            ]
+def apply_dance_changes(num_dancers: dict[str, int], included: dict[str, bool]) -> None:
+    """
+    Apply capacity and inclusion changes to the session's dances in one pass,
+    including the ranking updates of every member a toggled dance affects.
+    """
+    dances_index = st.session_state["dances_index"]
+    for name, value in num_dancers.items():
+        dances_index[name].num_dancers = value
+    st.session_state["pending_changes"]["dances"].update(num_dancers)
 
-            # update max_rank
-            if dance.name in original_member.dance_rankings:
-                dance_idx = original_member.dance_rankings.index(dance.name)
-                if dance_idx < original_member.max_rank:
-                    member.max_rank -= 1
-
-            # update dances_willing_to_tl
-            if dance.name in member.dances_willing_to_tl:
-                member.dances_willing_to_tl.remove(dance.name)
-
-
-def handle_num_dancers_change(dance_idx: int) -> None:
-    key = f"num_dancers_{dance_idx}"
-    if key not in st.session_state:
+    if not included:
         return
-    new_value = st.session_state[key]
-    st.session_state["dances"][dance_idx].num_dancers = new_value
-
-
-def handle_included_change(dance_idx: int) -> None:
-    key = f"included_{dance_idx}"
-    if key not in st.session_state:
+    if not st.session_state["members"] or not st.session_state["original_members"]:
         return
-    new_value = st.session_state[key]
-    dance = st.session_state["dances"][dance_idx]
-    dance.included = new_value
-    update_members_for_dance(dance_idx, new_value)
+    affected_members = set_dance_inclusion(
+        st.session_state["members"],
+        st.session_state["original_members"],
+        st.session_state["dance_member_index"],
+        dances_index,
+        included,
+    )
+    st.session_state["pending_changes"]["members"].update(affected_members)
+    st.session_state["pending_changes"]["dances"].update(included)
+
+
+def update_dances_included(dance_names: list[str], included: bool) -> None:
+    apply_dance_changes({}, {name: included for name in dance_names})
+    # drop the table's pending edits, so it picks up the new values
+    if EDITOR_KEY in st.session_state:
+        del st.session_state[EDITOR_KEY]
+
+
+def handle_dance_table_change() -> None:
+    """Diff the edited table against the session's dances and apply the changes."""
+    edits = st.session_state[EDITOR_KEY]["edited_rows"]
+    dances = st.session_state["dances"]
+    num_dancers: dict[str, int] = {}
+    included: dict[str, bool] = {}
+    for row, changes in edits.items():
+        dance = dances[int(row)]
+        new_num_dancers = changes.get("Members", dance.num_dancers)
+        if new_num_dancers is not None and new_num_dancers != dance.num_dancers:
+            num_dancers[dance.name] = int(new_num_dancers)
+        new_included = changes.get("Included", dance.included)
+        if new_included is not None and new_included != dance.included:
+            included[dance.name] = bool(new_included)
+    if num_dancers or included:
+        apply_dance_changes(num_dancers, included)
+
+
+def handle_bulk_inclusion(included: bool) -> None:
+    dance_names = st.session_state.get("bulk_dances") or []
+    update_dances_included(dance_names, included)
 
 
 def dance_detail_view() -> None:
     if not st.session_state["dances"]:
         return
 
-    for idx, dance in enumerate(st.session_state["dances"]):
-        col1, col2, col3 = st.columns([3, 1, 0.5])
-        with col1:
-            st.markdown(dance.name)
-        with col2:
-            st.number_input(
-                f"Number of members for {dance.name}",
-                min_value=1,
-                value=dance.num_dancers,
-                key=f"num_dancers_{idx}",
-                label_visibility="collapsed",
-                on_change=handle_num_dancers_change,
-                args=(idx,),
-            )
-        with col3:
-            st.toggle(
-                f"Whether {dance.name} is included in the matching",
-                value=dance.included,
-                key=f"included_{idx}",
-                label_visibility="collapsed",
-                on_change=handle_included_change,
-                args=(idx,),
-            )
+    st.multiselect(
+        "Dances to include or exclude",
+        [dance.name for dance in st.session_state["dances"]],
+        key="bulk_dances",
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button(
+            "Include selected",
+            on_click=handle_bulk_inclusion,
+            args=(True,),
+            disabled=not st.session_state.get("bulk_dances"),
+        )
+    with col2:
+        st.button(
+            "Exclude selected",
+            on_click=handle_bulk_inclusion,
+            args=(False,),
+            disabled=not st.session_state.get("bulk_dances"),
+        )
+    st.divider()
+
+    # one widget for every dance; edits are applied together when it changes
+    st.data_editor(
+        pd.DataFrame(
+            {
+                "Dance": [dance.name for dance in st.session_state["dances"]],
+                "Members": [dance.num_dancers for dance in st.session_state["dances"]],
+                "Included": [dance.included for dance in st.session_state["dances"]],
+            }
+        ),
+        column_config={
+            "Members": st.column_config.NumberColumn(
+                help="Number of members for the dance", min_value=1, step=1
+            ),
+            "Included": st.column_config.CheckboxColumn(
+                help="Whether the dance is included in the matching"
+            ),
+        },
+        disabled=["Dance"],
+        hide_index=True,
+        key=EDITOR_KEY,
+        on_change=handle_dance_table_change,
+    )
@@ -1,59 +1,67 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
-from collections import Counter
+
+from member_table import MemberTable
+from preferences import (
+    PreferenceAggregates,
+    preference_aggregates,
+    rankings_fingerprint,
+)
+
+
+@st.cache_data(max_entries=8)
+def _cached_aggregates(
+    fingerprint: str, _members: MemberTable, included_dances: list[str]
+) -> PreferenceAggregates:
+    # keyed by the fingerprint; the roster itself is not hashed
+    return preference_aggregates(_members, included_dances)
+
+
+def _session_aggregates() -> PreferenceAggregates:
+    members = st.session_state["members"]
+    included_dances = [
+        dance.name for dance in st.session_state["dances"] if dance.included
+    ]
+    fingerprint = rankings_fingerprint(members, included_dances)
+    return _cached_aggregates(fingerprint, members, included_dances)
+
+
+def _popularity_chart(dance_counts: list[tuple[str, int]], x_title: str) -> None:
+    # charting libraries are only loaded once there is something to draw
+    import altair as alt
+
+    chart_data = alt.Data(
+        values=[{"dance": dance, "frequency": count} for dance, count in dance_counts]
+    )
+
+    # Calculate dynamic height based on number of dances (minimum 30px per dance, minimum 300px total)
+    chart_height = max(300, len(dance_counts) * 30)
+
+    # Create horizontal Altair chart with explicit ordering
+    chart = (
+        alt.Chart(chart_data)
+        .mark_bar()
+        .encode(
+            x=alt.X("frequency:Q", title=x_title),
+            y=alt.Y("dance:N", sort=None, title=None),
+            tooltip=["dance:N", "frequency:Q"],
+        )
+        .properties(height=chart_height)
+    )
+
+    st.altair_chart(chart, use_container_width=True)
 
 
 def dances_by_top_3_chart() -> None:
     if not st.session_state["dances"] or not st.session_state["members"]:
         return
 
-    # Count dances that appear in members' top rankings (limited by min(3, max_rank))
-    dance_counts = Counter()
-
-    for member in st.session_state["members"]:
-        # Get the effective top rank limit (minimum of 3 and member's max_rank)
-        effective_top_limit = min(3, member.max_rank)
-
-        # Count dances in the member's top rankings up to the effective limit
-        for i in range(min(effective_top_limit, len(member.dance_rankings))):
-            dance_name = member.dance_rankings[i]
-            dance_counts[dance_name] += 1
+    # Count dances that appear in members' top rankings (limited by min(3, max_rank)),
+    # including dances with 0 appearances in top 3
+    dance_counts = _session_aggregates().top_counts(3)
 
-    # Ensure all dances are included, even those with 0 appearances in top 3
-    all_dance_names = {dance.name for dance in st.session_state["dances"] if dance.included}
-    for dance_name in all_dance_names:
-        if dance_name not in dance_counts:
-            dance_counts[dance_name] = 0
-
-    # Create dataframe sorted by frequency (descending)
     if dance_counts:
-        chart_data = pd.DataFrame(
-            [
-                {"dance": dance, "frequency": count}
-                for dance, count in dance_counts.most_common()
-            ]
-        )
-
         st.subheader("Most Popular Dances")
-
-        # Calculate dynamic height based on number of dances (minimum 30px per dance, minimum 300px total)
-        num_dances = len(chart_data)
-        chart_height = max(300, num_dances * 30)
-
-        # Create horizontal Altair chart with explicit ordering
-        chart = (
-            alt.Chart(chart_data)
-            .mark_bar()
-            .encode(
-                x=alt.X("frequency:Q", title="Appearances in Top 3"),
-                y=alt.Y("dance:N", sort=None, title=None),
-                tooltip=["dance", "frequency"],
-            )
-            .properties(height=chart_height)
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+        _popularity_chart(dance_counts, "Appearances in Top 3")
     else:
         st.subheader("Dances by Top 3 Rankings")
         st.info("No dance rankings data available.")
@@ -63,58 +71,13 @@ def dances_bottom_third_percentile_chart() -> None:
     if not st.session_state["dances"] or not st.session_state["members"]:
         return
 
-    # Count dances that appear in members' bottom third percentile rankings
-    dance_counts = Counter()
-
-    for member in st.session_state["members"]:
-        total_rankings = len(member.dance_rankings)
-        if total_rankings <= 3:
-            # If member has 3 or fewer rankings, skip (no meaningful bottom third)
-            continue
-        
-        # Calculate bottom third: start from the 67th percentile position
-        bottom_third_start = int(total_rankings * 0.67)
-        
-        # Count dances in the bottom third of rankings
-        for i in range(bottom_third_start, total_rankings):
-            if i < len(member.dance_rankings):
-                dance_name = member.dance_rankings[i]
-                dance_counts[dance_name] += 1
-
-    # Ensure all dances are included, even those with 0 appearances in bottom third
-    all_dance_names = {dance.name for dance in st.session_state["dances"] if dance.included}
-    for dance_name in all_dance_names:
-        if dance_name not in dance_counts:
-            dance_counts[dance_name] = 0
-
-    # Create dataframe sorted by frequency (descending)
-    if dance_counts:
-        chart_data = pd.DataFrame(
-            [
-                {"dance": dance, "frequency": count}
-                for dance, count in dance_counts.most_common()
-            ]
-        )
+    # Count dances that appear in the bottom third of the rankings of members
+    # with more than 3 rankings, including dances with 0 appearances
+    dance_counts = _session_aggregates().bottom_counts(start=0.67, min_rankings=4)
 
+    if dance_counts:
         st.subheader("Least Popular Dances")
-
-        # Calculate dynamic height based on number of dances (minimum 30px per dance, minimum 300px total)
-        num_dances = len(chart_data)
-        chart_height = max(300, num_dances * 30)
-
-        # Create horizontal Altair chart with explicit ordering
-        chart = (
-            alt.Chart(chart_data)
-            .mark_bar()
-            .encode(
-                x=alt.X("frequency:Q", title="Appearances in Bottom Third"),
-                y=alt.Y("dance:N", sort=None, title=None),
-                tooltip=["dance", "frequency"],
-            )
-            .properties(height=chart_height)
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+        _popularity_chart(dance_counts, "Appearances in Bottom Third")
     else:
         st.subheader("Dances by Bottom Third Rankings")
         st.info("No dance rankings data available or insufficient ranking data.")
@@ -0,0 +1,38 @@
+import streamlit as st
+from instrumentation import REJECTION_REASONS, MatchStats
+
+
+def match_stats_view(stats: MatchStats) -> None:
+    """
+    Display where a matcher run spent its time and why candidates were passed over.
+
+    Args:
+        stats: Timings and counters collected during the run
+    """
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Compile", f"{stats.compile_seconds * 1000:.1f} ms")
+    col2.metric("TL phase", f"{stats.tl_seconds * 1000:.1f} ms")
+    col3.metric("Rank rounds", f"{stats.rank_seconds * 1000:.1f} ms")
+    col4.metric("Candidate sorting", f"{stats.sorting_seconds * 1000:.1f} ms")
+    if stats.local_search_seconds:
+        st.caption(
+            f"Local search: {stats.local_search_applied} moves applied out of "
+            f"{stats.local_search_evaluated} evaluated in "
+            f"{stats.local_search_seconds * 1000:.1f} ms."
+        )
+
+    rows = stats.round_rows()
+    if not rows:
+        st.caption("Per-round counters are only recorded by the greedy matcher.")
+        return
+
+    st.caption(
+        f"{stats.eligible_candidates} eligible candidates across rank rounds, "
+        f"{stats.seats_filled} seats filled in total."
+    )
+    rejections = stats.rejections()
+    st.write(
+        "Rank round rejections: "
+        + ", ".join(f"{reason}: {rejections[reason]}" for reason in REJECTION_REASONS)
+    )
+    st.dataframe(rows, hide_index=True)
@@ -1,29 +1,80 @@
 import streamlit as st
 import random
-from copy import deepcopy
 
 from components.dance_detail_view import dance_detail_view
+from components.match_stats_view import match_stats_view
 from components.member_detail_view import member_detail_view
 from components.top3_satisfaction_card import top3_satisfaction_card
 from components.max_dances_satisfaction_card import max_dances_satisfaction_card
-from schemas import Dance, Member, Matching, TLMatching
+from components.satisfaction_report_view import satisfaction_report_view
+from components.what_if_view import what_if_view
+from ensemble import run_ensemble
+from engine import CompiledProblem, compile_problem
+from enums import ExportFormat, MatchBackend
+from exports import (
+    ASSIGNMENTS_TABLE_NAME,
+    DANCE_TABLE_NAME,
+    DANCER_TABLE_NAME,
+    FILE_EXTENSIONS,
+    MIME_TYPES,
+    assignments_table,
+    available_formats,
+    table_to_bytes,
+)
+from incremental import rematch
+from instrumentation import MatchStats, ProgressCallback
+from jobs import JobCancelled, start_job
+from local_search import improve_matching
+from member_table import MemberTable
+from metrics import SatisfactionReport, satisfaction_report
+from run_cache import RunCache, run_key
+from schemas import Dance, Matching, TLMatching
 from services import match
 from utils import (
     generate_dance_based_csv,
     generate_dancer_based_csv,
 )
 
+BACKEND_LABELS = {
+    MatchBackend.PYTHON: "Greedy",
+    MatchBackend.NUMPY: "Greedy (vectorized)",
+    MatchBackend.FLOW: "Optimal (min-cost flow)",
+}
+PHASE_LABELS = {
+    "runs": "Scoring runs",
+    "tl": "TL rounds",
+    "rank": "Rank rounds",
+    "improve": "Local search (ms)",
+}
+
 
-def _render_results(matching: Matching, members_snapshot: list[Member], dance_csv, dancer_csv) -> None:
+def _render_results(
+    report: SatisfactionReport,
+    dance_csv,
+    dancer_csv,
+    seed: int | None,
+    stats: MatchStats | None = None,
+    assignments=None,
+) -> None:
     # Display results
     st.subheader("Matching Results")
+    if seed is None:
+        st.caption("Re-matched after edits; no seed reproduces this matching.")
+    else:
+        st.caption(f"Seed: {seed}")
+
+    if stats is not None:
+        with st.expander("Run Statistics"):
+            match_stats_view(stats)
 
     # Display satisfaction metrics
     col1, col2 = st.columns(2)
     with col1:
-        top3_satisfaction_card(matching, members_snapshot)
+        top3_satisfaction_card(report)
     with col2:
-        max_dances_satisfaction_card(matching, members_snapshot)
+        max_dances_satisfaction_card(report)
+    with st.expander("Satisfaction Report"):
+        satisfaction_report_view(report)
 
     st.divider()
 
@@ -35,6 +86,226 @@ def _render_results(matching: Matching, members_snapshot: list[Member], dance_cs
     st.write("### Dancer Assignments")
     st.dataframe(dancer_csv)
 
+    _render_downloads(
+        {
+            DANCE_TABLE_NAME: dance_csv,
+            DANCER_TABLE_NAME: dancer_csv,
+            ASSIGNMENTS_TABLE_NAME: assignments,
+        }
+    )
+
+
+def _render_downloads(tables: dict) -> None:
+    st.write("### Export")
+    export_format: ExportFormat = st.selectbox(
+        "Format",
+        available_formats(),
+        help="The assignments table has one row per dancer and dance, with "
+        "typed columns, for loading into other tools.",
+    )
+    cols = st.columns(len(tables))
+    for col, (name, table) in zip(cols, tables.items()):
+        if table is None:
+            continue
+        with col:
+            st.download_button(
+                f"Download {name.replace('_', ' ')}",
+                data=table_to_bytes(table, export_format),
+                file_name=f"{name}.{FILE_EXTENSIONS[export_format]}",
+                mime=MIME_TYPES[export_format],
+            )
+
+
+@st.cache_resource
+def _run_cache() -> RunCache:
+    return RunCache()
+
+
+def _run_label(
+    seed: int, backend: MatchBackend, num_runs: int, improve_seconds: float
+) -> str:
+    label = f"Seed {seed}, {BACKEND_LABELS[backend]}"
+    if num_runs > 1:
+        label += f", best of {num_runs}"
+    if improve_seconds > 0:
+        label += f", improved for {improve_seconds:g}s"
+    return label
+
+
+def _set_results(results: dict, cache_key: str | None = None) -> None:
+    st.session_state["matching_results"] = {**results, "key": cache_key}
+    st.session_state["pending_changes"] = {"members": set(), "dances": set()}
+    if cache_key is not None:
+        st.session_state["selected_run"] = cache_key
+
+
+def _remember_run(cache_key: str, label: str) -> None:
+    # most recent last; a repeated run moves to the end
+    history: dict[str, str] = st.session_state["run_history"]
+    history.pop(cache_key, None)
+    history[cache_key] = label
+
+
+def _load_selected_run() -> None:
+    cache_key = st.session_state["selected_run"]
+    results = _run_cache().get(cache_key)
+    if results is None:
+        history = st.session_state["run_history"]
+        history.pop(cache_key, None)
+        current_key = (st.session_state["matching_results"] or {}).get("key")
+        if current_key in history:
+            st.session_state["selected_run"] = current_key
+        else:
+            del st.session_state["selected_run"]
+        st.toast("That run is no longer cached; run it again to restore it.")
+        return
+    # the picked run becomes the current one; edits made since it ran aren't
+    # tracked against it, so "Re-run Changes" waits for the next edit
+    _set_results(results, cache_key)
+
+
+def _build_results(
+    matching: Matching,
+    tl_matching: TLMatching,
+    included_dances: list[Dance],
+    members_snapshot: MemberTable,
+    seed: int | None,
+    stats: MatchStats | None = None,
+) -> dict:
+    # doesn't touch the session, so it can run in a background job
+    dance_csv = generate_dance_based_csv(matching, included_dances, tl_matching)
+    dancer_csv = generate_dancer_based_csv(
+        matching, members_snapshot
+    )
+    assignments = assignments_table(matching, tl_matching, members_snapshot)
+    # computed once here; reruns only render the stored numbers
+    report = satisfaction_report(matching, members_snapshot, included_dances)
+    return {
+        "matching": matching,
+        "tl_matching": tl_matching,
+        "members_snapshot": members_snapshot,
+        "report": report,
+        "dance_csv": dance_csv,
+        "dancer_csv": dancer_csv,
+        "assignments": assignments,
+        "seed": seed,
+        "stats": stats,
+    }
+
+
+def _store_results(
+    results: dict,
+    problem: CompiledProblem | None = None,
+    cache_key: str | None = None,
+    label: str | None = None,
+) -> None:
+    # Persist results so they remain visible across reruns/edits
+    if cache_key is not None:
+        # exports are cached with the matching so revisiting a run is a load
+        _run_cache().put(cache_key, results)
+        _remember_run(cache_key, label or f"Seed {results['seed']}")
+    _set_results({**results, "problem": problem}, cache_key)
+
+
+def _run_matcher(
+    members: MemberTable,
+    included_dances: list[Dance],
+    seed: int,
+    backend: MatchBackend,
+    num_runs: int,
+    improve_seconds: float,
+    collect_stats: bool,
+    progress: ProgressCallback | None = None,
+) -> dict:
+    """Run the matcher and build its results; the body of a matching job."""
+    stats = MatchStats() if collect_stats else None
+    if num_runs > 1:
+        result = run_ensemble(
+            members,
+            included_dances,
+            num_runs,
+            seed=seed,
+            backend=backend,
+            stats=stats,
+            progress=progress,
+        )
+        matching, tl_matching, seed = result.matching, result.tl_matching, result.seed
+    else:
+        matching, tl_matching = match(
+            members,
+            included_dances,
+            backend=backend,
+            rng=random.Random(seed),
+            stats=stats,
+            progress=progress,
+        )
+    if improve_seconds > 0:
+        matching = improve_matching(
+            members,
+            included_dances,
+            matching,
+            tl_matching,
+            budget_seconds=improve_seconds,
+            rng=random.Random(seed),
+            stats=stats,
+            progress=progress,
+        ).matching
+    return _build_results(matching, tl_matching, included_dances, members, seed, stats)
+
+
+def _collect_finished_job() -> None:
+    pending = st.session_state["matching_job"]
+    if pending is None or not pending["job"].done():
+        return
+    st.session_state["matching_job"] = None
+    try:
+        results = pending["job"].result()
+    except JobCancelled:
+        st.info("Matching cancelled.")
+        return
+    except Exception as e:
+        import traceback
+
+        st.error(f"Error running matcher: {e}")
+        st.code("".join(traceback.format_exception(e)))
+        return
+    _store_results(
+        results,
+        cache_key=pending["cache_key"],
+        label=_run_label(
+            results["seed"],
+            pending["backend"],
+            pending["num_runs"],
+            pending["improve_seconds"],
+        ),
+    )
+
+
+@st.fragment(run_every=0.5)
+def _job_progress() -> None:
+    pending = st.session_state["matching_job"]
+    if pending is None:
+        return
+    job = pending["job"]
+    if job.done():
+        # collected by the full rerun
+        st.rerun()
+
+    progress = job.progress
+    if job.cancelled:
+        st.progress(progress.fraction if progress else 0.0, text="Cancelling...")
+        return
+    if progress is None:
+        text, fraction = "Starting...", 0.0
+    else:
+        text = f"{PHASE_LABELS.get(progress.phase, progress.phase)}: "
+        text += f"{progress.done}/{progress.total}"
+        fraction = progress.fraction
+    st.progress(fraction, text=text)
+    if st.button("Cancel"):
+        job.cancel()
+        st.rerun(scope="fragment")
+
 
 def matching_tab() -> None:
     if not st.session_state["members"] or not st.session_state["dances"]:
@@ -45,44 +316,184 @@ def matching_tab() -> None:
         member_detail_view()
     with st.expander("Dance Settings"):
         dance_detail_view()
+    with st.expander("What-if Analysis"):
+        what_if_view()
 
     st.divider()
 
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        backend = st.selectbox(
+            "Matcher",
+            list(BACKEND_LABELS),
+            format_func=BACKEND_LABELS.get,
+            help="The optimal matcher fills as many seats as possible while "
+            "keeping members close to their top choices, instead of filling "
+            "seats round by round.",
+        )
+    with col2:
+        num_runs = st.number_input(
+            "Number of runs",
+            min_value=1,
+            value=1,
+            help="With more than one run, the matcher is run with different seeds "
+            "in parallel and the most satisfying matching is kept.",
+        )
+    with col3:
+        seed = st.number_input(
+            "Seed",
+            min_value=0,
+            value=None,
+            step=1,
+            placeholder="Random",
+            help="Enter the seed of a previous run to reproduce it.",
+        )
+
+    improve_seconds = st.number_input(
+        "Local search time (s)",
+        min_value=0.0,
+        value=0.0,
+        step=0.5,
+        help="After matching, spend up to this long swapping and moving dancers "
+        "between dances to raise satisfaction. TL seats stay where they are. "
+        "0 skips the local search.",
+    )
+
+    collect_stats = st.toggle(
+        "Collect run statistics",
+        help="Record how long each matching phase takes and why candidates "
+        "were passed over in each round.",
+    )
+
+    _collect_finished_job()
+    job_running = st.session_state["matching_job"] is not None
+
+    col1, col2 = st.columns(2)
+    with col1:
+        run_clicked = st.button("Run Matcher", type="primary", disabled=job_running)
+    with col2:
+        pending_changes = st.session_state["pending_changes"]
+        rematch_clicked = st.button(
+            "Re-run Changes",
+            disabled=job_running
+            or not st.session_state.get("matching_results")
+            or not (pending_changes["members"] or pending_changes["dances"]),
+            help="Only re-match the members and dances edited since the last run, "
+            "keeping everything else from the current results.",
+        )
+
     # Add button to run matcher
-    if st.button("Run Matcher", type="primary"):
+    if run_clicked:
         try:
-            random.seed()
+            if seed is None:
+                seed = random.SystemRandom().randrange(2**32)
             included_dances = [
                 dance for dance in st.session_state["dances"] if dance.included
             ]
-            matching, tl_matching = match(st.session_state["members"], included_dances)
-
-            # Generate CSV data using a snapshot of current state
-            members_snapshot: list[Member] = deepcopy(st.session_state["members"])
-            dance_csv = generate_dance_based_csv(matching, included_dances, tl_matching)
-            dancer_csv = generate_dancer_based_csv(
-                matching, members_snapshot
+            cache_key = run_key(
+                st.session_state["members"],
+                included_dances,
+                seed,
+                backend=backend,
+                num_runs=num_runs,
+                improve_seconds=improve_seconds,
             )
-
-            # Persist results so they remain visible across reruns/edits
-            st.session_state["matching_results"] = {
-                "matching": matching,
-                "members_snapshot": members_snapshot,
-                "dance_csv": dance_csv,
-                "dancer_csv": dancer_csv,
-            }
+            cached = _run_cache().get(cache_key)
+            # a cached run without statistics can't answer a request for them
+            if cached is not None and (
+                cached["stats"] is not None or not collect_stats
+            ):
+                _remember_run(
+                    cache_key,
+                    _run_label(cached["seed"], backend, num_runs, improve_seconds),
+                )
+                _set_results(cached, cache_key)
+                st.toast("Loaded an identical earlier run from the cache.")
+            else:
+                # the job gets its own members and dances, so edits made while
+                # it runs (which change them in place) stay out of it
+                st.session_state["matching_job"] = {
+                    "job": start_job(
+                        _run_matcher,
+                        st.session_state["members"].snapshot(),
+                        [dance.model_copy() for dance in included_dances],
+                        seed,
+                        backend,
+                        num_runs,
+                        improve_seconds,
+                        collect_stats,
+                    ),
+                    "cache_key": cache_key,
+                    "backend": backend,
+                    "num_runs": num_runs,
+                    "improve_seconds": improve_seconds,
+                }
         except Exception as e:
             import traceback
 
             st.error(f"Error running matcher: {e}")
             st.code(traceback.format_exc())
 
+    if rematch_clicked:
+        try:
+            previous_results = st.session_state["matching_results"]
+            included_dances = [
+                dance for dance in st.session_state["dances"] if dance.included
+            ]
+            # reuse the problem compiled for the last re-run, if any
+            problem = previous_results.get("problem") or compile_problem(
+                st.session_state["members"], included_dances
+            )
+            matching, tl_matching = rematch(
+                st.session_state["members"],
+                included_dances,
+                (previous_results["matching"], previous_results["tl_matching"]),
+                changed_members=pending_changes["members"],
+                changed_dances=pending_changes["dances"],
+                problem=problem,
+            )
+            _store_results(
+                _build_results(
+                    matching,
+                    tl_matching,
+                    included_dances,
+                    st.session_state["members"].snapshot(),
+                    # a rematch builds on the previous matching, so the seed
+                    # of the run it started from doesn't reproduce it
+                    None,
+                ),
+                problem=problem,
+            )
+        except Exception as e:
+            import traceback
+
+            st.error(f"Error re-running matcher: {e}")
+            st.code(traceback.format_exc())
+
+    # runs in the background; the rest of the tab stays usable meanwhile
+    if st.session_state["matching_job"] is not None:
+        _job_progress()
+
+    history: dict[str, str] = st.session_state["run_history"]
+    if len(history) > 1:
+        st.selectbox(
+            "Previous runs",
+            list(reversed(history)),
+            format_func=history.get,
+            key="selected_run",
+            on_change=_load_selected_run,
+            help="Switch between earlier runs of this roster. They are loaded "
+            "from the run cache, exports included.",
+        )
+
     # Always render last results if available
     results = st.session_state.get("matching_results")
     if results:
         _render_results(
-            matching=results["matching"],
-            members_snapshot=results["members_snapshot"],
+            report=results["report"],
             dance_csv=results["dance_csv"],
             dancer_csv=results["dancer_csv"],
+            seed=results["seed"],
+            stats=results.get("stats"),
+            assignments=results.get("assignments"),
         )
@@ -1,101 +1,142 @@
 import streamlit as st
 import textwrap
+from member_index import MemberNameIndex
 from schemas import Member
 
+PAGE_SIZE = 25
+
+
+def select_member(member_id: int) -> None:
+    st.session_state["selected_member_id"] = member_id
 
-def update_selected_member_lateness_score() -> None:
-    if "selected_member_idx" not in st.session_state:
-        return
-    idx = st.session_state["selected_member_idx"]
-    selected_member: Member = st.session_state["members"][idx]
-    selected_member.lateness_score = st.session_state[
-        f"lateness_{selected_member.name.lower().replace(' ', '_')}"
-    ]
 
+def reset_member_page() -> None:
+    st.session_state["member_page"] = 1
 
-def update_selected_member_busyness_score() -> None:
-    if "selected_member_idx" not in st.session_state:
+
+def update_member_score(member_id: int, field: str, key: str) -> None:
+    if key not in st.session_state:
         return
-    idx = st.session_state["selected_member_idx"]
-    selected_member: Member = st.session_state["members"][idx]
-    selected_member.busyness_score = st.session_state[
-        f"busyness_{selected_member.name.lower().replace(' ', '_')}"
-    ]
+    member: Member = st.session_state["members"][member_id]
+    setattr(member, field, st.session_state[key])
+    st.session_state["pending_changes"]["members"].add(member.name)
 
 
-def member_detail_view() -> None:
-    if not st.session_state["members"]:
+def _member_list(index: MemberNameIndex) -> None:
+    members = st.session_state["members"]
+    query = st.text_input(
+        "Search members",
+        placeholder="Name or part of a name",
+        key="member_search",
+        on_change=reset_member_page,
+    )
+    matches = index.search(query)
+    if not matches:
+        st.caption("No members match.")
         return
 
-    col1, col2 = st.columns([1, 3])
-    with col1:
-        st.subheader("Members")
-        st.session_state["selected_member_idx"] = st.radio(
-            "Select a member:",
-            range(len(st.session_state["members"])),
-            index=0,
-            format_func=lambda i: st.session_state["members"][i].name,
-            key="member_selector",
-        )
-    with col2:
-        selected_member: Member = st.session_state["members"][
-            st.session_state["selected_member_idx"]
-        ]
+    num_pages = -(-len(matches) // PAGE_SIZE)
+    if st.session_state.get("member_page", 1) > num_pages:
+        st.session_state["member_page"] = num_pages
+    page = st.number_input(
+        f"Page (of {num_pages})",
+        min_value=1,
+        max_value=num_pages,
+        key="member_page",
+    )
+    st.caption(f"{len(matches)} of {len(index)} members")
 
-        st.subheader(f"{selected_member.name}")
-        st.markdown(
-            textwrap.dedent(f"""
-                * {selected_member.seniority.value.capitalize()}
-                * Max Dances: {selected_member.max_dances}
-                * Max Rank: {selected_member.max_rank}
-            """).strip()
+    # only the visible page is rendered
+    selected_id = st.session_state.get("selected_member_id")
+    for member_id in matches[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]:
+        st.button(
+            members.names[member_id],
+            key=f"member_{member_id}",
+            type="primary" if member_id == selected_id else "secondary",
+            on_click=select_member,
+            args=(member_id,),
         )
 
-        st.markdown("### Score adjustments:")
-        st.number_input(
-            "Lateness score",
-            min_value=0,
-            value=selected_member.lateness_score,
-            key="lateness_" + "_".join(selected_member.name.lower().split()),
-            on_change=update_selected_member_lateness_score,
-        )
-        st.number_input(
-            "Busyness score",
-            min_value=0,
-            value=selected_member.busyness_score,
-            key="busyness_" + "_".join(selected_member.name.lower().split()),
-            on_change=update_selected_member_busyness_score,
-        )
 
-        if selected_member.dances_willing_to_tl:
-            st.markdown("### Willing to TL:")
-            st.markdown(
-                "\n".join(
-                    sorted(
-                        [
-                            f"* {dance_name}"
-                            for dance_name in selected_member.dances_willing_to_tl
-                        ]
-                    )
-                )
-            )
+def _member_details(member_id: int) -> None:
+    selected_member: Member = st.session_state["members"][member_id]
 
-        if selected_member.allowed_co_tls:
-            st.markdown("### Would be co-TLs with:")
-            st.markdown(
-                "\n".join([f"* {co_tl}" for co_tl in selected_member.allowed_co_tls])
-            )
+    st.subheader(f"{selected_member.name}")
+    st.markdown(
+        textwrap.dedent(f"""
+            * {selected_member.seniority.value.capitalize()}
+            * Max Dances: {selected_member.max_dances}
+            * Max Rank: {selected_member.max_rank}
+        """).strip()
+    )
 
-        st.markdown("### Dance rankings (up to max rank)")
-        if selected_member.dance_rankings:
-            truncated_rankings = selected_member.dance_rankings[
-                : selected_member.max_rank
-            ]
-            st.markdown(
-                "\n".join(
+    st.markdown("### Score adjustments:")
+    lateness_key = "lateness_" + "_".join(selected_member.name.lower().split())
+    st.number_input(
+        "Lateness score",
+        min_value=0,
+        value=selected_member.lateness_score,
+        key=lateness_key,
+        on_change=update_member_score,
+        args=(member_id, "lateness_score", lateness_key),
+    )
+    busyness_key = "busyness_" + "_".join(selected_member.name.lower().split())
+    st.number_input(
+        "Busyness score",
+        min_value=0,
+        value=selected_member.busyness_score,
+        key=busyness_key,
+        on_change=update_member_score,
+        args=(member_id, "busyness_score", busyness_key),
+    )
+
+    if selected_member.dances_willing_to_tl:
+        st.markdown("### Willing to TL:")
+        st.markdown(
+            "\n".join(
+                sorted(
                     [
-                        f"{i + 1}. {dance_name}"
-                        for i, dance_name in enumerate(truncated_rankings)
+                        f"* {dance_name}"
+                        for dance_name in selected_member.dances_willing_to_tl
                     ]
                 )
             )
+        )
+
+    if selected_member.co_tl_with_anyone:
+        st.markdown("### Would be co-TLs with:")
+        st.markdown("* Anyone")
+    elif selected_member.allowed_co_tls:
+        st.markdown("### Would be co-TLs with:")
+        st.markdown(
+            "\n".join([f"* {co_tl}" for co_tl in selected_member.allowed_co_tls])
+        )
+
+    st.markdown("### Dance rankings (up to max rank)")
+    if selected_member.dance_rankings:
+        truncated_rankings = selected_member.dance_rankings[: selected_member.max_rank]
+        st.markdown(
+            "\n".join(
+                [
+                    f"{i + 1}. {dance_name}"
+                    for i, dance_name in enumerate(truncated_rankings)
+                ]
+            )
+        )
+
+
+def member_detail_view() -> None:
+    if not st.session_state["members"]:
+        return
+
+    index: MemberNameIndex = st.session_state["member_name_index"]
+    if st.session_state.get("selected_member_id") is None:
+        # the first member, like the old member list
+        st.session_state["selected_member_id"] = index.search("")[0]
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.subheader("Members")
+        _member_list(index)
+    with col2:
+        _member_details(st.session_state["selected_member_id"])
@@ -0,0 +1,68 @@
+import streamlit as st
+from metrics import SatisfactionReport
+
+
+def satisfaction_report_view(report: SatisfactionReport) -> None:
+    """
+    Display the full satisfaction report: top 1 hits, the assigned rank and
+    max dances gap distributions, empty seats and a per-seniority breakdown.
+
+    Args:
+        report: The satisfaction report computed when the matching was made
+    """
+    st.metric(
+        label="Got their first choice",
+        value=f"{report.members_with_top1} / {report.total_members}",
+        delta=f"{report.top1_rate * 100:.1f}%",
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Assignments by rank**")
+        st.bar_chart(
+            {
+                "Rank": [
+                    "Unranked" if rank is None else str(rank)
+                    for rank in report.rank_distribution
+                ],
+                "Assignments": list(report.rank_distribution.values()),
+            },
+            x="Rank",
+            y="Assignments",
+        )
+    with col2:
+        st.write("**Dances short of max dances**")
+        st.bar_chart(
+            {
+                "Dances short": [str(gap) for gap in report.max_dances_gaps],
+                "Members": list(report.max_dances_gaps.values()),
+            },
+            x="Dances short",
+            y="Members",
+        )
+
+    empty_seats = {name: seats for name, seats in report.empty_seats.items() if seats}
+    if empty_seats:
+        st.write("**Empty seats**")
+        st.dataframe(
+            [{"Dance": name, "Empty seats": seats} for name, seats in empty_seats.items()],
+            hide_index=True,
+        )
+    else:
+        st.write("Every seat is filled.")
+
+    st.write("**By seniority**")
+    st.dataframe(
+        [
+            {
+                "Seniority": seniority.value.replace("_", " ").capitalize(),
+                "Members": breakdown.members,
+                "Got first choice": breakdown.members_with_top1,
+                "Got a top 3 dance": breakdown.members_with_top3,
+                "Within 2 of max": breakdown.members_near_max_dances,
+                "Dances assigned": breakdown.assignments,
+            }
+            for seniority, breakdown in report.by_seniority.items()
+        ],
+        hide_index=True,
+    )
@@ -1,5 +1,9 @@
-from copy import deepcopy
 import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+from dance_index import build_dance_member_index
+from member_index import MemberNameIndex
+from member_table import MemberTable
+from schemas import Dance
 from utils import (
     process_rankings_csv,
     process_dances_csv,
@@ -8,19 +12,43 @@ from utils import (
 from components.dances_by_top_3_chart import dances_by_top_3_chart, dances_bottom_third_percentile_chart
 
 
+# parsing is cached here, at the UI edge, so utils stays usable without streamlit
+@st.cache_data
+def load_rankings_csv(rankings_csv: UploadedFile) -> MemberTable:
+    members = sorted(process_rankings_csv(rankings_csv), key=lambda x: x.name)
+    return MemberTable.from_members(members)
+
+
+@st.cache_data
+def load_dances_csv(dances_csv: UploadedFile) -> list[Dance]:
+    return process_dances_csv(dances_csv)
+
+
+def _reset_results() -> None:
+    st.session_state["matching_results"] = None
+    st.session_state["run_history"] = {}
+    st.session_state["what_if_results"] = None
+    # a running job would store results for the previous upload
+    pending_job = st.session_state.get("matching_job")
+    if pending_job is not None:
+        pending_job["job"].cancel()
+        st.session_state["matching_job"] = None
+
+
 def handle_rankings_csv_upload() -> None:
     if "rankings_csv" not in st.session_state:
         return
     if not st.session_state["rankings_csv"]:
         return
     rankings_csv = st.session_state["rankings_csv"]
-    members = sorted(process_rankings_csv(rankings_csv), key=lambda x: x.name)
-    st.session_state["members"] = deepcopy(members)
-    st.session_state["original_members"] = {
-        member.name: deepcopy(member) for member in members
-    }
+    members = load_rankings_csv(rankings_csv)
+    st.session_state["members"] = members
+    # indexable by member name, like the members themselves
+    st.session_state["original_members"] = members.snapshot()
     # reset filtering flag so rankings are re-filtered when both CSVs are available
     st.session_state["rankings_filtered"] = False
+    # results of a previous roster can't be incrementally updated
+    _reset_results()
 
 
 def handle_dances_csv_upload() -> None:
@@ -30,13 +58,16 @@ def handle_dances_csv_upload() -> None:
         return
     dances_csv = st.session_state["dances_csv"]
     st.session_state["dances"] = sorted(
-        process_dances_csv(dances_csv), key=lambda x: x.name
+        load_dances_csv(dances_csv), key=lambda x: x.name
     )
     st.session_state["dances_index"] = {
         dance.name: dance for dance in st.session_state["dances"]
     }
+    # edits made in the dance table belong to the previous dances
+    st.session_state.pop("dance_editor", None)
     # reset filtering flag so rankings are re-filtered when both CSVs are available
     st.session_state["rankings_filtered"] = False
+    _reset_results()
 
 
 def setup_tab() -> None:
@@ -69,9 +100,14 @@ def setup_tab() -> None:
             st.session_state["members"], valid_dances
         )
         st.session_state["members"] = filtered_members
-        st.session_state["original_members"] = {
-            member.name: deepcopy(member) for member in filtered_members
-        }
+        st.session_state["original_members"] = filtered_members.snapshot()
+        st.session_state["dance_member_index"] = build_dance_member_index(
+            filtered_members
+        )
+        st.session_state["member_name_index"] = MemberNameIndex(
+            filtered_members.names
+        )
+        st.session_state["selected_member_id"] = None
         st.session_state["rankings_filtered"] = True
 
     st.success("Files processed successfully!")
@@ -0,0 +1,129 @@
+import pandas as pd
+import streamlit as st
+
+from what_if import Scenario, ScenarioMetrics, WhatIfResult, run_what_if
+
+# change kind -> Scenario field it fills
+CHANGE_KINDS = {
+    "Add seats": "capacity_changes",
+    "Include dance": "included",
+    "Exclude dance": "included",
+    "Set max dances": "max_dances",
+}
+METRIC_LABELS = {
+    "members_with_top1": "Got first choice",
+    "members_with_top3": "Got a top 3 dance",
+    "members_near_max_dances": "Near max dances",
+    "seats_filled": "Seats filled",
+    "open_seats": "Open seats",
+}
+EMPTY_TABLE = pd.DataFrame(
+    {
+        "Scenario": pd.Series(dtype="str"),
+        "Change": pd.Series(dtype="str"),
+        "Dance or member": pd.Series(dtype="str"),
+        "Value": pd.Series(dtype="Int64"),
+    }
+)
+
+
+def _scenarios_from_table(table: pd.DataFrame) -> list[Scenario]:
+    """Group the edited rows by scenario name, in order of first appearance."""
+    scenarios: dict[str, Scenario] = {}
+    for row in table.itertuples(index=False):
+        name, kind, target, value = row
+        if pd.isna(name) or pd.isna(kind) or pd.isna(target):
+            continue
+        scenario = scenarios.setdefault(name, Scenario(name))
+        changes = getattr(scenario, CHANGE_KINDS[kind])
+        if kind == "Include dance":
+            changes[target] = True
+        elif kind == "Exclude dance":
+            changes[target] = False
+        elif pd.isna(value):
+            raise ValueError(f"Scenario {name!r}: {kind.lower()} needs a value.")
+        else:
+            changes[target] = int(value)
+    return list(scenarios.values())
+
+
+def _metrics_row(name: str, metrics: ScenarioMetrics, delta=None) -> dict:
+    row = {"Scenario": name}
+    for field, label in METRIC_LABELS.items():
+        row[label] = getattr(metrics, field)
+        if delta is not None:
+            row[f"Δ {label}"] = getattr(delta, field)
+    return row
+
+
+def _render_what_if(result: WhatIfResult) -> None:
+    rows = [_metrics_row("Baseline", result.baseline)]
+    rows += [
+        _metrics_row(item.scenario.name, item.metrics, item.delta)
+        for item in result.scenarios
+    ]
+    st.dataframe(
+        pd.DataFrame(rows).style.format(precision=1, na_rep=""),
+        hide_index=True,
+    )
+
+
+def what_if_view() -> None:
+    """
+    Edit scenarios of dance capacity, inclusion and max dances changes,
+    evaluate them against the current roster and dances and show how each
+    moves the satisfaction metrics.
+    """
+    st.caption(
+        "Each row is one change; rows with the same scenario name are tried "
+        "together. Add seats takes a negative value to remove them."
+    )
+    table = st.data_editor(
+        EMPTY_TABLE,
+        num_rows="dynamic",
+        column_config={
+            "Scenario": st.column_config.TextColumn(required=True),
+            "Change": st.column_config.SelectboxColumn(
+                options=list(CHANGE_KINDS), required=True
+            ),
+            "Dance or member": st.column_config.TextColumn(required=True),
+            "Value": st.column_config.NumberColumn(
+                step=1, help="Seats to add, or the new max dances."
+            ),
+        },
+        hide_index=True,
+        key="what_if_table",
+    )
+    runs_per_scenario = st.number_input(
+        "Runs per scenario",
+        min_value=1,
+        value=3,
+        help="Seeded runs averaged per scenario. Every scenario uses the same "
+        "seeds as the baseline.",
+    )
+
+    if st.button("Evaluate Scenarios", disabled=table.dropna(how="all").empty):
+        progress_bar = st.progress(0.0, text="Evaluating scenarios...")
+
+        def progress(phase: str, done: int, total: int) -> None:
+            progress_bar.progress(
+                done / total, text=f"Evaluating scenarios: {done}/{total}"
+            )
+
+        try:
+            st.session_state["what_if_results"] = run_what_if(
+                st.session_state["members"],
+                st.session_state["dances"],
+                _scenarios_from_table(table),
+                original=st.session_state["original_members"],
+                index=st.session_state["dance_member_index"],
+                runs_per_scenario=runs_per_scenario,
+                progress=progress,
+            )
+        except ValueError as e:
+            st.error(str(e))
+        progress_bar.empty()
+
+    result = st.session_state["what_if_results"]
+    if result is not None:
+        _render_what_if(result)
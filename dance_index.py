@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from member_table import MemberTable
+from schemas import Dance
+
+# dance name -> (member ID, position in the member's original rankings), with
+# position None for members who only picked the dance to TL
+DanceMemberIndex = dict[str, list[tuple[int, int | None]]]
+
+
+def build_dance_member_index(original: MemberTable) -> DanceMemberIndex:
+    """
+    Invert the original rankings and TL choices: for every dance, the members
+    who ranked or want to TL it. Built once per upload so toggling a dance only
+    touches its members.
+    """
+    index: DanceMemberIndex = defaultdict(list)
+    dance_names = original.dance_names
+    for member_id, (rankings, tl_dances) in enumerate(
+        zip(original.rankings, original.tl_dances)
+    ):
+        for rank, dance_id in enumerate(rankings):
+            index[dance_names[dance_id]].append((member_id, rank))
+        for dance_id in tl_dances.difference(rankings):
+            index[dance_names[dance_id]].append((member_id, None))
+    return dict(index)
+
+
+def set_dance_inclusion(
+    members: MemberTable,
+    original: MemberTable,
+    index: DanceMemberIndex,
+    dances_index: dict[str, Dance],
+    included: dict[str, bool],
+) -> set[str]:
+    """
+    Include or exclude several dances at once, and update the rankings, max rank
+    and TL choices of just the members who ranked or want to TL one of them.
+
+    Each affected member is recomputed from their original rankings in a single
+    pass, however many dances changed: excluded dances are dropped, and max rank
+    shrinks by the number of excluded dances that were within the original max
+    rank.
+
+    Args:
+        members: The session roster to update, in the same member order as
+            `original`.
+        original: The roster as uploaded (after filtering to known dances).
+        index: `build_dance_member_index(original)`.
+        dances_index: Every dance by name; its `included` flag is updated.
+        included: Dance name -> whether to include (True) or exclude (False) it.
+
+    Returns:
+        Names of the members whose settings changed.
+    """
+    changed_dances = [
+        name for name, value in included.items() if dances_index[name].included != value
+    ]
+    for name in changed_dances:
+        dances_index[name].included = included[name]
+
+    affected_ids = {
+        member_id for name in changed_dances for member_id, _ in index.get(name, [])
+    }
+    for member_id in affected_ids:
+        original_member = original[member_id]
+        original_rankings = original_member.dance_rankings
+        excluded = {
+            dance_name
+            for dance_name in original_rankings
+            + list(original_member.dances_willing_to_tl)
+            if dance_name not in dances_index or not dances_index[dance_name].included
+        }
+        num_excluded_in_reach = sum(
+            dance_name in excluded
+            for dance_name in original_rankings[: original_member.max_rank]
+        )
+
+        member = members[member_id]
+        member.dance_rankings = [
+            dance_name for dance_name in original_rankings if dance_name not in excluded
+        ]
+        member.max_rank = original_member.max_rank - num_excluded_in_reach
+        member.dances_willing_to_tl = original_member.dances_willing_to_tl - excluded
+
+    return {members.names[member_id] for member_id in affected_ids}
+
@@ -0,0 +1,519 @@
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import random
+import time
+
+from co_tls import CoTLCompatibility
+from constants import SENIORITY_ORDER
+from instrumentation import MatchStats, ProgressCallback, RoundStats
+from member_table import MemberTable
+from schemas import Member, Dance, Matching, TLMatching
+
+
+@dataclass
+class CompiledProblem:
+    """
+    Members and dances compiled into integer IDs and flat per-ID lists so the
+    rank rounds never have to search for a dance or member by name.
+
+    `rank_buckets[r]` maps every member whose r-th choice is a known dance within
+    their max rank to that dance's ID, in member order. `tl_rank_buckets[r]` is
+    the subset of those choices the member is willing to TL.
+
+    A compiled problem can be patched in place with `update_member` and
+    `update_dance` after small edits instead of being compiled again.
+    """
+
+    member_names: list[str]
+    dance_names: list[str]
+    member_ids: dict[str, int]
+    dance_ids: dict[str, int]
+
+    capacities: list[int]
+    max_dances: list[int]
+    max_tl: list[int]
+    priorities: list[tuple[int, int, int]]
+    co_tls: CoTLCompatibility
+
+    rank_buckets: list[dict[int, int]]
+    tl_rank_buckets: list[dict[int, int]]
+
+    # dances dropped by `update_dance`; their IDs stay reserved but unused
+    inactive_dances: set[int] = field(default_factory=set)
+
+    @property
+    def num_rounds(self) -> int:
+        return len(self.rank_buckets)
+
+    def _rankings(self, member: Member) -> Iterator[tuple[int, int, bool]]:
+        # (rank, dance ID, willing to TL) of every choice the member can get
+        dance_ids = self.dance_ids
+        willing_to_tl = member.dances_willing_to_tl if member.max_tl > 0 else ()
+        last_rank = min(member.max_rank, len(member.dance_rankings), self.num_rounds)
+        for rank in range(last_rank):
+            dance_name = member.dance_rankings[rank]
+            dance_id = dance_ids.get(dance_name)
+            if dance_id is None or dance_id in self.inactive_dances:
+                continue
+            yield rank, dance_id, dance_name in willing_to_tl
+
+    def _add_rankings(self, member_id: int, member: Member) -> None:
+        for rank, dance_id, willing_to_tl in self._rankings(member):
+            self.rank_buckets[rank][member_id] = dance_id
+            if willing_to_tl:
+                self.tl_rank_buckets[rank][member_id] = dance_id
+
+    def update_member(self, member: Member) -> None:
+        """
+        Recompile one existing member's limits, priority and rankings.
+
+        A choice that is only modified keeps the member's place in its bucket,
+        so re-saving an unchanged member doesn't change tie-breaking; only
+        newly reachable choices are added at the end of their bucket.
+        """
+        member_id = self.member_ids[member.name]
+        self.max_dances[member_id] = member.max_dances
+        self.max_tl[member_id] = member.max_tl
+        self.priorities[member_id] = _priority(member)
+        self.co_tls.set_member(
+            member_id,
+            member.co_tl_with_anyone,
+            (
+                self.member_ids[name]
+                for name in member.allowed_co_tls
+                if name in self.member_ids
+            ),
+        )
+        choices = {
+            rank: (dance_id, willing_to_tl)
+            for rank, dance_id, willing_to_tl in self._rankings(member)
+        }
+        for rank, (bucket, tl_bucket) in enumerate(
+            zip(self.rank_buckets, self.tl_rank_buckets)
+        ):
+            dance_id, willing_to_tl = choices.get(rank, (None, False))
+            # assigning to an existing key keeps its position in the dict
+            if dance_id is None:
+                bucket.pop(member_id, None)
+            else:
+                bucket[member_id] = dance_id
+            if willing_to_tl:
+                tl_bucket[member_id] = dance_id
+            else:
+                tl_bucket.pop(member_id, None)
+
+    def update_dance(self, dance_name: str, dance: Dance | None) -> None:
+        """
+        Update a dance's capacity, add a new dance, or with `dance=None` drop it
+        from the matching. Members whose rankings changed because of this must
+        be updated with `update_member` afterwards.
+        """
+        dance_id = self.dance_ids.get(dance_name)
+        if dance is None:
+            if dance_id is not None:
+                self.inactive_dances.add(dance_id)
+                self.capacities[dance_id] = 0
+            return
+
+        if dance_id is None:
+            dance_id = len(self.dance_names)
+            self.dance_names.append(dance_name)
+            self.dance_ids[dance_name] = dance_id
+            self.capacities.append(dance.num_dancers)
+            self.rank_buckets.append({})
+            self.tl_rank_buckets.append({})
+        self.inactive_dances.discard(dance_id)
+        self.capacities[dance_id] = dance.num_dancers
+
+    def copy(self) -> "CompiledProblem":
+        """
+        A copy that can be patched with `update_member` and `update_dance`
+        without changing this problem. Member names and IDs are shared, every
+        list and bucket that patching writes to is copied.
+        """
+        return CompiledProblem(
+            member_names=self.member_names,
+            dance_names=self.dance_names[:],
+            member_ids=self.member_ids,
+            dance_ids=dict(self.dance_ids),
+            capacities=self.capacities[:],
+            max_dances=self.max_dances[:],
+            max_tl=self.max_tl[:],
+            priorities=self.priorities[:],
+            co_tls=self.co_tls.copy(),
+            rank_buckets=[dict(bucket) for bucket in self.rank_buckets],
+            tl_rank_buckets=[dict(bucket) for bucket in self.tl_rank_buckets],
+            inactive_dances=set(self.inactive_dances),
+        )
+
+    def new_state(self, tl_matching: TLMatching | None = None) -> "MatchState":
+        state = MatchState(
+            dance_members=[[] for _ in self.dance_names],
+            member_dances=[[] for _ in self.member_names],
+            member_dance_sets=[set() for _ in self.member_names],
+        )
+        if tl_matching is None:
+            return state
+
+        # seed the state with pre-assigned TLs, keeping their original order
+        for dance_name, tl_names in tl_matching.dances_to_tls.items():
+            dance_id = self.dance_ids.get(dance_name)
+            if dance_id is None:
+                continue
+            for tl_name in tl_names:
+                member_id = self.member_ids.get(tl_name)
+                if member_id is not None:
+                    state.dance_members[dance_id].append(member_id)
+        for tl_name, dance_names in tl_matching.tls_to_dances.items():
+            member_id = self.member_ids.get(tl_name)
+            if member_id is None:
+                continue
+            for dance_name in dance_names:
+                dance_id = self.dance_ids.get(dance_name)
+                if dance_id is not None:
+                    state.member_dances[member_id].append(dance_id)
+                    state.member_dance_sets[member_id].add(dance_id)
+        return state
+
+
+@dataclass
+class MatchState:
+    """Assignments made so far, indexed by dance ID and by member ID."""
+
+    dance_members: list[list[int]]
+    member_dances: list[list[int]]
+    member_dance_sets: list[set[int]]
+
+    def assign(self, member_id: int, dance_id: int) -> None:
+        self.dance_members[dance_id].append(member_id)
+        self.member_dances[member_id].append(dance_id)
+        self.member_dance_sets[member_id].add(dance_id)
+
+    @property
+    def num_assigned(self) -> int:
+        return sum(map(len, self.dance_members))
+
+    def to_matching(self, problem: CompiledProblem) -> Matching:
+        member_names = problem.member_names
+        dance_names = problem.dance_names
+        return Matching(
+            {
+                dance_names[d]: [member_names[m] for m in member_ids]
+                for d, member_ids in enumerate(self.dance_members)
+                if d not in problem.inactive_dances
+            },
+            {
+                member_names[m]: [dance_names[d] for d in dance_ids]
+                for m, dance_ids in enumerate(self.member_dances)
+            },
+        )
+
+    def to_tl_matching(self, problem: CompiledProblem) -> TLMatching:
+        member_names = problem.member_names
+        dance_names = problem.dance_names
+        dances_to_tls: dict[str, list[str]] = defaultdict(list)
+        tls_to_dances: dict[str, list[str]] = defaultdict(list)
+        for d, member_ids in enumerate(self.dance_members):
+            if member_ids and d not in problem.inactive_dances:
+                dances_to_tls[dance_names[d]] = [member_names[m] for m in member_ids]
+        for m, dance_ids in enumerate(self.member_dances):
+            if dance_ids:
+                tls_to_dances[member_names[m]] = [dance_names[d] for d in dance_ids]
+        return TLMatching(dances_to_tls, tls_to_dances)
+
+
+def _priority(member: Member) -> tuple[int, int, int]:
+    return (
+        SENIORITY_ORDER[member.seniority],
+        member.lateness_score,
+        member.busyness_score,
+    )
+
+
+def _compile_member_table(table: MemberTable, dances: list[Dance]) -> CompiledProblem:
+    # same as compile_problem, but reads the table's columns and interned IDs
+    # directly instead of going through a row view per member
+    num_members = len(table)
+    dance_names = [dance.name for dance in dances]
+    dance_ids = {name: i for i, name in enumerate(dance_names)}
+    # table dance ID -> problem dance ID, or None for dances not being matched
+    to_problem_ids = [dance_ids.get(name) for name in table.dance_names]
+
+    problem = CompiledProblem(
+        member_names=table.names[:],
+        dance_names=dance_names,
+        member_ids=dict(table.member_ids),
+        dance_ids=dance_ids,
+        capacities=[dance.num_dancers for dance in dances],
+        max_dances=table.max_dances.tolist(),
+        max_tl=table.max_tl.tolist(),
+        priorities=[
+            (SENIORITY_ORDER[seniority], lateness, busyness)
+            for seniority, lateness, busyness in zip(
+                table.seniority, table.lateness_score, table.busyness_score
+            )
+        ],
+        co_tls=CoTLCompatibility.build(
+            table.co_tl_anyone,
+            (
+                [person_id for person_id in co_tls if person_id < num_members]
+                for co_tls in table.co_tls
+            ),
+        ),
+        rank_buckets=[{} for _ in dances],
+        tl_rank_buckets=[{} for _ in dances],
+    )
+
+    rank_buckets = problem.rank_buckets
+    tl_rank_buckets = problem.tl_rank_buckets
+    for member_id, rankings in enumerate(table.rankings):
+        willing_to_tl = table.tl_dances[member_id] if table.max_tl[member_id] > 0 else ()
+        last_rank = min(table.max_rank[member_id], len(rankings), len(dances))
+        for rank in range(last_rank):
+            table_dance_id = rankings[rank]
+            dance_id = to_problem_ids[table_dance_id]
+            if dance_id is None:
+                continue
+            rank_buckets[rank][member_id] = dance_id
+            if table_dance_id in willing_to_tl:
+                tl_rank_buckets[rank][member_id] = dance_id
+
+    return problem
+
+
+def compile_problem(
+    members: list[Member] | MemberTable, dances: list[Dance]
+) -> CompiledProblem:
+    """
+    Compile members and dances into a CompiledProblem. This is done once per
+    matching run so that every rank round is a scan over a prebuilt bucket.
+
+    Rankings of dances that are not in `dances` keep their rank position but are
+    never considered.
+    """
+    if isinstance(members, MemberTable):
+        return _compile_member_table(members, dances)
+
+    dance_names = [dance.name for dance in dances]
+    member_names = [member.name for member in members]
+    member_ids = {name: i for i, name in enumerate(member_names)}
+
+    problem = CompiledProblem(
+        member_names=member_names,
+        dance_names=dance_names,
+        member_ids=member_ids,
+        dance_ids={name: i for i, name in enumerate(dance_names)},
+        capacities=[dance.num_dancers for dance in dances],
+        max_dances=[member.max_dances for member in members],
+        max_tl=[member.max_tl for member in members],
+        priorities=[_priority(member) for member in members],
+        co_tls=CoTLCompatibility.build(
+            (member.co_tl_with_anyone for member in members),
+            (
+                [
+                    member_ids[name]
+                    for name in member.allowed_co_tls
+                    if name in member_ids
+                ]
+                for member in members
+            ),
+        ),
+        rank_buckets=[{} for _ in dances],
+        tl_rank_buckets=[{} for _ in dances],
+    )
+    for member_id, member in enumerate(members):
+        problem._add_rankings(member_id, member)
+
+    return problem
+
+
+def _get_candidates_by_dance(
+    problem: CompiledProblem,
+    state: MatchState,
+    bucket: dict[int, int],
+    is_tl: bool = False,
+    rejections: Counter[str] | None = None,
+) -> dict[int, list[int]]:
+    capacities = problem.capacities
+    max_dances = problem.max_dances
+    max_tl = problem.max_tl
+    dance_members = state.dance_members
+    member_dances = state.member_dances
+    member_dance_sets = state.member_dance_sets
+
+    candidates: dict[int, list[int]] = defaultdict(list)
+    for member_id, dance_id in bucket.items():
+        # filter out member if already in the dance
+        if dance_id in member_dance_sets[member_id]:
+            if rejections is not None:
+                rejections["already_in_dance"] += 1
+            continue
+
+        # pass if dance is at full capacity
+        if len(dance_members[dance_id]) >= capacities[dance_id]:
+            if rejections is not None:
+                rejections["full_dance"] += 1
+            continue
+
+        # pass if member doesn't want to be considered
+        num_dances = len(member_dances[member_id])
+        if num_dances >= max_dances[member_id]:
+            if rejections is not None:
+                rejections["max_dances"] += 1
+            continue
+        if is_tl and num_dances >= max_tl[member_id]:
+            if rejections is not None:
+                rejections["max_tl"] += 1
+            continue
+
+        candidates[dance_id].append(member_id)
+
+    return candidates
+
+
+def run_tl_rounds(
+    problem: CompiledProblem,
+    state: MatchState,
+    rng: random.Random | None = None,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
+) -> None:
+    co_tls = problem.co_tls
+    choice = rng.choice if rng else random.choice
+
+    for rank in range(problem.num_rounds):
+        if progress is not None:
+            progress("tl", rank, problem.num_rounds)
+        if stats is not None:
+            round_stats = RoundStats(rank)
+            stats.tl_rounds.append(round_stats)
+            round_start = time.perf_counter()
+            filled_before = state.num_assigned
+            round_stats.rejections["not_willing_to_tl"] = len(
+                problem.rank_buckets[rank]
+            ) - len(problem.tl_rank_buckets[rank])
+
+        dances_to_tl_members = _get_candidates_by_dance(
+            problem,
+            state,
+            problem.tl_rank_buckets[rank],
+            is_tl=True,
+            rejections=round_stats.rejections if stats is not None else None,
+        )
+
+        for dance_id, tl_members in dances_to_tl_members.items():
+            existing_tls = state.dance_members[dance_id]
+            # pass if TL limit reached. error if more than 2 TLs assigned.
+            if len(existing_tls) > 2:
+                raise ValueError("Can't assign more than 2 TLs per dance.")
+            if len(existing_tls) == 2:
+                continue
+
+            # otherwise, fetch or select the first TL for the dance.
+            if existing_tls:
+                first_tl = existing_tls[0]
+            else:
+                first_tl = choice(tl_members)
+                state.assign(first_tl, dance_id)
+
+            # select a co-TL if possible.
+            partners = co_tls.partners(first_tl)
+            if not partners:
+                continue
+            second_tl_members = [c for c in tl_members if partners >> c & 1]
+            if not second_tl_members:
+                continue
+            state.assign(choice(second_tl_members), dance_id)
+
+        if stats is not None:
+            round_stats.eligible_candidates = sum(
+                map(len, dances_to_tl_members.values())
+            )
+            round_stats.seats_filled = state.num_assigned - filled_before
+            round_stats.seconds = time.perf_counter() - round_start
+
+    if progress is not None:
+        progress("tl", problem.num_rounds, problem.num_rounds)
+
+
+def iter_rank_rounds(
+    problem: CompiledProblem,
+    state: MatchState,
+    rng: random.Random | None = None,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
+) -> Iterator[int]:
+    """
+    Run the rank rounds one at a time, yielding each round's rank once its
+    seats are assigned. Stopping early leaves `state` as of the last yield.
+    """
+    capacities = problem.capacities
+    shuffle = rng.shuffle if rng else random.shuffle
+    priority = problem.priorities.__getitem__
+
+    for rank in range(problem.num_rounds):
+        if progress is not None:
+            progress("rank", rank, problem.num_rounds)
+        if stats is not None:
+            round_stats = RoundStats(rank)
+            stats.rank_rounds.append(round_stats)
+            round_start = time.perf_counter()
+            filled_before = state.num_assigned
+
+        dances_to_candidates = _get_candidates_by_dance(
+            problem,
+            state,
+            problem.rank_buckets[rank],
+            rejections=round_stats.rejections if stats is not None else None,
+        )
+
+        for dance_id, candidates in dances_to_candidates.items():
+            num_missing_dancers = capacities[dance_id] - len(
+                state.dance_members[dance_id]
+            )
+
+            if stats is not None:
+                sort_start = time.perf_counter()
+            shuffled_members = candidates[:]
+            shuffle(shuffled_members)
+            selected_dancers = sorted(shuffled_members, key=priority)[
+                :num_missing_dancers
+            ]
+            if stats is not None:
+                round_stats.sorting_seconds += time.perf_counter() - sort_start
+                round_stats.eligible_candidates += len(candidates)
+
+            for member_id in selected_dancers:
+                state.assign(member_id, dance_id)
+
+        if stats is not None:
+            round_stats.seats_filled = state.num_assigned - filled_before
+            round_stats.seconds = time.perf_counter() - round_start
+        yield rank
+
+    if progress is not None:
+        progress("rank", problem.num_rounds, problem.num_rounds)
+
+
+def run_rank_rounds(
+    problem: CompiledProblem,
+    state: MatchState,
+    rng: random.Random | None = None,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
+) -> None:
+    for _ in iter_rank_rounds(problem, state, rng, stats, progress):
+        pass
+
+
+def last_ranks(problem: CompiledProblem) -> list[int]:
+    """
+    Per member, the last rank round holding one of their choices, or -1 if
+    they have none. After that round a member can't be assigned anything new.
+    """
+    last = [-1] * len(problem.member_names)
+    for rank, bucket in enumerate(problem.rank_buckets):
+        for member_id in bucket:
+            last[member_id] = rank
+    return last
@@ -0,0 +1,103 @@
+import random
+from typing import NamedTuple
+
+from enums import MatchBackend
+from instrumentation import MatchStats, ProgressCallback
+from metrics import MatchingScorer, SatisfactionScore
+from schemas import Dance, Matching, Member, TLMatching
+from services import match
+from worker_pool import pool_map, worker_context
+
+
+class EnsembleResult(NamedTuple):
+    matching: Matching
+    tl_matching: TLMatching
+    seed: int
+    score: SatisfactionScore
+    scores: dict[int, SatisfactionScore]
+
+
+class _EnsembleInputs(NamedTuple):
+    members: list[Member]
+    dances: list[Dance]
+    backend: MatchBackend
+    scorer: MatchingScorer
+
+
+def _score_seed(seed: int) -> tuple[int, SatisfactionScore]:
+    inputs: _EnsembleInputs = worker_context()
+    matching, _ = match(
+        inputs.members,
+        inputs.dances,
+        backend=inputs.backend,
+        rng=random.Random(seed),
+    )
+    return seed, inputs.scorer.score(matching)
+
+
+def run_ensemble(
+    members: list[Member],
+    dances: list[Dance],
+    num_runs: int,
+    seed: int | None = None,
+    max_workers: int | None = None,
+    backend: MatchBackend = MatchBackend.PYTHON,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
+) -> EnsembleResult:
+    """
+    Run the matcher `num_runs` times with independent seeds across a process
+    pool (see `pool_map`) and keep the matching with the best satisfaction
+    score.
+
+    Run i is seeded with `seed + i`, so the winning seed can be passed back to
+    `match(..., rng=random.Random(seed))` to reproduce the same matching.
+
+    Args:
+        members: Members to match.
+        dances: Dances to fill.
+        num_runs: Number of seeded runs to score.
+        seed: Seed of the first run. Random when omitted.
+        max_workers: Worker processes to use. Defaults to the number of CPUs.
+        backend: Which matcher implementation each run uses.
+        stats: Filled in with the timings and counters of the winning run.
+        progress: Called as `progress("runs", runs_done, num_runs)` as scored
+            runs come in, then passed on to the rebuild of the winning run.
+
+    Returns:
+        The best matching, the seed that produced it, and every run's score.
+    """
+    if num_runs < 1:
+        raise ValueError("num_runs must be at least 1.")
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    seeds = [seed + i for i in range(num_runs)]
+
+    results = pool_map(
+        _score_seed,
+        seeds,
+        _EnsembleInputs(members, dances, backend, MatchingScorer(members)),
+        "runs",
+        max_workers=max_workers,
+        progress=progress,
+    )
+
+    scores = dict(results)
+    best_seed = max(seeds, key=lambda s: scores[s].key)
+
+    # only the winning run is rebuilt in full here, the workers just score
+    matching, tl_matching = match(
+        members,
+        dances,
+        backend=backend,
+        rng=random.Random(best_seed),
+        stats=stats,
+        progress=progress,
+    )
+    return EnsembleResult(
+        matching=matching,
+        tl_matching=tl_matching,
+        seed=best_seed,
+        score=scores[best_seed],
+        scores=scores,
+    )
@@ -8,3 +8,16 @@ class Seniority(StrEnum):
     SENIOR = "SENIOR"
     GRAD_STUDENT = "GRAD_STUDENT"
     EXCHANGE = "EXCHANGE"
+
+
+class MatchBackend(StrEnum):
+    PYTHON = "python"
+    NUMPY = "numpy"
+    FLOW = "flow"
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    JSON = "json"
+    PARQUET = "parquet"
+    ARROW = "arrow"
@@ -0,0 +1,227 @@
+from collections.abc import Iterable
+from importlib.util import find_spec
+from pathlib import Path
+
+import pandas as pd
+
+from enums import ExportFormat
+from member_table import MemberTable
+from schemas import Dance, Matching, Member, TLMatching
+
+DANCE_TABLE_NAME = "dance_assignments"
+DANCER_TABLE_NAME = "dancer_assignments"
+ASSIGNMENTS_TABLE_NAME = "assignments"
+
+FILE_EXTENSIONS = {
+    ExportFormat.CSV: "csv",
+    ExportFormat.JSON: "json",
+    ExportFormat.PARQUET: "parquet",
+    ExportFormat.ARROW: "arrow",
+}
+MIME_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.JSON: "application/json",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.file",
+}
+
+
+def available_formats() -> list[ExportFormat]:
+    """Export formats usable in this environment."""
+    if find_spec("pyarrow") is not None:
+        return list(ExportFormat)
+    return [ExportFormat.CSV, ExportFormat.JSON]
+
+
+def _dancer_column(i: int) -> str:
+    # first column is labeled "Dancers", the rest are blank but unique
+    return "Dancers" if i == 0 else " " * i
+
+
+def _rank_positions(
+    members: list[Member] | MemberTable,
+) -> dict[str, dict[str, int]]:
+    """Each member's 1-based rank of every dance they ranked, by name."""
+    if isinstance(members, MemberTable):
+        # read the interned rankings directly rather than through row views
+        dance_names = members.dance_names
+        names_and_rankings = (
+            (name, [dance_names[d] for d in rankings])
+            for name, rankings in zip(members.names, members.rankings)
+        )
+    else:
+        names_and_rankings = (
+            (member.name, member.dance_rankings) for member in members
+        )
+
+    positions = {}
+    for name, rankings in names_and_rankings:
+        member_positions: dict[str, int] = {}
+        for rank, dance_name in enumerate(rankings, start=1):
+            member_positions.setdefault(dance_name, rank)
+        positions[name] = member_positions
+    return positions
+
+
+def dance_assignments_table(
+    matching: Matching, dances: list[Dance], tl_matching: TLMatching
+) -> pd.DataFrame:
+    """
+    One row per dance, largest dance first: "Dance (num_dancers)", the TLs
+    comma-delimited, then one column per non-TL dancer.
+    """
+    sorted_dances = sorted(dances, key=lambda d: d.num_dancers, reverse=True)
+
+    dance_labels = []
+    tl_labels = []
+    dancer_lists = []
+    for dance in sorted_dances:
+        tls = tl_matching.dances_to_tls.get(dance.name, [])
+        tl_set = set(tls)
+        dance_labels.append(f"{dance.name} ({dance.num_dancers})")
+        tl_labels.append(", ".join(tls))
+        dancer_lists.append(
+            [
+                person
+                for person in matching.dances_to_dancers.get(dance.name, [])
+                if person not in tl_set
+            ]
+        )
+
+    columns: dict[str, list[str]] = {"Dance": dance_labels, "TLs": tl_labels}
+    max_dancers = max(map(len, dancer_lists), default=0)
+    for i in range(max_dancers):
+        columns[_dancer_column(i)] = [
+            dancers[i] if i < len(dancers) else "" for dancers in dancer_lists
+        ]
+    return pd.DataFrame(columns)
+
+
+def dancer_assignments_table(
+    matching: Matching, members: list[Member] | MemberTable
+) -> pd.DataFrame:
+    """
+    One row per dancer, by name: "Dancer (num_dances/max_dances)", the sorted
+    ranks of their assigned dances, then one column per assigned dance.
+    """
+    if not matching.dancers_to_dances:
+        return pd.DataFrame()
+    if isinstance(members, MemberTable):
+        max_dances_lookup = dict(zip(members.names, members.max_dances))
+    else:
+        max_dances_lookup = {member.name: member.max_dances for member in members}
+    positions = _rank_positions(members)
+
+    dancer_labels = []
+    rankings_labels = []
+    dance_lists = []
+    for dancer, dances in sorted(matching.dancers_to_dances.items()):
+        dancer_labels.append(
+            f"{dancer} ({len(dances)}/{max_dances_lookup.get(dancer, 0)})"
+        )
+        dancer_positions = positions.get(dancer, {})
+        ranks = sorted(dancer_positions[d] for d in dances if d in dancer_positions)
+        # dances missing from the rankings shouldn't happen in normal operation
+        ranks_str = [str(rank) for rank in ranks]
+        ranks_str += ["N/A"] * (len(dances) - len(ranks))
+        rankings_labels.append(",".join(ranks_str))
+        dance_lists.append(dances)
+
+    columns: dict[str, list[str]] = {
+        "Dancer": dancer_labels,
+        "Rankings": rankings_labels,
+    }
+    max_dances = max(map(len, dance_lists), default=0)
+    for i in range(max_dances):
+        columns[f"Dance {i + 1}"] = [
+            dances[i] if i < len(dances) else "" for dances in dance_lists
+        ]
+    return pd.DataFrame(columns)
+
+
+def assignments_table(
+    matching: Matching, tl_matching: TLMatching, members: list[Member] | MemberTable
+) -> pd.DataFrame:
+    """
+    Long-format table with one row per (dance, dancer) assignment and typed
+    columns, for loading into other tools: dance, dancer, is_tl and the rank
+    the dancer gave the dance (null if they didn't rank it).
+    """
+    positions = _rank_positions(members)
+    dance_column = []
+    dancer_column = []
+    is_tl_column = []
+    rank_column = []
+    for dance_name, dancers in matching.dances_to_dancers.items():
+        tl_set = set(tl_matching.dances_to_tls.get(dance_name, []))
+        for dancer in dancers:
+            dance_column.append(dance_name)
+            dancer_column.append(dancer)
+            is_tl_column.append(dancer in tl_set)
+            rank_column.append(positions.get(dancer, {}).get(dance_name))
+    return pd.DataFrame(
+        {
+            "dance": pd.Series(dance_column, dtype="string"),
+            "dancer": pd.Series(dancer_column, dtype="string"),
+            "is_tl": pd.Series(is_tl_column, dtype="bool"),
+            "rank": pd.Series(rank_column, dtype="Int64"),
+        }
+    )
+
+
+def result_tables(
+    matching: Matching,
+    tl_matching: TLMatching,
+    dances: list[Dance],
+    members: list[Member] | MemberTable,
+) -> dict[str, pd.DataFrame]:
+    """Every export table of a matching, by file name stem."""
+    return {
+        DANCE_TABLE_NAME: dance_assignments_table(matching, dances, tl_matching),
+        DANCER_TABLE_NAME: dancer_assignments_table(matching, members),
+        ASSIGNMENTS_TABLE_NAME: assignments_table(matching, tl_matching, members),
+    }
+
+
+def table_to_bytes(table: pd.DataFrame, export_format: ExportFormat) -> bytes:
+    """
+    Serialize a table. Parquet and Arrow need the optional `pyarrow` package
+    and raise ImportError without it.
+    """
+    if export_format == ExportFormat.CSV:
+        return table.to_csv(index=False).encode()
+    if export_format == ExportFormat.JSON:
+        return table.to_json(orient="records", indent=2).encode()
+
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            f"Exporting {export_format} requires pyarrow: pip install pyarrow"
+        ) from e
+
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if export_format == ExportFormat.PARQUET:
+        pq.write_table(arrow_table, sink)
+    else:
+        feather.write_feather(arrow_table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def write_tables(
+    tables: dict[str, pd.DataFrame],
+    out_dir: Path,
+    formats: Iterable[ExportFormat] = (ExportFormat.CSV,),
+) -> list[Path]:
+    """Write every table in every format to `out_dir` and return the paths."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for export_format in formats:
+        for name, table in tables.items():
+            path = out_dir / f"{name}.{FILE_EXTENSIONS[export_format]}"
+            path.write_bytes(table_to_bytes(table, export_format))
+            paths.append(path)
+    return paths
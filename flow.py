@@ -0,0 +1,258 @@
+from collections import deque
+import heapq
+import random
+
+import numpy as np
+
+from constants import SENIORITY_ORDER
+from schemas import Member, Dance, Matching, TLMatching
+
+
+class _MinCostFlow:
+    """
+    Min-cost max-flow by the primal-dual method: Dijkstra with potentials finds
+    the current shortest path length, then a Dinic blocking flow pushes as much
+    flow as possible along all shortest paths at once. Costs are small integers
+    here, so only a handful of phases are needed.
+
+    Edge `e` and its residual edge `e ^ 1` are stored side by side.
+    """
+
+    def __init__(self, num_nodes: int) -> None:
+        self.num_nodes = num_nodes
+        self.graph: list[list[int]] = [[] for _ in range(num_nodes)]
+        self.to: list[int] = []
+        self.cap: list[int] = []
+        self.cost: list[int] = []
+        # shortest-path phases taken by the last solve
+        self.phases = 0
+
+    def add_edge(self, u: int, v: int, cap: int, cost: int) -> int:
+        edge = len(self.to)
+        self.graph[u].append(edge)
+        self.to.append(v)
+        self.cap.append(cap)
+        self.cost.append(cost)
+        self.graph[v].append(edge + 1)
+        self.to.append(u)
+        self.cap.append(0)
+        self.cost.append(-cost)
+        return edge
+
+    def flow(self, edge: int) -> int:
+        return self.cap[edge ^ 1]
+
+    def solve(self, source: int, sink: int) -> tuple[int, int]:
+        graph, to, cap, cost = self.graph, self.to, self.cap, self.cost
+        inf = float("inf")
+        potential = [0] * self.num_nodes
+        total_flow = 0
+        total_cost = 0
+        self.phases = 0
+
+        # edge arrays grouped by tail node, used to find zero reduced-cost edges
+        # with a few vector operations per phase
+        heads = np.array(to, dtype=np.int64)
+        tails = heads[np.arange(len(to)) ^ 1]
+        costs = np.array(cost, dtype=np.int64)
+        by_tail = np.argsort(tails, kind="stable")
+
+        while True:
+            # shortest path lengths under reduced costs
+            dist = [inf] * self.num_nodes
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                pu = potential[u]
+                for e in graph[u]:
+                    if cap[e] <= 0:
+                        continue
+                    v = to[e]
+                    nd = d + cost[e] + pu - potential[v]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+            if dist[sink] == inf:
+                break
+
+            # cap the update at dist[sink] so reduced costs stay non-negative
+            sink_dist = dist[sink]
+            for v in range(self.num_nodes):
+                potential[v] += min(dist[v], sink_dist)
+
+            node_potential = np.array(potential, dtype=np.int64)
+            reduced_costs = costs + node_potential[tails] - node_potential[heads]
+            zero_edges = by_tail[reduced_costs[by_tail] == 0]
+            splits = np.cumsum(np.bincount(tails[zero_edges], minlength=self.num_nodes))
+            zero_cost_edges = [
+                chunk.tolist() for chunk in np.split(zero_edges, splits[:-1])
+            ]
+
+            self.phases += 1
+            pushed = self._blocking_flow(source, sink, zero_cost_edges)
+            total_flow += pushed
+            total_cost += pushed * (potential[sink] - potential[source])
+
+        return total_flow, total_cost
+
+    def _blocking_flow(
+        self, source: int, sink: int, zero_cost_edges: list[list[int]]
+    ) -> int:
+        """
+        Push a maximal flow over the edges with zero reduced cost. That set is
+        fixed for the whole phase; only residual capacities change while pushing.
+        """
+        to, cap = self.to, self.cap
+
+        total = 0
+        while True:
+            # level graph over zero reduced-cost edges with capacity left
+            level = [-1] * self.num_nodes
+            level[source] = 0
+            queue = deque([source])
+            while queue:
+                u = queue.popleft()
+                for e in zero_cost_edges[u]:
+                    v = to[e]
+                    if level[v] < 0 and cap[e] > 0:
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            if level[sink] < 0:
+                return total
+
+            next_edge = [0] * self.num_nodes
+            while True:
+                path: list[int] = []
+                u = source
+                while u != sink:
+                    edges = zero_cost_edges[u]
+                    i = next_edge[u]
+                    next_level = level[u] + 1
+                    while i < len(edges):
+                        e = edges[i]
+                        if cap[e] > 0 and level[to[e]] == next_level:
+                            break
+                        i += 1
+                    next_edge[u] = i
+                    if i == len(edges):
+                        # dead end: drop u from the level graph and back up
+                        if u == source:
+                            break
+                        level[u] = -1
+                        e = path.pop()
+                        u = to[e ^ 1]
+                        next_edge[u] += 1
+                        continue
+                    path.append(e)
+                    u = to[e]
+                if u != sink:
+                    break
+
+                pushed = min(cap[e] for e in path)
+                for e in path:
+                    cap[e] -= pushed
+                    cap[e ^ 1] += pushed
+                total += pushed
+
+
+def match_min_cost_flow(
+    members: list[Member],
+    dances: list[Dance],
+    tl_matching: TLMatching,
+    rng: random.Random | None = None,
+) -> Matching:
+    """
+    Fill every dance optimally around the pre-assigned TLs.
+
+    Members and dances become nodes of a flow network: source -> member with
+    capacity `max_dances` minus the member's TL load, member -> dance for every
+    ranked dance within `max_rank`, and dance -> sink with the dance's remaining
+    seats. A member -> dance edge costs its rank position, with seniority
+    breaking ties between members at the same rank, like the greedy rank rounds
+    do. Every distinct cost adds a solver phase, so lateness and busyness aren't
+    part of the cost: members are added in priority order instead, shuffled by
+    `rng` within a priority, and each phase offers contested seats to earlier
+    members first.
+
+    The min-cost max-flow fills as many seats as possible and, among those
+    assignments, minimizes the total cost.
+    """
+    dance_ids = {dance.name: i for i, dance in enumerate(dances)}
+
+    dances_to_dancers: dict[str, list[str]] = {
+        dance.name: list(tl_matching.dances_to_tls.get(dance.name, []))
+        for dance in dances
+    }
+    dancers_to_dances: dict[str, list[str]] = {
+        member.name: list(tl_matching.tls_to_dances.get(member.name, []))
+        for member in members
+    }
+
+    # the solver runs one phase per distinct path cost, so only seniority is
+    # part of the cost; lateness and busyness order the members instead
+    seniorities = [SENIORITY_ORDER[m.seniority] for m in members]
+    levels = {s: i for i, s in enumerate(sorted(set(seniorities)))}
+    num_levels = max(len(levels), 1)
+
+    num_members = len(members)
+    source = num_members + len(dances)
+    sink = source + 1
+    network = _MinCostFlow(sink + 1)
+
+    for dance_id, dance in enumerate(dances):
+        remaining = dance.num_dancers - len(dances_to_dancers[dance.name])
+        if remaining > 0:
+            network.add_edge(num_members + dance_id, sink, remaining, 0)
+
+    # blocking flows push along source edges in the order they were added, so
+    # better-priority members are offered contested seats first
+    member_order = list(range(num_members))
+    (rng or random).shuffle(member_order)
+    member_order.sort(
+        key=lambda m: (
+            seniorities[m],
+            members[m].lateness_score,
+            members[m].busyness_score,
+        )
+    )
+
+    assignment_edges: list[tuple[int, int, int, int]] = []
+    for member_id in member_order:
+        member = members[member_id]
+        member_dances = dancers_to_dances[member.name]
+        remaining = member.max_dances - len(member_dances)
+        if remaining <= 0:
+            continue
+        network.add_edge(source, member_id, remaining, 0)
+
+        level = levels[seniorities[member_id]]
+        seen: set[int] = set()
+        for rank, dance_name in enumerate(member.dance_rankings[: member.max_rank]):
+            dance_id = dance_ids.get(dance_name)
+            # a dance ranked twice keeps its best rank and gets one edge
+            if dance_id is None or dance_id in seen or dance_name in member_dances:
+                continue
+            seen.add(dance_id)
+            edge = network.add_edge(
+                member_id, num_members + dance_id, 1, rank * num_levels + level
+            )
+            assignment_edges.append((edge, member_id, dance_id, rank))
+
+    network.solve(source, sink)
+
+    # report assignments in member order and each member's dances by rank
+    assigned = sorted(
+        (member_id, rank, dance_id)
+        for edge, member_id, dance_id, rank in assignment_edges
+        if network.flow(edge)
+    )
+    for member_id, _, dance_id in assigned:
+        member_name = members[member_id].name
+        dance_name = dances[dance_id].name
+        dances_to_dancers[dance_name].append(member_name)
+        dancers_to_dances[member_name].append(dance_name)
+
+    return Matching(dances_to_dancers, dancers_to_dances)
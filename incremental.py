@@ -0,0 +1,173 @@
+from dataclasses import replace
+import random
+
+from engine import CompiledProblem, compile_problem, run_rank_rounds, run_tl_rounds
+from schemas import Member, Dance, Matching, TLMatching
+
+
+def _affected_dance_names(
+    members: list[Member],
+    previous_matching: Matching,
+    changed_members: set[str],
+    changed_dances: set[str],
+) -> set[str]:
+    """
+    Dances whose outcome may differ: the changed dances themselves, plus every
+    dance a changed member ranks or is currently in.
+    """
+    affected = set(changed_dances)
+    for member in members:
+        if member.name not in changed_members:
+            continue
+        affected.update(member.dance_rankings[: member.max_rank])
+        affected.update(previous_matching.dancers_to_dances.get(member.name, []))
+    return affected
+
+
+def update_problem(
+    problem: CompiledProblem,
+    members: list[Member],
+    dances: list[Dance],
+    changed_members: set[str],
+    changed_dances: set[str],
+) -> None:
+    """Patch a compiled problem in place with the edited members and dances."""
+    dances_by_name = {dance.name: dance for dance in dances}
+    for dance_name in changed_dances:
+        problem.update_dance(dance_name, dances_by_name.get(dance_name))
+    for member in members:
+        if member.name in changed_members:
+            problem.update_member(member)
+
+
+def rematch(
+    members: list[Member],
+    dances: list[Dance],
+    previous: tuple[Matching, TLMatching],
+    changed_members: set[str],
+    changed_dances: set[str],
+    rng: random.Random | None = None,
+    problem: CompiledProblem | None = None,
+) -> tuple[Matching, TLMatching]:
+    """
+    Update a previous `match` result after a few members or dances changed,
+    instead of re-matching everyone from scratch.
+
+    Dances that are unaffected by the changes keep their dancers and TLs.
+    Affected dances keep their TLs (if they are still valid) and are refilled by
+    the usual rank rounds, which may also hand out seats left open in any
+    other dance. Affected dances left without TLs go through the TL phase.
+
+    Args:
+        members: Current members, with the edits applied.
+        dances: Current included dances, with the edits applied.
+        previous: The `(Matching, TLMatching)` returned by the last run.
+        changed_members: Names of members whose settings or rankings changed.
+        changed_dances: Names of dances that were added, removed or edited.
+        rng: Source of randomness for tie-breaking.
+        problem: The problem compiled for the previous run. When given, it is
+            patched in place with just the changes instead of compiling every
+            member again, and can be passed to the next `rematch`.
+
+    Returns:
+        The updated matching and TL matching.
+    """
+    previous_matching, previous_tl_matching = previous
+    if problem is None:
+        problem = compile_problem(members, dances)
+    else:
+        update_problem(problem, members, dances, changed_members, changed_dances)
+
+    affected_names = _affected_dance_names(
+        members, previous_matching, changed_members, changed_dances
+    )
+    affected = {
+        problem.dance_ids[name] for name in affected_names if name in problem.dance_ids
+    }
+    active_dance_ids = [
+        dance_id
+        for dance_id in range(len(problem.dance_names))
+        if dance_id not in problem.inactive_dances
+    ]
+
+    # regular seats of unaffected dances are kept, so they count towards
+    # max_dances of any TL chosen below
+    kept_seats = []
+    kept_loads = [0] * len(problem.member_names)
+    for dance_id in active_dance_ids:
+        if dance_id in affected:
+            continue
+        dance_name = problem.dance_names[dance_id]
+        tl_names = set(previous_tl_matching.dances_to_tls.get(dance_name, []))
+        for dancer_name in previous_matching.dances_to_dancers.get(dance_name, []):
+            member_id = problem.member_ids.get(dancer_name)
+            if member_id is None or dancer_name in tl_names:
+                continue
+            kept_seats.append((member_id, dance_id))
+            kept_loads[member_id] += 1
+
+    # keep TLs that are still valid; TLs of unaffected dances are untouched
+    state = problem.new_state()
+    for dance_id in active_dance_ids:
+        dance_name = problem.dance_names[dance_id]
+        for tl_name in previous_tl_matching.dances_to_tls.get(dance_name, []):
+            member_id = problem.member_ids.get(tl_name)
+            if member_id is None:
+                continue
+            if dance_id in affected:
+                num_tl_dances = len(state.member_dances[member_id])
+                still_willing = any(
+                    bucket.get(member_id) == dance_id
+                    for bucket in problem.tl_rank_buckets
+                )
+                if (
+                    not still_willing
+                    or num_tl_dances >= problem.max_tl[member_id]
+                    or num_tl_dances + kept_loads[member_id]
+                    >= problem.max_dances[member_id]
+                ):
+                    continue
+            state.assign(member_id, dance_id)
+
+    # affected dances that ended up without any TL get a fresh TL phase, which
+    # counts TL seats against max_tl and, through a lowered max_dances, every
+    # seat against max_dances
+    needs_tls = {
+        dance_id for dance_id in affected if not state.dance_members[dance_id]
+    }
+    if needs_tls:
+        tl_problem = replace(
+            problem,
+            max_dances=[
+                max_dances - kept_load
+                for max_dances, kept_load in zip(problem.max_dances, kept_loads)
+            ],
+            tl_rank_buckets=[
+                {m: d for m, d in bucket.items() if d in needs_tls}
+                for bucket in problem.tl_rank_buckets
+            ],
+        )
+        run_tl_rounds(tl_problem, state, rng)
+    tl_matching = state.to_tl_matching(problem)
+
+    # keep every other assignment of an unaffected dance
+    for member_id, dance_id in kept_seats:
+        state.assign(member_id, dance_id)
+
+    # refill affected dances, and any seat left open elsewhere
+    open_dances = {
+        dance_id
+        for dance_id in active_dance_ids
+        if dance_id in affected
+        or len(state.dance_members[dance_id]) < problem.capacities[dance_id]
+    }
+    rank_problem = replace(
+        problem,
+        rank_buckets=[
+            {m: d for m, d in bucket.items() if d in open_dances}
+            for bucket in problem.rank_buckets
+        ],
+    )
+    run_rank_rounds(rank_problem, state, rng)
+
+    return state.to_matching(problem), tl_matching
@@ -0,0 +1,94 @@
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+
+# called as progress(phase, rounds_done, num_rounds) while a matcher works
+# through its "tl" and "rank" rounds; raising from it aborts the run
+ProgressCallback = Callable[[str, int, int], None]
+
+REJECTION_REASONS = (
+    "already_in_dance",
+    "full_dance",
+    "max_dances",
+    "max_rank",
+    "max_tl",
+    "not_willing_to_tl",
+)
+
+
+@dataclass
+class RoundStats:
+    """Counters for one TL or rank round."""
+
+    rank: int
+    seconds: float = 0.0
+    sorting_seconds: float = 0.0
+    eligible_candidates: int = 0
+    seats_filled: int = 0
+    rejections: Counter[str] = field(default_factory=Counter)
+
+
+@dataclass
+class MatchStats:
+    """
+    Timings and counters collected by `services.match` when a MatchStats is
+    passed in. Per-round counters are only recorded by the Python backend; the
+    other backends only fill in the phase timings.
+    """
+
+    compile_seconds: float = 0.0
+    tl_seconds: float = 0.0
+    rank_seconds: float = 0.0
+    total_seconds: float = 0.0
+    # filled in by `local_search.improve_matching`
+    local_search_seconds: float = 0.0
+    local_search_evaluated: int = 0
+    local_search_applied: int = 0
+    tl_rounds: list[RoundStats] = field(default_factory=list)
+    rank_rounds: list[RoundStats] = field(default_factory=list)
+
+    @property
+    def sorting_seconds(self) -> float:
+        return sum(r.sorting_seconds for r in self.rank_rounds)
+
+    @property
+    def eligible_candidates(self) -> int:
+        return sum(r.eligible_candidates for r in self.rank_rounds)
+
+    @property
+    def seats_filled(self) -> int:
+        return sum(r.seats_filled for r in self.tl_rounds + self.rank_rounds)
+
+    def rejections(self, phase: str = "rank") -> Counter[str]:
+        rounds = self.tl_rounds if phase == "tl" else self.rank_rounds
+        total: Counter[str] = Counter()
+        for r in rounds:
+            total.update(r.rejections)
+        return total
+
+    def to_dict(self) -> dict[str, object]:
+        """Plain JSON-serializable form of the stats."""
+        data = asdict(self)
+        # asdict rebuilds a Counter from its (key, count) pairs, counting those
+        for phase in ("tl_rounds", "rank_rounds"):
+            for row, round_stats in zip(data[phase], getattr(self, phase)):
+                row["rejections"] = dict(round_stats.rejections)
+        return data
+
+    def round_rows(self) -> list[dict[str, object]]:
+        """One flat row per round, for display as a table."""
+        rows = []
+        for phase, rounds in (("TL", self.tl_rounds), ("Rank", self.rank_rounds)):
+            for r in rounds:
+                row: dict[str, object] = {
+                    "Phase": phase,
+                    "Rank": r.rank + 1,
+                    "Time (ms)": round(r.seconds * 1000, 3),
+                    "Sorting (ms)": round(r.sorting_seconds * 1000, 3),
+                    "Eligible": r.eligible_candidates,
+                    "Seats filled": r.seats_filled,
+                }
+                for reason in REJECTION_REASONS:
+                    row[reason] = r.rejections.get(reason, 0)
+                rows.append(row)
+        return rows
@@ -0,0 +1,65 @@
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import Any, NamedTuple
+
+# matching runs hold the GIL most of the time and ensembles fan out to their
+# own process pool, so a couple of threads is plenty
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="match-job")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's work once the job has been cancelled."""
+
+
+class JobProgress(NamedTuple):
+    phase: str
+    done: int
+    total: int
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+class Job:
+    """
+    Work running on a background thread, with progress and cooperative
+    cancellation: the work reports through `report` (a `ProgressCallback`),
+    and `report` raises JobCancelled once `cancel` has been called, which
+    aborts the work at its next round.
+    """
+
+    def __init__(self) -> None:
+        self.progress: JobProgress | None = None
+        self._cancelled = threading.Event()
+        self._future: Future | None = None
+
+    def report(self, phase: str, done: int, total: int) -> None:
+        if self._cancelled.is_set():
+            raise JobCancelled
+        self.progress = JobProgress(phase, done, total)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def result(self) -> Any:
+        """
+        The work's return value. Blocks until the work finishes, and raises
+        JobCancelled if it was cancelled or whatever exception it raised.
+        """
+        return self._future.result()
+
+
+def start_job(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Job:
+    """Run `fn(*args, progress=job.report, **kwargs)` on a background thread."""
+    job = Job()
+    job._future = _executor.submit(fn, *args, progress=job.report, **kwargs)
+    return job
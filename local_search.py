@@ -0,0 +1,353 @@
+import random
+import time
+from typing import NamedTuple
+
+from instrumentation import MatchStats, ProgressCallback
+from member_table import MemberTable
+from schemas import Dance, Matching, Member, TLMatching
+
+
+class LocalSearchResult(NamedTuple):
+    matching: Matching
+    moves_evaluated: int
+    moves_applied: int
+    seconds: float
+    # True if the search stopped at a local optimum rather than on the budget
+    converged: bool
+
+
+class _Search:
+    """
+    Mutable matching over integer IDs with each member's satisfaction kept as
+    running counters, so the score change of a move is O(1) to evaluate.
+
+    A member's value is, in order of importance: whether they're within 2
+    dances of their max plus whether they got a top 3 dance (the two counts of
+    `SatisfactionScore.key`), whether they got a top 3 dance, then the summed
+    quality of their assigned ranks. The three terms are packed into one int
+    with weights that keep them lexicographic.
+    """
+
+    def __init__(
+        self,
+        members: list[Member] | MemberTable,
+        dances: list[Dance],
+        matching: Matching,
+        tl_matching: TLMatching,
+    ) -> None:
+        dance_names = list(matching.dances_to_dancers)
+        for dance in dances:
+            if dance.name not in matching.dances_to_dancers:
+                dance_names.append(dance.name)
+        self.dance_names = dance_names
+        dance_ids = {name: i for i, name in enumerate(dance_names)}
+        capacities = {dance.name: dance.num_dancers for dance in dances}
+
+        members = list(members)
+        self.member_names = [member.name for member in members]
+        member_ids = {name: i for i, name in enumerate(self.member_names)}
+
+        # a better rank is worth more; anything assigned is worth at least 1
+        worst = len(dance_names) + 1
+        self.quality: list[dict[int, int]] = []
+        self.top3: list[frozenset[int]] = []
+        self.min_dances: list[int] = []
+        self.max_dances: list[int] = []
+        for member in members:
+            quality: dict[int, int] = {}
+            for rank, name in enumerate(member.dance_rankings[: member.max_rank]):
+                dance_id = dance_ids.get(name)
+                if dance_id is not None and name in capacities:
+                    quality.setdefault(dance_id, worst - rank)
+            self.quality.append(quality)
+            self.top3.append(
+                frozenset(
+                    dance_ids[name]
+                    for name in member.dance_rankings[:3]
+                    if name in dance_ids
+                )
+            )
+            self.min_dances.append(max(0, member.max_dances - 2))
+            self.max_dances.append(member.max_dances)
+
+        # dances that aren't being matched keep their current dancers
+        self.capacities = [
+            capacities.get(name, len(matching.dances_to_dancers.get(name, [])))
+            for name in dance_names
+        ]
+        self.dance_members: list[list[int]] = [[] for _ in dance_names]
+        self.member_dances: list[set[int]] = [set() for _ in members]
+        self.num_dances = [0] * len(members)
+        self.num_top3 = [0] * len(members)
+        self.total_quality = [0] * len(members)
+        for name, dancers in matching.dances_to_dancers.items():
+            dance_id = dance_ids[name]
+            for dancer in dancers:
+                member_id = member_ids.get(dancer)
+                if member_id is not None:
+                    self.add(member_id, dance_id)
+
+        self.locked = {
+            (member_ids[tl], dance_ids[name])
+            for name, tls in tl_matching.dances_to_tls.items()
+            if name in dance_ids
+            for tl in tls
+            if tl in member_ids
+        }
+
+        self.quality_weight = (
+            sum(max_dances * worst for max_dances in self.max_dances) + 1
+        )
+        self.top3_weight = self.quality_weight * (len(members) + 1)
+        self.evaluated = 0
+        self.applied = 0
+
+    def value(
+        self, member_id: int, num_dances: int, num_top3: int, quality: int
+    ) -> int:
+        has_top3 = num_top3 > 0
+        near_max = num_dances >= self.min_dances[member_id]
+        return (
+            (near_max + has_top3) * self.top3_weight
+            + has_top3 * self.quality_weight
+            + quality
+        )
+
+    def _current(self, member_id: int) -> int:
+        return self.value(
+            member_id,
+            self.num_dances[member_id],
+            self.num_top3[member_id],
+            self.total_quality[member_id],
+        )
+
+    def delta_add(self, member_id: int, dance_id: int) -> int:
+        self.evaluated += 1
+        return self.value(
+            member_id,
+            self.num_dances[member_id] + 1,
+            self.num_top3[member_id] + (dance_id in self.top3[member_id]),
+            self.total_quality[member_id] + self.quality[member_id].get(dance_id, 0),
+        ) - self._current(member_id)
+
+    def delta_remove(self, member_id: int, dance_id: int) -> int:
+        self.evaluated += 1
+        return self.value(
+            member_id,
+            self.num_dances[member_id] - 1,
+            self.num_top3[member_id] - (dance_id in self.top3[member_id]),
+            self.total_quality[member_id] - self.quality[member_id].get(dance_id, 0),
+        ) - self._current(member_id)
+
+    def delta_move(self, member_id: int, old: int, new: int) -> int:
+        self.evaluated += 1
+        top3 = self.top3[member_id]
+        quality = self.quality[member_id]
+        return self.value(
+            member_id,
+            self.num_dances[member_id],
+            self.num_top3[member_id] - (old in top3) + (new in top3),
+            self.total_quality[member_id] - quality.get(old, 0) + quality.get(new, 0),
+        ) - self._current(member_id)
+
+    def add(self, member_id: int, dance_id: int) -> None:
+        self.dance_members[dance_id].append(member_id)
+        self.member_dances[member_id].add(dance_id)
+        self.num_dances[member_id] += 1
+        self.num_top3[member_id] += dance_id in self.top3[member_id]
+        self.total_quality[member_id] += self.quality[member_id].get(dance_id, 0)
+
+    def remove(self, member_id: int, dance_id: int) -> None:
+        self.dance_members[dance_id].remove(member_id)
+        self.member_dances[member_id].discard(dance_id)
+        self.num_dances[member_id] -= 1
+        self.num_top3[member_id] -= dance_id in self.top3[member_id]
+        self.total_quality[member_id] -= self.quality[member_id].get(dance_id, 0)
+
+    def is_open(self, dance_id: int) -> bool:
+        return len(self.dance_members[dance_id]) < self.capacities[dance_id]
+
+    def _choices(self, member_id: int) -> list[int]:
+        # dances the member could be moved into, best rank first
+        quality = self.quality[member_id]
+        assigned = self.member_dances[member_id]
+        return sorted(
+            (d for d in quality if d not in assigned),
+            key=quality.__getitem__,
+            reverse=True,
+        )
+
+    def improve_member(self, member_id: int) -> bool:
+        """Apply the first improving move found for this member, if any."""
+        choices = self._choices(member_id)
+        if not choices:
+            return False
+
+        if self.num_dances[member_id] < self.max_dances[member_id]:
+            # move: take an open seat
+            for dance_id in choices:
+                if self.is_open(dance_id) and self.delta_add(member_id, dance_id) > 0:
+                    self.add(member_id, dance_id)
+                    self.applied += 1
+                    return True
+
+            # ejection chain: take a full dance's seat from someone who loses
+            # less by giving it up, or who can move to an open dance instead
+            for dance_id in choices:
+                gain = self.delta_add(member_id, dance_id)
+                if gain <= 0:
+                    continue
+                if self._eject_into(member_id, dance_id, gain):
+                    return True
+
+        # swap: trade a seat for a better-ranked one, with its holder if full
+        quality = self.quality[member_id]
+        for old in sorted(
+            self.member_dances[member_id], key=lambda d: quality.get(d, 0)
+        ):
+            if (member_id, old) in self.locked:
+                continue
+            for new in choices:
+                if quality[new] <= quality.get(old, 0):
+                    break
+                gain = self.delta_move(member_id, old, new)
+                if self.is_open(new):
+                    if gain > 0:
+                        self.remove(member_id, old)
+                        self.add(member_id, new)
+                        self.applied += 1
+                        return True
+                    continue
+                for other in self.dance_members[new]:
+                    if (
+                        (other, new) in self.locked
+                        or old in self.member_dances[other]
+                        or old not in self.quality[other]
+                    ):
+                        continue
+                    if gain + self.delta_move(other, new, old) > 0:
+                        self.remove(member_id, old)
+                        self.remove(other, new)
+                        self.add(member_id, new)
+                        self.add(other, old)
+                        self.applied += 1
+                        return True
+        return False
+
+    def _eject_into(self, member_id: int, dance_id: int, gain: int) -> bool:
+        best_delta = 0
+        best = None
+        for other in self.dance_members[dance_id]:
+            if (other, dance_id) in self.locked:
+                continue
+            delta = gain + self.delta_remove(other, dance_id)
+            if delta > best_delta:
+                best_delta, best = delta, (other, None)
+            for new in self.quality[other]:
+                if (
+                    new == dance_id
+                    or new in self.member_dances[other]
+                    or not self.is_open(new)
+                ):
+                    continue
+                delta = gain + self.delta_move(other, dance_id, new)
+                if delta > best_delta:
+                    best_delta, best = delta, (other, new)
+        if best is None:
+            return False
+
+        other, new = best
+        self.remove(other, dance_id)
+        if new is not None:
+            self.add(other, new)
+        self.add(member_id, dance_id)
+        self.applied += 1
+        return True
+
+    def to_matching(self, matching: Matching) -> Matching:
+        member_names = self.member_names
+        dance_names = self.dance_names
+        dances_to_dancers = {
+            dance_names[d]: [member_names[m] for m in member_ids]
+            for d, member_ids in enumerate(self.dance_members)
+            if dance_names[d] in matching.dances_to_dancers
+        }
+        dancers_to_dances: dict[str, list[str]] = {name: [] for name in member_names}
+        for dance_name, dancers in dances_to_dancers.items():
+            for dancer in dancers:
+                dancers_to_dances[dancer].append(dance_name)
+        return Matching(dances_to_dancers, dancers_to_dances)
+
+
+def improve_matching(
+    members: list[Member] | MemberTable,
+    dances: list[Dance],
+    matching: Matching,
+    tl_matching: TLMatching,
+    budget_seconds: float = 1.0,
+    rng: random.Random | None = None,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
+) -> LocalSearchResult:
+    """
+    Improve a finished matching with local search until no improving move is
+    left or `budget_seconds` runs out.
+
+    Members are visited in random order and the first improving move found
+    for each is applied: taking an open seat, taking a full dance's seat from
+    someone who loses less by giving it up or can move to an open dance
+    instead, or trading a seat for a better-ranked one, with a swap if that
+    dance is full. Moves only ever raise the matching's satisfaction score,
+    and never break capacities, max rank or max dances or move a TL.
+
+    A search that converges within the budget is reproducible with the same
+    `rng`; one cut short by the budget depends on machine speed.
+
+    Args:
+        members: Members the matching was made for.
+        dances: The dances that were filled.
+        matching: The matching to improve; it isn't modified.
+        tl_matching: TL seats, which are left where they are.
+        budget_seconds: Wall-clock time limit.
+        rng: Source of randomness for the visiting order.
+        stats: When given, the search's time and move counts are recorded.
+        progress: Called as `progress("improve", elapsed_ms, budget_ms)`
+            after every pass over the members.
+
+    Returns:
+        The improved matching and how much work it took.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_seconds
+    shuffle = rng.shuffle if rng else random.shuffle
+
+    search = _Search(members, dances, matching, tl_matching)
+    order = list(range(len(search.member_names)))
+    converged = out_of_time = False
+    while not converged and not out_of_time:
+        shuffle(order)
+        converged = True
+        for member_id in order:
+            if time.perf_counter() >= deadline:
+                out_of_time = True
+                break
+            if search.improve_member(member_id):
+                converged = False
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress("improve", int(elapsed * 1000), int(budget_seconds * 1000))
+    converged = converged and not out_of_time
+
+    seconds = time.perf_counter() - start
+    if stats is not None:
+        stats.local_search_seconds = seconds
+        stats.local_search_evaluated = search.evaluated
+        stats.local_search_applied = search.applied
+        stats.total_seconds += seconds
+    return LocalSearchResult(
+        matching=search.to_matching(matching),
+        moves_evaluated=search.evaluated,
+        moves_applied=search.applied,
+        seconds=seconds,
+        converged=converged,
+    )
@@ -0,0 +1,69 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+# never part of a name, so a match can't span two of them
+_SEPARATOR = "\n"
+
+
+class MemberNameIndex:
+    """
+    Case-insensitive prefix and substring search over member names, built once
+    per upload.
+
+    Names are kept sorted, so prefix matches are one bisection, and joined into
+    a single string, so a substring search is a few `str.find` scans instead of
+    a Python loop over every name.
+    """
+
+    def __init__(self, names: Sequence[str]) -> None:
+        """
+        Args:
+            names: Member names, indexed by member ID.
+        """
+        entries = sorted(
+            (name.casefold(), member_id) for member_id, name in enumerate(names)
+        )
+        self._keys = [key for key, _ in entries]
+        self._ids = [member_id for _, member_id in entries]
+        self._text = _SEPARATOR.join(self._keys)
+        # where each sorted name starts in _text
+        self._starts = []
+        start = 0
+        for key in self._keys:
+            self._starts.append(start)
+            start += len(key) + len(_SEPARATOR)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def search(self, query: str) -> list[int]:
+        """
+        IDs of the members whose name contains `query`: names that start with
+        it first, then the rest, each alphabetically. An empty query matches
+        every member.
+        """
+        query = query.strip().casefold()
+        if not query:
+            return self._ids[:]
+        if _SEPARATOR in query:
+            return []
+
+        keys = self._keys
+        first = bisect_left(keys, query)
+        last = first
+        while last < len(keys) and keys[last].startswith(query):
+            last += 1
+        results = self._ids[first:last]
+
+        text = self._text
+        starts = self._starts
+        position = text.find(query)
+        while position != -1:
+            i = bisect_right(starts, position) - 1
+            if not first <= i < last:
+                results.append(self._ids[i])
+            # one hit per name is enough; skip to the next name
+            if i + 1 == len(starts):
+                break
+            position = text.find(query, starts[i + 1])
+        return results
@@ -0,0 +1,343 @@
+from array import array
+from collections.abc import Iterable, Iterator
+from copy import copy
+
+from enums import Seniority
+from schemas import Member
+
+
+class MemberRow:
+    """
+    Attribute view of one row of a MemberTable, usable wherever a Member is.
+
+    Collection attributes are rebuilt from the table on every access, so edit
+    them by assigning a new value (`row.dance_rankings = [...]`) rather than
+    mutating the returned list or set in place. Setters go through the table's
+    copy-on-write, so editing a row never changes a snapshot of its table.
+    """
+
+    __slots__ = ("_table", "_id")
+
+    def __init__(self, table: "MemberTable", member_id: int) -> None:
+        self._table = table
+        self._id = member_id
+
+    def __repr__(self) -> str:
+        return f"MemberRow({self.name!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MemberRow):
+            return NotImplemented
+        return self._table is other._table and self._id == other._id
+
+    def __hash__(self) -> int:
+        return hash((id(self._table), self._id))
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def name(self) -> str:
+        return self._table.names[self._id]
+
+    @property
+    def seniority(self) -> Seniority:
+        return self._table.seniority[self._id]
+
+    @property
+    def max_dances(self) -> int:
+        return self._table.max_dances[self._id]
+
+    @max_dances.setter
+    def max_dances(self, value: int) -> None:
+        self._table.writable("max_dances")[self._id] = value
+
+    @property
+    def max_rank(self) -> int:
+        return self._table.max_rank[self._id]
+
+    @max_rank.setter
+    def max_rank(self, value: int) -> None:
+        self._table.writable("max_rank")[self._id] = value
+
+    @property
+    def max_tl(self) -> int:
+        return self._table.max_tl[self._id]
+
+    @max_tl.setter
+    def max_tl(self, value: int) -> None:
+        self._table.writable("max_tl")[self._id] = value
+
+    @property
+    def lateness_score(self) -> int:
+        return self._table.lateness_score[self._id]
+
+    @lateness_score.setter
+    def lateness_score(self, value: int) -> None:
+        self._table.writable("lateness_score")[self._id] = value
+
+    @property
+    def busyness_score(self) -> int:
+        return self._table.busyness_score[self._id]
+
+    @busyness_score.setter
+    def busyness_score(self, value: int) -> None:
+        self._table.writable("busyness_score")[self._id] = value
+
+    @property
+    def dance_rankings(self) -> list[str]:
+        dance_names = self._table.dance_names
+        return [dance_names[d] for d in self._table.rankings[self._id]]
+
+    @dance_rankings.setter
+    def dance_rankings(self, value: Iterable[str]) -> None:
+        intern = self._table.intern_dance
+        self._table.writable("rankings")[self._id] = array(
+            "i", [intern(name) for name in value]
+        )
+
+    @property
+    def dances_willing_to_tl(self) -> set[str]:
+        dance_names = self._table.dance_names
+        return {dance_names[d] for d in self._table.tl_dances[self._id]}
+
+    @dances_willing_to_tl.setter
+    def dances_willing_to_tl(self, value: Iterable[str]) -> None:
+        intern = self._table.intern_dance
+        self._table.writable("tl_dances")[self._id] = frozenset(
+            intern(name) for name in value
+        )
+
+    @property
+    def allowed_co_tls(self) -> set[str]:
+        people = self._table.people
+        return {people[p] for p in self._table.co_tls[self._id]}
+
+    @allowed_co_tls.setter
+    def allowed_co_tls(self, value: Iterable[str]) -> None:
+        intern = self._table.intern_person
+        self._table.writable("co_tls")[self._id] = frozenset(
+            intern(name) for name in value
+        )
+
+    @property
+    def co_tl_with_anyone(self) -> bool:
+        return bool(self._table.co_tl_anyone[self._id])
+
+    @co_tl_with_anyone.setter
+    def co_tl_with_anyone(self, value: bool) -> None:
+        self._table.writable("co_tl_anyone")[self._id] = value
+
+    def to_member(self) -> Member:
+        return Member(
+            name=self.name,
+            seniority=self.seniority,
+            max_dances=self.max_dances,
+            max_rank=self.max_rank,
+            max_tl=self.max_tl,
+            dance_rankings=self.dance_rankings,
+            dances_willing_to_tl=self.dances_willing_to_tl,
+            allowed_co_tls=self.allowed_co_tls,
+            co_tl_with_anyone=self.co_tl_with_anyone,
+            lateness_score=self.lateness_score,
+            busyness_score=self.busyness_score,
+        )
+
+
+class MemberTable:
+    """
+    Column-oriented roster: one flat array per numeric field, and dance and
+    person names interned to integer IDs so every name string is stored once.
+
+    `rankings[m]` is an array of dance IDs into `dance_names`, `tl_dances[m]` a
+    set of dance IDs and `co_tls[m]` a set of person IDs into `people`, empty
+    when `co_tl_anyone[m]` says the member would co-TL with anyone. People are
+    the members themselves (person ID == member ID) followed by any other names
+    typed into the co-TL question.
+
+    Indexing with a position or a member name returns a `MemberRow`, and
+    iterating yields rows in table order, so a table can be passed anywhere a
+    `list[Member]` is expected.
+
+    Tables are copy-on-write: `snapshot()` shares every column with the new
+    table, and a column is only copied the first time either table writes to
+    it. Per-member rankings arrays and choice sets are never mutated, only
+    replaced, so copying a column is a copy of pointers and a snapshot never
+    duplicates member data that was not edited. The name vocabularies are
+    append-only and stay shared.
+    """
+
+    __slots__ = (
+        "names",
+        "member_ids",
+        "seniority",
+        "max_dances",
+        "max_rank",
+        "max_tl",
+        "lateness_score",
+        "busyness_score",
+        "rankings",
+        "tl_dances",
+        "co_tls",
+        "co_tl_anyone",
+        "dance_names",
+        "dance_ids",
+        "people",
+        "person_ids",
+        "_shared",
+    )
+
+    # columns that row setters write to, and are therefore copied on write
+    WRITABLE_COLUMNS = (
+        "max_dances",
+        "max_rank",
+        "max_tl",
+        "lateness_score",
+        "busyness_score",
+        "rankings",
+        "tl_dances",
+        "co_tls",
+        "co_tl_anyone",
+    )
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.member_ids: dict[str, int] = {}
+        self.seniority: list[Seniority] = []
+        self.max_dances = array("i")
+        self.max_rank = array("i")
+        self.max_tl = array("i")
+        self.lateness_score = array("i")
+        self.busyness_score = array("i")
+        self.rankings: list[array] = []
+        self.tl_dances: list[frozenset[int]] = []
+        self.co_tls: list[frozenset[int]] = []
+        self.co_tl_anyone = array("b")
+        self.dance_names: list[str] = []
+        self.dance_ids: dict[str, int] = {}
+        self.people: list[str] = []
+        self.person_ids: dict[str, int] = {}
+        self._shared: set[str] = set()
+
+    @classmethod
+    def from_members(cls, members: Iterable[Member]) -> "MemberTable":
+        members = list(members)
+        table = cls()
+        # members take the first person IDs, so co-TL IDs below len(table)
+        # are member IDs
+        for member_id, member in enumerate(members):
+            if member.name in table.member_ids:
+                raise ValueError(f"Duplicate member name: {member.name}")
+            table.names.append(member.name)
+            table.member_ids[member.name] = member_id
+            table.people.append(member.name)
+            table.person_ids[member.name] = member_id
+
+        intern_dance = table.intern_dance
+        intern_person = table.intern_person
+        for member in members:
+            table.seniority.append(member.seniority)
+            table.max_dances.append(member.max_dances)
+            table.max_rank.append(member.max_rank)
+            table.max_tl.append(member.max_tl)
+            table.lateness_score.append(member.lateness_score)
+            table.busyness_score.append(member.busyness_score)
+            table.rankings.append(
+                array("i", [intern_dance(name) for name in member.dance_rankings])
+            )
+            table.tl_dances.append(
+                frozenset(intern_dance(name) for name in member.dances_willing_to_tl)
+            )
+            table.co_tls.append(
+                frozenset(intern_person(name) for name in member.allowed_co_tls)
+            )
+            table.co_tl_anyone.append(member.co_tl_with_anyone)
+        return table
+
+    def intern_dance(self, name: str) -> int:
+        dance_id = self.dance_ids.get(name)
+        if dance_id is None:
+            dance_id = self.dance_ids[name] = len(self.dance_names)
+            self.dance_names.append(name)
+        return dance_id
+
+    def intern_person(self, name: str) -> int:
+        person_id = self.person_ids.get(name)
+        if person_id is None:
+            person_id = self.person_ids[name] = len(self.people)
+            self.people.append(name)
+        return person_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, key: int | str) -> MemberRow:
+        if isinstance(key, str):
+            return MemberRow(self, self.member_ids[key])
+        if key < 0:
+            key += len(self.names)
+        if not 0 <= key < len(self.names):
+            raise IndexError("member index out of range")
+        return MemberRow(self, key)
+
+    def __iter__(self) -> Iterator[MemberRow]:
+        return (MemberRow(self, member_id) for member_id in range(len(self.names)))
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.member_ids
+
+    def writable(self, column: str):
+        """A column of this table that is safe to write to in place."""
+        value = getattr(self, column)
+        if column in self._shared:
+            value = copy(value)
+            setattr(self, column, value)
+            self._shared.discard(column)
+        return value
+
+    def snapshot(self) -> "MemberTable":
+        """
+        An O(1) copy of the table. Later edits to either table don't show up in
+        the other.
+        """
+        table = MemberTable.__new__(MemberTable)
+        for slot in self.__slots__:
+            setattr(table, slot, getattr(self, slot))
+        self._shared = set(self.WRITABLE_COLUMNS)
+        table._shared = set(self.WRITABLE_COLUMNS)
+        return table
+
+    def __copy__(self) -> "MemberTable":
+        return self.snapshot()
+
+    def __deepcopy__(self, memo: dict) -> "MemberTable":
+        # copy-on-write makes a snapshot as independent as a deep copy
+        return self.snapshot()
+
+    def filter_dances(self, valid_dances: set[str]) -> "MemberTable":
+        """
+        A snapshot of the table whose rankings and TL choices only keep
+        `valid_dances`. Members with nothing to drop keep sharing their arrays.
+        """
+        table = self.snapshot()
+        valid_ids = {
+            dance_id
+            for name, dance_id in self.dance_ids.items()
+            if name in valid_dances
+        }
+        table.rankings = [
+            rankings
+            if all(d in valid_ids for d in rankings)
+            else array("i", [d for d in rankings if d in valid_ids])
+            for rankings in self.rankings
+        ]
+        table.tl_dances = [
+            tl_dances if tl_dances <= valid_ids else tl_dances & valid_ids
+            for tl_dances in self.tl_dances
+        ]
+        table._shared -= {"rankings", "tl_dances"}
+        return table
+
+    def to_members(self) -> list[Member]:
+        return [row.to_member() for row in self]
@@ -0,0 +1,167 @@
+from collections import Counter
+from typing import NamedTuple
+
+from constants import SENIORITY_ORDER
+from enums import Seniority
+from schemas import Dance, Matching, Member
+
+
+class SatisfactionScore(NamedTuple):
+    members_with_top3: int
+    members_near_max_dances: int
+    total_members: int
+
+    @property
+    def key(self) -> tuple[int, int]:
+        """Sort key for comparing matchings: both counts combined, then top 3."""
+        return (
+            self.members_with_top3 + self.members_near_max_dances,
+            self.members_with_top3,
+        )
+
+
+class MatchingScorer:
+    """
+    Scores many matchings of the same members quickly: each member's top 3 and
+    max_dances threshold are looked up once, up front, instead of per matching.
+    """
+
+    def __init__(self, members: list[Member]) -> None:
+        self.thresholds = [
+            (
+                member.name,
+                frozenset(member.dance_rankings[:3]),
+                max(0, member.max_dances - 2),
+            )
+            for member in members
+        ]
+
+    def score(self, matching: Matching) -> SatisfactionScore:
+        dancers_to_dances = matching.dancers_to_dances
+        with_top3 = 0
+        near_max = 0
+        for name, top3, min_dances in self.thresholds:
+            assigned = dancers_to_dances.get(name, ())
+            if not top3.isdisjoint(assigned):
+                with_top3 += 1
+            if len(assigned) >= min_dances:
+                near_max += 1
+        return SatisfactionScore(with_top3, near_max, len(self.thresholds))
+
+
+class SeniorityBreakdown(NamedTuple):
+    members: int
+    members_with_top1: int
+    members_with_top3: int
+    members_near_max_dances: int
+    assignments: int
+
+
+class SatisfactionReport(NamedTuple):
+    total_members: int
+    members_with_top1: int
+    members_with_top3: int
+    members_near_max_dances: int
+    # 1-based rank of each assigned dance -> number of assignments; rank None
+    # counts assignments to dances the member didn't rank
+    rank_distribution: dict[int | None, int]
+    # max_dances minus dances assigned -> number of members
+    max_dances_gaps: dict[int, int]
+    empty_seats: dict[str, int]
+    by_seniority: dict[Seniority, SeniorityBreakdown]
+
+    @property
+    def score(self) -> SatisfactionScore:
+        return SatisfactionScore(
+            self.members_with_top3, self.members_near_max_dances, self.total_members
+        )
+
+    @property
+    def top1_rate(self) -> float:
+        return (
+            self.members_with_top1 / self.total_members if self.total_members else 0.0
+        )
+
+    @property
+    def top3_rate(self) -> float:
+        return (
+            self.members_with_top3 / self.total_members if self.total_members else 0.0
+        )
+
+    @property
+    def near_max_dances_rate(self) -> float:
+        return (
+            self.members_near_max_dances / self.total_members
+            if self.total_members
+            else 0.0
+        )
+
+
+def satisfaction_report(
+    matching: Matching, members: list[Member], dances: list[Dance]
+) -> SatisfactionReport:
+    """
+    Compute every satisfaction metric of a matching in one pass over the
+    members, so results can be stored with the matching and rendered as-is.
+
+    Args:
+        matching: The matching to report on.
+        members: Members with the rankings the matching was made from.
+        dances: The dances that were filled.
+
+    Returns:
+        Top-1/top-3 and max_dances counts, the distribution of assigned ranks,
+        the max_dances gap histogram, empty seats per dance and the same counts
+        broken down by seniority.
+    """
+    dancers_to_dances = matching.dancers_to_dances
+    rank_distribution: Counter[int | None] = Counter()
+    max_dances_gaps: Counter[int] = Counter()
+    seniority_counts: dict[Seniority, list[int]] = {}
+    total = [0, 0, 0, 0, 0]
+
+    for member in members:
+        assigned = dancers_to_dances.get(member.name, [])
+        rankings = member.dance_rankings
+        got_top1 = bool(rankings) and rankings[0] in assigned
+        got_top3 = not set(rankings[:3]).isdisjoint(assigned)
+        near_max = len(assigned) >= max(0, member.max_dances - 2)
+
+        if assigned:
+            positions: dict[str, int] = {}
+            for rank, dance_name in enumerate(rankings, start=1):
+                positions.setdefault(dance_name, rank)
+            rank_distribution.update(positions.get(dance) for dance in assigned)
+        max_dances_gaps[member.max_dances - len(assigned)] += 1
+
+        row = (1, got_top1, got_top3, near_max, len(assigned))
+        counts = seniority_counts.setdefault(member.seniority, [0, 0, 0, 0, 0])
+        for i, value in enumerate(row):
+            counts[i] += value
+            total[i] += value
+
+    return SatisfactionReport(
+        total_members=total[0],
+        members_with_top1=total[1],
+        members_with_top3=total[2],
+        members_near_max_dances=total[3],
+        # ranked dances first, in rank order, then unranked ones
+        rank_distribution=dict(
+            sorted(
+                rank_distribution.items(),
+                key=lambda item: (item[0] is None, item[0] or 0),
+            )
+        ),
+        max_dances_gaps=dict(sorted(max_dances_gaps.items())),
+        empty_seats={
+            dance.name: dance.num_dancers
+            - len(matching.dances_to_dancers.get(dance.name, []))
+            for dance in dances
+        },
+        by_seniority={
+            seniority: SeniorityBreakdown(*counts)
+            for seniority, counts in sorted(
+                seniority_counts.items(), key=lambda item: SENIORITY_ORDER[item[0]]
+            )
+        },
+    )
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+import hashlib
+
+import numpy as np
+
+from member_table import MemberTable
+from schemas import Member
+
+
+def rankings_fingerprint(
+    members: list[Member] | MemberTable, included_dances: list[str]
+) -> str:
+    """
+    Hash of everything the preference aggregates depend on: every member's
+    rankings and max rank, and the included dances.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\0".join(sorted(included_dances)).encode())
+    if isinstance(members, MemberTable):
+        digest.update("\0".join(members.dance_names).encode())
+        digest.update(members.max_rank.tobytes())
+        for rankings in members.rankings:
+            digest.update(len(rankings).to_bytes(4, "little"))
+            digest.update(rankings.tobytes())
+    else:
+        for member in members:
+            rankings = member.dance_rankings
+            digest.update(f"{member.max_rank}\0{len(rankings)}\0".encode())
+            digest.update("\0".join(rankings).encode())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class PreferenceAggregates:
+    """
+    Every ranking entry of every member as flat arrays, from which per-dance
+    popularity counts are derived with a mask and one `np.bincount` each.
+
+    Entry i says that a member with `lengths[i]` rankings and a max rank of
+    `max_ranks[i]` ranked dance `dance_ids[i]` at 0-based position `ranks[i]`.
+    """
+
+    dance_names: list[str]
+    included_dances: list[str]
+    dance_ids: np.ndarray
+    ranks: np.ndarray
+    lengths: np.ndarray
+    max_ranks: np.ndarray
+
+    @property
+    def rank_histogram(self) -> np.ndarray:
+        """`[dance, rank]` -> number of members who ranked the dance there."""
+        width = int(self.ranks.max()) + 1 if self.ranks.size else 0
+        counts = np.bincount(
+            self.dance_ids * width + self.ranks,
+            minlength=len(self.dance_names) * width,
+        )
+        return counts.reshape(len(self.dance_names), width)
+
+    def _counts(self, mask: np.ndarray) -> list[tuple[str, int]]:
+        counts = np.bincount(self.dance_ids[mask], minlength=len(self.dance_names))
+        # every ranked dance is counted; included dances nobody ranked show up
+        # with a count of 0
+        by_name = {name: 0 for name in self.included_dances}
+        for dance_id in np.flatnonzero(counts):
+            by_name[self.dance_names[dance_id]] = int(counts[dance_id])
+        return sorted(by_name.items(), key=lambda item: (-item[1], item[0]))
+
+    def top_counts(self, k: int = 3) -> list[tuple[str, int]]:
+        """
+        (dance, count) pairs, most frequent first, counting appearances within
+        each member's top min(k, max_rank) rankings.
+        """
+        return self._counts(self.ranks < np.minimum(k, self.max_ranks))
+
+    def bottom_counts(
+        self, start: float = 0.67, min_rankings: int = 4
+    ) -> list[tuple[str, int]]:
+        """
+        (dance, count) pairs, most frequent first, counting appearances from
+        position `int(num_rankings * start)` onwards, for members with at least
+        `min_rankings` rankings.
+        """
+        mask = (self.lengths >= min_rankings) & (
+            self.ranks >= np.floor(self.lengths * start)
+        )
+        return self._counts(mask)
+
+
+def preference_aggregates(
+    members: list[Member] | MemberTable, included_dances: list[str]
+) -> PreferenceAggregates:
+    """Flatten every member's rankings into a PreferenceAggregates in one pass."""
+    if isinstance(members, MemberTable):
+        dance_names = members.dance_names[:]
+        lengths_per_member = np.fromiter(
+            map(len, members.rankings), dtype=np.int64, count=len(members)
+        )
+        dance_ids = np.frombuffer(
+            b"".join(rankings.tobytes() for rankings in members.rankings),
+            dtype=np.int32,
+        ).astype(np.int64)
+        max_rank_per_member = np.asarray(members.max_rank, dtype=np.int64)
+    else:
+        dance_index: dict[str, int] = {}
+        flat_ids = [
+            dance_index.setdefault(name, len(dance_index))
+            for member in members
+            for name in member.dance_rankings
+        ]
+        dance_names = list(dance_index)
+        lengths_per_member = np.array(
+            [len(member.dance_rankings) for member in members], dtype=np.int64
+        )
+        dance_ids = np.array(flat_ids, dtype=np.int64)
+        max_rank_per_member = np.array(
+            [member.max_rank for member in members], dtype=np.int64
+        )
+
+    # position of every entry within its member's rankings
+    starts = np.cumsum(lengths_per_member) - lengths_per_member
+    ranks = np.arange(dance_ids.size) - np.repeat(starts, lengths_per_member)
+    return PreferenceAggregates(
+        dance_names=dance_names,
+        included_dances=list(included_dances),
+        dance_ids=dance_ids,
+        ranks=ranks,
+        lengths=np.repeat(lengths_per_member, lengths_per_member),
+        max_ranks=np.repeat(max_rank_per_member, lengths_per_member),
+    )
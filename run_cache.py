@@ -0,0 +1,162 @@
+from collections.abc import Iterator
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import time
+from typing import Any
+
+from enums import MatchBackend
+from member_table import MemberTable
+from schemas import Dance, Member, TLMatching
+
+DEFAULT_CACHE_DIR = Path(".matcher_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# bump when a matcher change makes old cached results stale
+CACHE_VERSION = 1
+
+_SUFFIX = ".pkl"
+
+
+def _member_records(members: list[Member] | MemberTable) -> Iterator[tuple]:
+    # every setting a matcher reads, with names instead of table IDs so the
+    # key doesn't depend on interning order
+    if isinstance(members, MemberTable):
+        dance_names = members.dance_names
+        people = members.people
+        for member_id, name in enumerate(members.names):
+            yield (
+                name,
+                str(members.seniority[member_id]),
+                members.max_dances[member_id],
+                members.max_rank[member_id],
+                members.max_tl[member_id],
+                members.lateness_score[member_id],
+                members.busyness_score[member_id],
+                [dance_names[d] for d in members.rankings[member_id]],
+                sorted(dance_names[d] for d in members.tl_dances[member_id]),
+                sorted(people[p] for p in members.co_tls[member_id]),
+                bool(members.co_tl_anyone[member_id]),
+            )
+        return
+
+    for member in members:
+        yield (
+            member.name,
+            str(member.seniority),
+            member.max_dances,
+            member.max_rank,
+            member.max_tl,
+            member.lateness_score,
+            member.busyness_score,
+            list(member.dance_rankings),
+            sorted(member.dances_willing_to_tl),
+            sorted(member.allowed_co_tls),
+            member.co_tl_with_anyone,
+        )
+
+
+def run_key(
+    members: list[Member] | MemberTable,
+    dances: list[Dance],
+    seed: int,
+    backend: MatchBackend = MatchBackend.PYTHON,
+    num_runs: int = 1,
+    tl_matching: TLMatching | None = None,
+    improve_seconds: float = 0.0,
+) -> str:
+    """
+    Hash of everything a matching run depends on: member settings, the dances
+    being matched and their capacities, any pre-assigned TLs, the seed, the
+    backend, the number of ensemble runs and the local search budget.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(
+        repr((CACHE_VERSION, seed, str(backend), num_runs, improve_seconds)).encode()
+    )
+    digest.update(repr([(dance.name, dance.num_dancers) for dance in dances]).encode())
+    if tl_matching is not None:
+        digest.update(repr(sorted(tl_matching.dances_to_tls.items())).encode())
+    for record in _member_records(members):
+        digest.update(repr(record).encode())
+    return digest.hexdigest()
+
+
+class RunCache:
+    """
+    Matching results pickled to one file per key under `directory`.
+
+    Reading an entry bumps its modification time, and writing one evicts the
+    least recently used entries until the cache fits in `max_bytes` again.
+    Writes go through a temporary file, so a crash never leaves a half-written
+    entry behind.
+    """
+
+    def __init__(
+        self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Any | None:
+        """The value stored under `key`, or None if it isn't cached."""
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # written by an incompatible version of the app
+            path.unlink(missing_ok=True)
+            return None
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except FileNotFoundError:
+            # evicted by another session in the meantime
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, self._path(key))
+        self.evict(keep=key)
+
+    def evict(self, keep: str | None = None) -> None:
+        """
+        Delete least recently used entries until the cache fits in
+        `max_bytes`, never deleting `keep`.
+        """
+        entries = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        keep_path = self._path(keep) if keep is not None else None
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            path.unlink(missing_ok=True)
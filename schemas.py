@@ -33,3 +33,6 @@ class Member(BaseModel):
     max_tl: int
     dances_willing_to_tl: set[str] = Field(default_factory=set)
     allowed_co_tls: set[str] = Field(default_factory=set)
+    # "Yes, with anyone": every member is an allowed co-TL, and allowed_co_tls
+    # is left empty rather than listing them all
+    co_tl_with_anyone: bool = False
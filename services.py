@@ -1,158 +1,248 @@
-from collections import defaultdict
-from copy import deepcopy
+from collections.abc import Iterator
 import random
-from constants import SENIORITY_ORDER
+import time
+from typing import NamedTuple
+
+from engine import (
+    CompiledProblem,
+    MatchState,
+    compile_problem,
+    iter_rank_rounds,
+    last_ranks,
+    run_rank_rounds,
+    run_tl_rounds,
+)
+from enums import MatchBackend
+from instrumentation import MatchStats, ProgressCallback
 from schemas import Member, Dance, Matching, TLMatching
 
 
-def _get_eligible_members_by_dance(
+def match_tls(
     members: list[Member],
     dances: list[Dance],
-    rank: int,
-    dances_to_members: dict[str, list[str]],
-    members_to_dances: dict[str, list[str]],
-    is_tl: bool = False,
-) -> dict[str, list[Member]]:
-    eligible_members: dict[str, list[Member]] = defaultdict(list)
-
+    backend: MatchBackend = MatchBackend.PYTHON,
+    rng: random.Random | None = None,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
+) -> TLMatching:
+    if backend == MatchBackend.NUMPY:
+        from vectorized import match_tls_vectorized
+
+        start = time.perf_counter()
+        tl_matching = match_tls_vectorized(members, dances, rng, progress)
+        if stats is not None:
+            stats.tl_seconds = time.perf_counter() - start
+        return tl_matching
+
+    start = time.perf_counter()
+    problem = compile_problem(members, dances)
+    if stats is not None:
+        stats.compile_seconds = time.perf_counter() - start
+    state = problem.new_state()
+    start = time.perf_counter()
+    run_tl_rounds(problem, state, rng, stats, progress)
+    if stats is not None:
+        stats.tl_seconds = time.perf_counter() - start
+    return state.to_tl_matching(problem)
+
+
+def _count_max_rank_rejections(
+    members: list[Member], dances: list[Dance], stats: MatchStats
+) -> None:
+    # rankings past max_rank never make it into the compiled rank buckets, so
+    # they are counted from the members themselves
+    dance_names = {dance.name for dance in dances}
     for member in members:
-        if rank >= len(member.dance_rankings):
-            continue
-
-        dance_name = member.dance_rankings[rank]
-        dance = next((d for d in dances if d.name == dance_name))
-
-        # filter out member if already in the dance
-        if member.name in dances_to_members[dance_name]:
-            continue
-
-        # pass if dance is at full capacity
-        if len(dances_to_members[dance_name]) >= dance.num_dancers:
-            continue
-
-        # pass if member doesn't want to be considered
-        if len(members_to_dances[member.name]) >= member.max_dances:
-            continue
-        elif (rank + 1) > member.max_rank:
-            continue
-        elif is_tl and len(members_to_dances[member.name]) >= member.max_tl:
-            continue
-        elif is_tl and dance_name not in member.dances_willing_to_tl:
-            continue
-
-        eligible_members[dance_name].append(member)
-
-    return eligible_members
-
-
-def match_tls(members: list[Member], dances: list[Dance]) -> TLMatching:
-    dances_to_tls: dict[str, list[str]] = defaultdict(list)
-    tls_to_dances: dict[str, list[str]] = defaultdict(list)
-
-    for i in range(len(dances)):
-        dances_to_tl_members = _get_eligible_members_by_dance(
-            members=members,
-            dances=dances,
-            rank=i,
-            dances_to_members=dances_to_tls,
-            members_to_dances=tls_to_dances,
-            is_tl=True,
-        )
-
-        for dance_name, tl_members in dances_to_tl_members.items():
-            if not tl_members:
-                continue
-
-            existing_tls = dances_to_tls[dance_name]
-            # pass if TL limit reached. error if more than 2 TLs assigned.
-            if len(existing_tls) > 2:
-                raise ValueError("Can't assign more than 2 TLs per dance.")
-            if len(existing_tls) == 2:
-                continue
-
-            # otherwise, fetch or select the first TL for the dance.
-            first_tl_name = existing_tls[0] if len(existing_tls) == 1 else None
-            first_tl: Member
-            if first_tl_name:
-                first_tl = next(c for c in members if c.name == first_tl_name)
-            else:
-                first_tl = random.choice(tl_members)
-                dances_to_tls[dance_name].append(first_tl.name)
-                tls_to_dances[first_tl.name].append(dance_name)
-
-            # select a co-TL if possible.
-            second_tl_members = [
-                c
-                for c in tl_members
-                if c.name != first_tl.name
-                and c.name in first_tl.allowed_co_tls
-                and first_tl.name in c.allowed_co_tls
-            ]
-            if not second_tl_members:
-                continue
-            second_tl = random.choice(second_tl_members)
-            dances_to_tls[dance_name].append(second_tl.name)
-            tls_to_dances[second_tl.name].append(dance_name)
-
-    return TLMatching(
-        dances_to_tls,
-        tls_to_dances,
-    )
+        for rank in range(member.max_rank, len(stats.rank_rounds)):
+            if rank >= len(member.dance_rankings):
+                break
+            if member.dance_rankings[rank] in dance_names:
+                stats.rank_rounds[rank].rejections["max_rank"] += 1
 
 
 def match(
     members: list[Member],
     dances: list[Dance],
     tl_matching: TLMatching | None = None,
+    backend: MatchBackend = MatchBackend.PYTHON,
+    rng: random.Random | None = None,
+    stats: MatchStats | None = None,
+    progress: ProgressCallback | None = None,
 ) -> tuple[Matching, TLMatching]:
-    if not tl_matching:
-        tl_matching = match_tls(members, dances)
-
-    dances_to_dancers = {
-        dance.name: deepcopy(tl_matching.dances_to_tls.get(dance.name, []))
-        for dance in dances
-    }
-    dancers_to_dances = {
-        member.name: deepcopy(tl_matching.tls_to_dances.get(member.name, []))
-        for member in members
-    }
-
-    for i in range(len(dances)):
-        dances_to_candidates: dict[str, list[Member]] = _get_eligible_members_by_dance(
-            members=members,
-            dances=dances,
-            rank=i,
-            dances_to_members=dances_to_dancers,
-            members_to_dances=dancers_to_dances,
-        )
-
-        for dance_name, candidates in dances_to_candidates.items():
-            dance = next((d for d in dances if d.name == dance_name))
-            num_missing_dancers = dance.num_dancers - len(dances_to_dancers[dance_name])
-
-            shuffled_members: list[Member] = candidates[:]
-            random.shuffle(shuffled_members)
-            selected_dancers: list[Member] = sorted(
-                shuffled_members,
-                key=lambda x: (
-                    SENIORITY_ORDER[x.seniority],
-                    x.lateness_score,
-                    x.busyness_score,
-                ),
-            )[:num_missing_dancers]
-
-            dances_to_dancers[dance_name].extend(
-                [dancer.name for dancer in selected_dancers]
+    """
+    Match members to dances: TLs first, then one rank round per dance.
+
+    Args:
+        members: Members with their (already filtered) dance rankings.
+        dances: The dances to fill.
+        tl_matching: Pre-assigned TLs. Computed with `match_tls` when omitted.
+        backend: Which matcher implementation to run. `MatchBackend.FLOW` keeps
+            the greedy TL phase but fills the remaining seats with an exact
+            min-cost flow instead of rank rounds.
+        rng: Source of randomness for tie-breaking. Defaults to the global
+            `random` module; pass a seeded `random.Random` for an independent,
+            reproducible run.
+        stats: When given, filled in with phase timings and, for the Python
+            backend, per-round candidate, rejection and seat counts. Leaving it
+            out skips all bookkeeping.
+        progress: Called as `progress(phase, rounds_done, num_rounds)` before
+            and after every TL ("tl") and rank ("rank") round. An exception
+            raised from it aborts the run, which is how jobs are cancelled.
+
+    Returns:
+        The matching and the TL matching it was built on.
+    """
+    match_start = time.perf_counter()
+
+    if backend == MatchBackend.NUMPY:
+        from vectorized import match_vectorized
+
+        result = match_vectorized(members, dances, tl_matching, rng, progress)
+        if stats is not None:
+            stats.total_seconds = time.perf_counter() - match_start
+        return result
+
+    if backend == MatchBackend.FLOW:
+        from flow import match_min_cost_flow
+
+        if not tl_matching:
+            tl_matching = match_tls(
+                members, dances, rng=rng, stats=stats, progress=progress
             )
-            for dancer in selected_dancers:
-                dancers_to_dances[dancer.name].append(dance_name)
-
-    matching = Matching(
-        dances_to_dancers,
-        dancers_to_dances,
-    )
+        # the flow is solved in one go, so it reports as a single round
+        if progress is not None:
+            progress("rank", 0, 1)
+        start = time.perf_counter()
+        matching = match_min_cost_flow(members, dances, tl_matching, rng)
+        if progress is not None:
+            progress("rank", 1, 1)
+        if stats is not None:
+            stats.rank_seconds = time.perf_counter() - start
+            stats.total_seconds = time.perf_counter() - match_start
+        return matching, tl_matching
+
+    problem = compile_problem(members, dances)
+    if stats is not None:
+        stats.compile_seconds = time.perf_counter() - match_start
+
+    start = time.perf_counter()
+    if not tl_matching:
+        state = problem.new_state()
+        run_tl_rounds(problem, state, rng, stats, progress)
+        tl_matching = state.to_tl_matching(problem)
+    else:
+        state = problem.new_state(tl_matching)
+    if stats is not None:
+        stats.tl_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_rank_rounds(problem, state, rng, stats, progress)
+    if stats is not None:
+        stats.rank_seconds = time.perf_counter() - start
+        _count_max_rank_rejections(members, dances, stats)
+        stats.total_seconds = time.perf_counter() - match_start
 
     return (
-        matching,
+        state.to_matching(problem),
         tl_matching,
     )
+
+
+class PartialMatching(NamedTuple):
+    """The matching as of the end of the TL phase or of one rank round."""
+
+    # "tl" after the TL phase, "rank" after a rank round
+    phase: str
+    # 0-based rank of the round just run, None after the TL phase
+    rank: int | None
+    matching: Matching
+    tl_matching: TLMatching
+    seats_filled: int
+    open_seats: int
+    # members with room for another dance and a choice in a later round
+    eligible_members: int
+
+    @property
+    def done(self) -> bool:
+        """Whether the remaining rounds can't assign anyone anymore."""
+        return self.open_seats == 0 or self.eligible_members == 0
+
+
+def _partial_matching(
+    problem: CompiledProblem,
+    state: MatchState,
+    tl_matching: TLMatching,
+    member_last_ranks: list[int],
+    rank: int | None,
+) -> PartialMatching:
+    capacities = problem.capacities
+    seats_filled = 0
+    open_seats = 0
+    for dance_id, member_ids in enumerate(state.dance_members):
+        seats_filled += len(member_ids)
+        open_seats += max(capacities[dance_id] - len(member_ids), 0)
+    current_rank = -1 if rank is None else rank
+    eligible_members = sum(
+        1
+        for dance_ids, max_dances, last_rank in zip(
+            state.member_dances, problem.max_dances, member_last_ranks
+        )
+        if last_rank > current_rank and len(dance_ids) < max_dances
+    )
+    return PartialMatching(
+        phase="tl" if rank is None else "rank",
+        rank=rank,
+        matching=state.to_matching(problem),
+        tl_matching=tl_matching,
+        seats_filled=seats_filled,
+        open_seats=open_seats,
+        eligible_members=eligible_members,
+    )
+
+
+def iter_match(
+    members: list[Member],
+    dances: list[Dance],
+    tl_matching: TLMatching | None = None,
+    rng: random.Random | None = None,
+) -> Iterator[PartialMatching]:
+    """
+    Like `match` with the Python backend, but yields the matching so far after
+    the TL phase and after every rank round, so callers can stream progress,
+    show partial results or stop whenever they like.
+
+    Iteration stops by itself once the remaining rounds can't assign anyone:
+    every dance is full, or every member is at their max dances or past their
+    last choice within max rank. The last matching yielded is the one `match`
+    returns for the same inputs and RNG.
+
+    Args:
+        members: Members with their (already filtered) dance rankings.
+        dances: The dances to fill.
+        tl_matching: Pre-assigned TLs. Matched first when omitted.
+        rng: Source of randomness for tie-breaking, as for `match`.
+
+    Yields:
+        A PartialMatching after the TL phase and after each rank round run.
+    """
+    problem = compile_problem(members, dances)
+    if not tl_matching:
+        state = problem.new_state()
+        run_tl_rounds(problem, state, rng)
+        tl_matching = state.to_tl_matching(problem)
+    else:
+        state = problem.new_state(tl_matching)
+
+    member_last_ranks = last_ranks(problem)
+    partial = _partial_matching(problem, state, tl_matching, member_last_ranks, None)
+    yield partial
+    if partial.done:
+        return
+
+    for rank in iter_rank_rounds(problem, state, rng):
+        partial = _partial_matching(
+            problem, state, tl_matching, member_last_ranks, rank
+        )
+        yield partial
+        if partial.done:
+            return
@@ -0,0 +1,205 @@
+from dataclasses import replace
+from itertools import permutations, product
+import random
+from typing import NamedTuple
+
+from engine import CompiledProblem, compile_problem, run_rank_rounds, run_tl_rounds
+from instrumentation import ProgressCallback
+from member_table import MemberTable
+from metrics import MatchingScorer
+from schemas import Dance, Member
+from worker_pool import pool_map, worker_context
+
+# the terms of a member's priority, in the order compile_problem stores them
+PRIORITY_TERMS = ("seniority", "lateness", "busyness")
+
+
+class PriorityScheme(NamedTuple):
+    """
+    How members are ordered for a contested seat, lowest key first.
+
+    The key has one entry per level, compared lexicographically, and each
+    level is a weighted sum of priority terms. The matcher's built-in order is
+    three levels of one term each: seniority, then lateness, then busyness.
+    """
+
+    levels: tuple[tuple[tuple[str, float], ...], ...]
+
+    @classmethod
+    def lexicographic(
+        cls,
+        order: tuple[str, ...] = PRIORITY_TERMS,
+        reversed_terms: frozenset[str] = frozenset(),
+    ) -> "PriorityScheme":
+        return cls(
+            tuple(((term, -1.0 if term in reversed_terms else 1.0),) for term in order)
+        )
+
+    @classmethod
+    def weighted(cls, weights: dict[str, float]) -> "PriorityScheme":
+        return cls(
+            (tuple((term, weight) for term, weight in weights.items() if weight),)
+        )
+
+    @property
+    def label(self) -> str:
+        return " > ".join(
+            " + ".join(
+                term
+                if weight == 1
+                else f"-{term}"
+                if weight == -1
+                else f"{weight:g}*{term}"
+                for term, weight in level
+            )
+            for level in self.levels
+        )
+
+    def key(self, terms: tuple[int, int, int]) -> tuple[float, ...]:
+        values = dict(zip(PRIORITY_TERMS, terms))
+        return tuple(
+            sum(weight * values[term] for term, weight in level)
+            for level in self.levels
+        )
+
+
+def default_schemes(
+    weights: tuple[float, ...] = (0.0, 1.0, 2.0),
+    reverse_seniority: bool = True,
+) -> list[PriorityScheme]:
+    """
+    Every ordering of the priority terms, plus a weighted sum of them for every
+    combination of `weights` that isn't all zeros or a multiple of another.
+
+    Every term is lower-is-better, so non-negative weights can at most ignore
+    seniority. With `reverse_seniority`, each scheme that uses seniority is
+    also tried with it negated, which puts juniors ahead of seniors.
+    """
+    signs = (1.0, -1.0) if reverse_seniority else (1.0,)
+    schemes = [
+        PriorityScheme.lexicographic(
+            order, reversed_terms=frozenset({"seniority"} if sign < 0 else ())
+        )
+        for sign in signs
+        for order in permutations(PRIORITY_TERMS)
+    ]
+    seen = set()
+    for sign, combination in product(
+        signs, product(weights, repeat=len(PRIORITY_TERMS))
+    ):
+        if not any(combination):
+            continue
+        # seniority is the first term
+        combination = (sign * combination[0], *combination[1:])
+        # (0, 2, 2) orders members the same way as (0, 1, 1)
+        normalized = tuple(w / max(map(abs, combination)) for w in combination)
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        weights_by_term = dict(zip(PRIORITY_TERMS, combination))
+        schemes.append(PriorityScheme.weighted(weights_by_term))
+    return schemes
+
+
+class SweepPoint(NamedTuple):
+    scheme: PriorityScheme
+    # averaged over the scheme's seeded runs
+    members_with_top3: float
+    members_near_max_dances: float
+    total_members: int
+    pareto_optimal: bool
+
+
+def _score_scheme(
+    task: tuple[int, PriorityScheme, list[int]],
+) -> tuple[int, float, float]:
+    index, scheme, seeds = task
+    problem, scorer = worker_context()
+    # buckets and limits are read-only during a run, so only priorities differ
+    problem = replace(
+        problem, priorities=[scheme.key(terms) for terms in problem.priorities]
+    )
+    top3 = near_max = 0
+    for seed in seeds:
+        rng = random.Random(seed)
+        state = problem.new_state()
+        run_tl_rounds(problem, state, rng)
+        run_rank_rounds(problem, state, rng)
+        score = scorer.score(state.to_matching(problem))
+        top3 += score.members_with_top3
+        near_max += score.members_near_max_dances
+    return index, top3 / len(seeds), near_max / len(seeds)
+
+
+def pareto_front(points: list[tuple[float, ...]]) -> set[int]:
+    """Indices of the points no other point matches or beats in every value."""
+    front = set()
+    for i, point in enumerate(points):
+        dominated = any(
+            other != point and all(o >= p for o, p in zip(other, point))
+            for other in points
+        )
+        if not dominated:
+            front.add(i)
+    return front
+
+
+def run_sweep(
+    members: list[Member] | MemberTable,
+    dances: list[Dance],
+    schemes: list[PriorityScheme] | None = None,
+    runs_per_scheme: int = 3,
+    seed: int | None = None,
+    max_workers: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> list[SweepPoint]:
+    """
+    Match with each priority scheme across a process pool (see `pool_map`) and
+    score the results, to show what favouring one priority term costs in
+    satisfaction.
+
+    The problem is compiled once and a run only swaps in the scheme's priority
+    keys. Every scheme is run with seeds `seed` to `seed + runs_per_scheme - 1`.
+
+    Args:
+        members: Members to match.
+        dances: Dances to fill.
+        schemes: Priority schemes to compare. Defaults to `default_schemes()`.
+        runs_per_scheme: Seeded runs averaged per scheme.
+        seed: First seed. Random when omitted.
+        max_workers: Worker processes to use. Defaults to the number of CPUs.
+        progress: Called as `progress("schemes", schemes_done, num_schemes)`.
+
+    Returns:
+        One point per scheme, in the order given, with its average top 3 and
+        max_dances counts and whether it is on the Pareto frontier of the two.
+    """
+    if runs_per_scheme < 1:
+        raise ValueError("runs_per_scheme must be at least 1.")
+    if schemes is None:
+        schemes = default_schemes()
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    seeds = [seed + i for i in range(runs_per_scheme)]
+    tasks = [(i, scheme, seeds) for i, scheme in enumerate(schemes)]
+
+    results = pool_map(
+        _score_scheme,
+        tasks,
+        (compile_problem(members, dances), MatchingScorer(members)),
+        "schemes",
+        max_workers=max_workers,
+        progress=progress,
+    )
+
+    front = pareto_front([(top3, near_max) for _, top3, near_max in results])
+    return [
+        SweepPoint(
+            scheme=schemes[index],
+            members_with_top3=top3,
+            members_near_max_dances=near_max,
+            total_members=len(members),
+            pareto_optimal=index in front,
+        )
+        for index, top3, near_max in results
+    ]
@@ -0,0 +1,175 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import (
+    CO_TL_SPECIFIC_PEOPLE_COLUMN,
+    CO_TL_WILLINGNESS_COLUMN,
+    TL_INTEREST_COLUMN,
+    TL_PREFERENCE_COLUMN,
+    TL_SPECIFIC_DANCES_COLUMN,
+)
+
+SENIORITY_ANSWERS = ["Newbie", "Sophomore", "Junior", "Senior", "Grad Student", "Exchange"]
+SENIORITY_WEIGHTS = [0.3, 0.25, 0.2, 0.17, 0.05, 0.03]
+CO_TL_ANSWERS = ["No", "Yes, with anyone", "Yes, with specific people"]
+CO_TL_WEIGHTS = [0.2, 0.5, 0.3]
+
+
+def generate_dances_df(num_dances: int, seed: int = 0) -> pd.DataFrame:
+    """Generate a dances CSV table with the same columns as the real export."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "Dance": [f"Dance {i:04d}" for i in range(num_dances)],
+            "No. of Dancers": rng.integers(4, 17, size=num_dances),
+        }
+    )
+
+
+def generate_rankings_df(
+    num_members: int,
+    dance_names: list[str],
+    seed: int = 0,
+    max_ranked: int = 30,
+    popularity_skew: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Generate a rankings CSV table in the Google Form column layout.
+
+    Dance popularity follows a Zipf-like distribution: the i-th most popular
+    dance is weighted `1 / (i + 1) ** popularity_skew`, and every member ranks
+    `max_ranked` dances (or all of them, if there are fewer) sampled without
+    replacement from those weights. About a quarter of the members want to TL,
+    with a mix of "any dance" and specific selections and co-TL answers.
+
+    Args:
+        num_members: Number of form responses.
+        dance_names: Names of the dances members rank.
+        seed: Seed for a reproducible table.
+        max_ranked: Number of ranking columns each member fills in.
+        popularity_skew: Zipf exponent; 0 makes every dance equally popular.
+
+    Returns:
+        A DataFrame that `utils.process_rankings_csv` can read once written out
+        as CSV.
+    """
+    rng = np.random.default_rng(seed)
+    num_dances = len(dance_names)
+    num_ranked = min(max_ranked, num_dances)
+    names = np.array([f"Member {i:05d}" for i in range(num_members)], dtype=object)
+    dances = np.array(dance_names, dtype=object)
+
+    # rank by Gumbel-perturbed log weights, i.e. weighted sampling without
+    # replacement; done in chunks to keep the members x dances matrix small
+    log_weights = -popularity_skew * np.log(np.arange(1, num_dances + 1))
+    log_weights = log_weights[rng.permutation(num_dances)]
+    rankings = np.empty((num_members, num_ranked), dtype=object)
+    chunk_size = max(1, 2_000_000 // max(num_dances, 1))
+    for start in range(0, num_members, chunk_size):
+        stop = min(start + chunk_size, num_members)
+        keys = log_weights + rng.gumbel(size=(stop - start, num_dances))
+        top = np.argpartition(-keys, num_ranked - 1, axis=1)[:, :num_ranked]
+        order = np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1)
+        rankings[start:stop] = dances[np.take_along_axis(top, order, axis=1)]
+
+    wants_to_tl = rng.random(num_members) < 0.25
+    any_dance = rng.random(num_members) < 0.5
+    tl_preference = np.where(
+        wants_to_tl, np.where(any_dance, "Any dance I'm in", "Specific dances"), None
+    )
+    specific_dances = [
+        ", ".join(rankings[i, : rng.integers(1, 4)])
+        if wants_to_tl[i] and not any_dance[i]
+        else None
+        for i in range(num_members)
+    ]
+    co_tl = np.where(
+        wants_to_tl,
+        rng.choice(CO_TL_ANSWERS, size=num_members, p=CO_TL_WEIGHTS),
+        None,
+    )
+    specific_people = [
+        ", ".join(rng.choice(names, size=rng.integers(1, 4), replace=False))
+        if answer == "Yes, with specific people"
+        else None
+        for answer in co_tl
+    ]
+    max_tl = np.where(wants_to_tl, rng.integers(1, 3, size=num_members), np.nan)
+
+    df = pd.DataFrame(
+        {
+            "Timestamp": "1/1/2025 12:00:00",
+            "Name": names,
+            "Seniority": rng.choice(
+                SENIORITY_ANSWERS, size=num_members, p=SENIORITY_WEIGHTS
+            ),
+            "Max Dances": rng.integers(1, 7, size=num_members),
+            "Max Rank": rng.integers(min(3, num_ranked), num_ranked + 1, size=num_members),
+            "Max TL": max_tl,
+        }
+    )
+    ranking_columns = pd.DataFrame(
+        rankings,
+        columns=[f"Put your rankings here! [{i + 1}]" for i in range(num_ranked)],
+    )
+    answers = pd.DataFrame(
+        {
+            TL_INTEREST_COLUMN: np.where(wants_to_tl, "Yes", "No"),
+            TL_PREFERENCE_COLUMN: tl_preference,
+            TL_SPECIFIC_DANCES_COLUMN: specific_dances,
+            CO_TL_WILLINGNESS_COLUMN: co_tl,
+            CO_TL_SPECIFIC_PEOPLE_COLUMN: specific_people,
+        }
+    )
+    return pd.concat([df, ranking_columns, answers], axis=1)
+
+
+def generate_csvs(
+    out_dir: Path,
+    num_members: int,
+    num_dances: int,
+    seed: int = 0,
+    max_ranked: int = 30,
+    popularity_skew: float = 1.0,
+) -> tuple[Path, Path]:
+    """Write a synthetic `rankings.csv` and `dances.csv` pair to `out_dir`."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dances_df = generate_dances_df(num_dances, seed)
+    rankings_df = generate_rankings_df(
+        num_members,
+        dances_df["Dance"].tolist(),
+        seed=seed,
+        max_ranked=max_ranked,
+        popularity_skew=popularity_skew,
+    )
+    rankings_path = out_dir / "rankings.csv"
+    dances_path = out_dir / "dances.csv"
+    rankings_df.to_csv(rankings_path, index=False)
+    dances_df.to_csv(dances_path, index=False)
+    return rankings_path, dances_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic rankings and dances CSVs."
+    )
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--dances", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ranked", type=int, default=30)
+    parser.add_argument("--skew", type=float, default=1.0)
+    args = parser.parse_args()
+
+    paths = generate_csvs(
+        args.out_dir,
+        args.members,
+        args.dances,
+        seed=args.seed,
+        max_ranked=args.max_ranked,
+        popularity_skew=args.skew,
+    )
+    print("\n".join(str(path) for path in paths))
@@ -0,0 +1,123 @@
+from collections import Counter
+import io
+import random
+
+from enums import Seniority
+from schemas import Dance, Matching, Member, TLMatching
+from synthetic import generate_dances_df, generate_rankings_df
+from utils import (
+    filter_member_rankings_by_valid_dances,
+    process_dances_csv,
+    process_rankings_csv,
+)
+
+
+def random_club(
+    num_members: int,
+    num_dances: int,
+    seed: int = 0,
+    max_score: int = 0,
+    duplicate_rankings: bool = False,
+) -> tuple[list[Member], list[Dance]]:
+    """
+    A small random club. `max_score` bounds the lateness and busyness scores,
+    and `duplicate_rankings` lets members rank a dance more than once.
+    """
+    rng = random.Random(seed)
+    dances = [
+        Dance(name=f"Dance {i}", num_dancers=rng.randint(2, 12))
+        for i in range(num_dances)
+    ]
+    dance_names = [dance.name for dance in dances]
+    names = [f"Member {i}" for i in range(num_members)]
+    members = []
+    for name in names:
+        rankings = rng.sample(dance_names, rng.randint(1, num_dances))
+        if duplicate_rankings and rng.random() < 0.5:
+            rankings.insert(rng.randrange(len(rankings) + 1), rng.choice(rankings))
+        is_tl = rng.random() < 0.3
+        members.append(
+            Member(
+                name=name,
+                seniority=rng.choice(list(Seniority)),
+                max_dances=rng.randint(1, 5),
+                max_rank=rng.randint(1, len(rankings) + 1),
+                dance_rankings=rankings,
+                lateness_score=rng.randint(0, max_score),
+                busyness_score=rng.randint(0, max_score),
+                max_tl=rng.randint(1, 2) if is_tl else 0,
+                dances_willing_to_tl=(
+                    set(rng.sample(rankings, min(3, len(rankings)))) if is_tl else set()
+                ),
+                allowed_co_tls=set(rng.sample(names, 5)) if is_tl else set(),
+                co_tl_with_anyone=is_tl and rng.random() < 0.3,
+            )
+        )
+    return members, dances
+
+
+def synthetic_club(
+    num_members: int, num_dances: int, seed: int = 0, max_score: int = 0
+) -> tuple[list[Member], list[Dance]]:
+    """
+    A club from the synthetic CSV generator, parsed like an upload, with
+    lateness and busyness scores drawn from 0 to `max_score`.
+    """
+    dances_df = generate_dances_df(num_dances, seed=seed)
+    rankings_df = generate_rankings_df(
+        num_members, list(dances_df["Dance"]), seed=seed
+    )
+    dances = process_dances_csv(io.BytesIO(dances_df.to_csv(index=False).encode()))
+    members = process_rankings_csv(
+        io.BytesIO(rankings_df.to_csv(index=False).encode())
+    )
+    members = filter_member_rankings_by_valid_dances(
+        members, {dance.name for dance in dances}
+    )
+    rng = random.Random(seed)
+    members = [
+        member.model_copy(
+            update={
+                "lateness_score": rng.randint(0, max_score),
+                "busyness_score": rng.randint(0, max_score),
+            }
+        )
+        for member in members
+    ]
+    return members, dances
+
+
+def assert_valid_matching(
+    members: list[Member],
+    dances: list[Dance],
+    matching: Matching,
+    tl_matching: TLMatching,
+) -> None:
+    """Check every constraint a matcher has to keep, whichever backend ran."""
+    capacities = {dance.name: dance.num_dancers for dance in dances}
+    by_name = {member.name: member for member in members}
+    tls = {
+        (tl, dance_name)
+        for dance_name, dance_tls in tl_matching.dances_to_tls.items()
+        for tl in dance_tls
+    }
+
+    seats = Counter()
+    for dance_name, dancers in matching.dances_to_dancers.items():
+        assert len(dancers) <= capacities[dance_name], dance_name
+        assert len(dancers) == len(set(dancers)), f"duplicate seat in {dance_name}"
+        for dancer in dancers:
+            seats[dancer] += 1
+            assert dance_name in matching.dancers_to_dances[dancer]
+            member = by_name[dancer]
+            assert (
+                dance_name in member.dance_rankings[: member.max_rank]
+                or (dancer, dance_name) in tls
+            ), f"{dancer} is in {dance_name} past their max rank"
+
+    for name, assigned in matching.dancers_to_dances.items():
+        assert len(assigned) == seats[name]
+        assert len(assigned) <= by_name[name].max_dances, name
+
+    for tl, dance_name in tls:
+        assert tl in matching.dances_to_dancers[dance_name], "TL seat was dropped"
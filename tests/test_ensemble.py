@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from enums import MatchBackend
+from ensemble import run_ensemble
+from services import match
+from helpers import assert_valid_matching, random_club
+
+
+@pytest.mark.parametrize("backend", list(MatchBackend))
+def test_winner_keeps_every_constraint(backend):
+    members, dances = random_club(80, 10, seed=5, max_score=2)
+    result = run_ensemble(members, dances, 3, seed=0, max_workers=1, backend=backend)
+    assert_valid_matching(members, dances, result.matching, result.tl_matching)
+
+
+def test_winning_seed_reproduces_the_matching():
+    members, dances = random_club(80, 10, seed=5, max_score=2)
+    result = run_ensemble(members, dances, 4, seed=10, max_workers=1)
+
+    assert sorted(result.scores) == [10, 11, 12, 13]
+    assert result.score == max(result.scores.values())
+    assert match(members, dances, rng=random.Random(result.seed)) == (
+        result.matching,
+        result.tl_matching,
+    )
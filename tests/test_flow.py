@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+import flow
+from enums import MatchBackend
+from schemas import Dance, Member
+from services import match, match_tls
+from helpers import assert_valid_matching, random_club, synthetic_club
+
+
+def test_duplicate_rankings_get_one_seat():
+    members = [
+        Member(
+            name="A",
+            seniority="SENIOR",
+            max_dances=3,
+            max_rank=3,
+            dance_rankings=["X", "X", "Y"],
+            max_tl=0,
+        )
+    ]
+    dances = [Dance(name=name, num_dancers=5) for name in ("X", "Y", "Z")]
+
+    matching, _ = match(
+        members, dances, backend=MatchBackend.FLOW, rng=random.Random(0)
+    )
+
+    assert sorted(matching.dancers_to_dances["A"]) == ["X", "Y"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_duplicate_rankings_never_double_seat(seed):
+    members, dances = random_club(80, 12, seed=seed, duplicate_rankings=True)
+    matching, tl_matching = match(
+        members, dances, backend=MatchBackend.FLOW, rng=random.Random(seed)
+    )
+    assert_valid_matching(members, dances, matching, tl_matching)
+
+
+def _phases(members, dances, networks):
+    tl_matching = match_tls(members, dances, rng=random.Random(0))
+    flow.match_min_cost_flow(members, dances, tl_matching, random.Random(0))
+    return networks[-1].phases
+
+
+def test_varied_priority_scores_dont_add_phases(monkeypatch):
+    networks = []
+
+    class RecordingFlow(flow._MinCostFlow):
+        def __init__(self, num_nodes):
+            super().__init__(num_nodes)
+            networks.append(self)
+
+    monkeypatch.setattr(flow, "_MinCostFlow", RecordingFlow)
+
+    members, dances = synthetic_club(2000, 60, max_score=0)
+    zero_phases = _phases(members, dances, networks)
+    members, dances = synthetic_club(2000, 60, max_score=10)
+    varied_phases = _phases(members, dances, networks)
+
+    # lateness and busyness only reorder members, so the cost levels and the
+    # number of phases stay the same as with every score at zero
+    assert varied_phases <= zero_phases
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_flow_backend_keeps_every_constraint(seed):
+    members, dances = random_club(120, 15, seed=seed, max_score=seed)
+    matching, tl_matching = match(
+        members, dances, backend=MatchBackend.FLOW, rng=random.Random(seed)
+    )
+    assert_valid_matching(members, dances, matching, tl_matching)
+
+
+def test_flow_backend_keeps_pre_assigned_tls():
+    members, dances = random_club(120, 15, seed=7, max_score=2)
+    tl_matching = match_tls(members, dances, rng=random.Random(1))
+    assert tl_matching.dances_to_tls
+
+    matching, returned_tls = match(
+        members, dances, tl_matching, backend=MatchBackend.FLOW, rng=random.Random(2)
+    )
+    assert returned_tls == tl_matching
+    assert_valid_matching(members, dances, matching, tl_matching)
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from engine import compile_problem
+from incremental import rematch
+from services import match
+from helpers import assert_valid_matching, random_club
+
+
+def _bucket_items(buckets):
+    return [list(bucket.items()) for bucket in buckets]
+
+
+def test_resaving_unchanged_members_keeps_bucket_order():
+    members, dances = random_club(60, 10, seed=3, max_score=3)
+    problem = compile_problem(members, dances)
+    patched = problem.copy()
+    for member in members[::3]:
+        patched.update_member(member)
+
+    assert _bucket_items(patched.rank_buckets) == _bucket_items(problem.rank_buckets)
+    assert _bucket_items(patched.tl_rank_buckets) == _bucket_items(
+        problem.tl_rank_buckets
+    )
+    assert patched.priorities == problem.priorities
+
+
+def test_copy_leaves_the_original_untouched():
+    members, dances = random_club(40, 8, seed=4)
+    problem = compile_problem(members, dances)
+    before = _bucket_items(problem.rank_buckets), list(problem.capacities)
+
+    patched = problem.copy()
+    patched.update_dance(dances[0].name, None)
+    patched.update_member(members[0].model_copy(update={"dance_rankings": []}))
+
+    assert (_bucket_items(problem.rank_buckets), problem.capacities) == before
+
+
+def test_rematch_doesnt_depend_on_edit_history():
+    # all-zero scores leave many ties for bucket order to break
+    members, dances = random_club(60, 10, seed=0)
+    previous = match(members, dances, rng=random.Random(0))
+    edited = members[:]
+    edited[7] = edited[7].model_copy(update={"lateness_score": 2})
+    changed = {edited[7].name}
+
+    fresh = rematch(edited, dances, previous, changed, set(), rng=random.Random(1))
+    # a problem that has seen unchanged members re-saved before this edit
+    problem = compile_problem(members, dances)
+    for member in members[::4]:
+        problem.update_member(member)
+    patched = rematch(
+        edited,
+        dances,
+        previous,
+        changed,
+        set(),
+        rng=random.Random(1),
+        problem=problem,
+    )
+
+    assert patched == fresh
+    assert_valid_matching(edited, dances, *patched)
+
+
+def _edit(member, dance_names, rng):
+    # one kind of edit at a time; TL choices are kept unless narrowed, so TLs
+    # can drop out and send their dances through a fresh TL phase
+    kind = rng.randrange(3)
+    if kind == 0:
+        update = {"dance_rankings": rng.sample(dance_names, rng.randint(1, 6))}
+    elif kind == 1:
+        update = {"max_dances": rng.randint(1, 4)}
+    else:
+        tl_dances = sorted(member.dances_willing_to_tl)
+        update = {
+            "dances_willing_to_tl": set(
+                rng.sample(tl_dances, rng.randint(0, len(tl_dances)))
+            )
+        }
+    return member.model_copy(update=update)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_rematch_keeps_every_constraint(seed):
+    members, dances = random_club(120, 15, seed=seed, max_score=2)
+    dance_names = [dance.name for dance in dances]
+    problem = compile_problem(members, dances)
+    previous = match(members, dances, rng=random.Random(0))
+    rng = random.Random(seed)
+    for step in range(10):
+        changed = set()
+        for i in rng.sample(range(len(members)), 5):
+            members[i] = _edit(members[i], dance_names, rng)
+            changed.add(members[i].name)
+        changed_dance = dances[step]
+        # at least two seats, so a TL and their co-TL fit, as in a full match
+        dances[step] = changed_dance.model_copy(
+            update={"num_dancers": max(2, changed_dance.num_dancers - 2)}
+        )
+        previous = rematch(
+            members,
+            dances,
+            previous,
+            changed,
+            {changed_dance.name},
+            rng=random.Random(step),
+            problem=problem,
+        )
+        assert_valid_matching(members, dances, *previous)
+
+
+@pytest.mark.parametrize("seed", [5, 14, 20, 27, 46])
+def test_fresh_tls_stay_within_max_dances(seed):
+    # dropping TLs sends their dances through a fresh TL phase, whose picks may
+    # already hold seats in dances that are kept as they were
+    members, dances = random_club(60, 10, seed=seed)
+    previous = match(members, dances, rng=random.Random(0))
+    dropped = set(sorted(previous[1].tls_to_dances)[:3])
+    edited = [
+        member.model_copy(update={"dances_willing_to_tl": set()})
+        if member.name in dropped
+        else member
+        for member in members
+    ]
+
+    result = rematch(edited, dances, previous, dropped, set(), rng=random.Random(1))
+
+    assert_valid_matching(edited, dances, *result)
@@ -0,0 +1,21 @@
+import random
+
+import pytest
+
+from local_search import improve_matching
+from metrics import MatchingScorer
+from services import match
+from helpers import assert_valid_matching, random_club
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_local_search_keeps_every_constraint(seed):
+    members, dances = random_club(120, 15, seed=seed, max_score=2)
+    matching, tl_matching = match(members, dances, rng=random.Random(seed))
+    result = improve_matching(
+        members, dances, matching, tl_matching, rng=random.Random(seed)
+    )
+
+    assert_valid_matching(members, dances, result.matching, tl_matching)
+    scorer = MatchingScorer(members)
+    assert scorer.score(result.matching) >= scorer.score(matching)
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+import baseline_matcher
+from services import match, match_tls
+from helpers import assert_valid_matching, random_club, synthetic_club
+
+
+def _for_baseline(members):
+    # the original matcher has no "anyone" flag, only explicit co-TL names
+    names = {member.name for member in members}
+    return [
+        member.model_copy(update={"allowed_co_tls": names})
+        if member.co_tl_with_anyone
+        else member
+        for member in members
+    ]
+
+
+def _non_empty(assignments):
+    return {name: list(value) for name, value in assignments.items() if value}
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize(
+    "club",
+    [
+        lambda seed: random_club(80, 12, seed=seed),
+        lambda seed: random_club(80, 12, seed=seed, max_score=3),
+        lambda seed: random_club(80, 12, seed=seed, duplicate_rankings=True),
+        lambda seed: synthetic_club(150, 20, seed=seed, max_score=2),
+    ],
+)
+def test_python_backend_reproduces_the_original_matcher(club, seed):
+    members, dances = club(seed)
+
+    random.seed(seed)
+    expected, expected_tls = baseline_matcher.match(_for_baseline(members), dances)
+    random.seed(seed)
+    matching, tl_matching = match(members, dances)
+
+    assert _non_empty(tl_matching.dances_to_tls) == _non_empty(
+        expected_tls.dances_to_tls
+    )
+    assert _non_empty(tl_matching.tls_to_dances) == _non_empty(
+        expected_tls.tls_to_dances
+    )
+    assert matching.dances_to_dancers == expected.dances_to_dancers
+    assert _non_empty(matching.dancers_to_dances) == _non_empty(
+        expected.dancers_to_dances
+    )
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_python_backend_keeps_every_constraint(seed):
+    members, dances = random_club(
+        120, 15, seed=seed, max_score=seed, duplicate_rankings=seed % 2 == 1
+    )
+    matching, tl_matching = match(members, dances, rng=random.Random(seed))
+    assert_valid_matching(members, dances, matching, tl_matching)
+
+
+def test_python_backend_keeps_pre_assigned_tls():
+    members, dances = random_club(120, 15, seed=7, max_score=2)
+    tl_matching = match_tls(members, dances, rng=random.Random(1))
+    assert tl_matching.dances_to_tls
+
+    matching, returned_tls = match(members, dances, tl_matching, rng=random.Random(2))
+    assert returned_tls == tl_matching
+    assert_valid_matching(members, dances, matching, tl_matching)
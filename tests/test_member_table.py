@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from enums import MatchBackend
+from member_table import MemberTable
+from services import match
+from helpers import random_club
+
+
+@pytest.mark.parametrize("backend", list(MatchBackend))
+def test_table_matches_like_a_member_list(backend):
+    members, dances = random_club(80, 10, seed=6, max_score=2)
+    table = MemberTable.from_members(members)
+    assert match(table, dances, backend=backend, rng=random.Random(3)) == match(
+        members, dances, backend=backend, rng=random.Random(3)
+    )
+
+
+def test_rows_round_trip_to_members():
+    members, _ = random_club(40, 8, seed=1)
+    table = MemberTable.from_members(members)
+    assert [table[member.name].to_member() for member in members] == members
+
+
+def test_snapshots_are_copy_on_write():
+    members, dances = random_club(40, 8, seed=2)
+    table = MemberTable.from_members(members)
+    snapshot = table.snapshot()
+
+    snapshot[members[0].name].max_dances = 9
+    snapshot[members[1].name].dance_rankings = [dances[0].name]
+    table[members[2].name].lateness_score = 7
+
+    assert table[members[0].name].max_dances == members[0].max_dances
+    assert table[members[1].name].dance_rankings == members[1].dance_rankings
+    assert snapshot[members[2].name].lateness_score == members[2].lateness_score
+    assert snapshot[members[0].name].max_dances == 9
@@ -0,0 +1,30 @@
+from constants import SENIORITY_ORDER
+from enums import Seniority
+from sweep import PriorityScheme, default_schemes
+
+
+def _terms(seniority):
+    return (SENIORITY_ORDER[seniority], 0, 0)
+
+
+def test_default_schemes_can_put_juniors_first():
+    junior, senior = _terms(Seniority.NEWBIE), _terms(Seniority.SENIOR)
+    juniors_first = [
+        scheme
+        for scheme in default_schemes()
+        if scheme.key(junior) < scheme.key(senior)
+    ]
+
+    assert "-seniority > lateness > busyness" in {
+        scheme.label for scheme in juniors_first
+    }
+    assert not any(
+        scheme.key(junior) < scheme.key(senior)
+        for scheme in default_schemes(reverse_seniority=False)
+    )
+
+
+def test_default_schemes_are_distinct():
+    labels = [scheme.label for scheme in default_schemes()]
+    assert len(labels) == len(set(labels))
+    assert PriorityScheme.lexicographic() in default_schemes()
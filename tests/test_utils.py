@@ -0,0 +1,21 @@
+import io
+
+from synthetic import generate_dances_df, generate_rankings_df
+from utils import process_rankings_csv
+
+
+def _parse(rankings_df):
+    return process_rankings_csv(io.BytesIO(rankings_df.to_csv(index=False).encode()))
+
+
+def test_blank_rankings_still_count_towards_max_rank():
+    dances_df = generate_dances_df(5, seed=0)
+    rankings_df = generate_rankings_df(3, list(dances_df["Dance"]), seed=0)
+    row = rankings_df.index[0]
+    rankings_df.loc[row, "Max Rank"] = 3
+    rankings_df.loc[row, "Put your rankings here! [2]"] = None
+    ranked = [rankings_df.loc[row, f"Put your rankings here! [{i}]"] for i in (1, 3)]
+
+    member = _parse(rankings_df)[0]
+
+    assert member.dance_rankings == ranked
@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+import pytest
+
+from enums import MatchBackend
+from member_table import MemberTable
+from schemas import Dance, Member
+from services import match, match_tls
+from vectorized import compile_arrays
+from helpers import assert_valid_matching, random_club
+
+
+def test_duplicate_rankings_match_python_backend():
+    members = [
+        Member(
+            name="A",
+            seniority="SENIOR",
+            max_dances=3,
+            max_rank=3,
+            dance_rankings=["X", "X", "Y"],
+            max_tl=0,
+        )
+    ]
+    # one rank round per dance, so there are enough rounds to reach Y
+    dances = [Dance(name=name, num_dancers=5) for name in ("X", "Y", "Z")]
+
+    python, _ = match(members, dances, rng=random.Random(0))
+    numpy, _ = match(
+        members, dances, backend=MatchBackend.NUMPY, rng=random.Random(0)
+    )
+
+    assert python.dancers_to_dances["A"] == ["X", "Y"]
+    assert sorted(numpy.dancers_to_dances["A"]) == sorted(
+        python.dancers_to_dances["A"]
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_duplicate_rankings_never_double_seat(seed):
+    members, dances = random_club(80, 12, seed=seed, duplicate_rankings=True)
+    matching, tl_matching = match(
+        members, dances, backend=MatchBackend.NUMPY, rng=random.Random(seed)
+    )
+    assert_valid_matching(members, dances, matching, tl_matching)
+
+
+ARRAY_FIELDS = (
+    "rankings",
+    "willing_to_tl",
+    "capacities",
+    "max_rank",
+    "max_dances",
+    "max_tl",
+    "priority",
+)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_member_table_compiles_like_a_member_list(seed):
+    members, dances = random_club(60, 10, seed=seed, max_score=4)
+    # a dance nobody can get, and members whose rankings mention it
+    table = MemberTable.from_members(members)
+    table[0].dance_rankings = ["Unknown", *members[0].dance_rankings]
+    members[0] = table[0].to_member()
+    table[1].dance_rankings = []
+    members[1] = table[1].to_member()
+
+    from_list = compile_arrays(members, dances[1:])
+    from_table = compile_arrays(table, dances[1:])
+
+    assert from_table.member_names == from_list.member_names
+    assert from_table.dance_ids == from_list.dance_ids
+    for field in ARRAY_FIELDS:
+        expected = getattr(from_list, field)
+        actual = getattr(from_table, field)
+        assert actual.dtype == expected.dtype, field
+        assert np.array_equal(actual, expected), field
+    assert from_table.co_tls.allowed == from_list.co_tls.allowed
+    assert from_table.co_tls.anyone == from_list.co_tls.anyone
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_numpy_backend_keeps_every_constraint(seed):
+    members, dances = random_club(
+        120, 15, seed=seed, max_score=seed, duplicate_rankings=seed % 2 == 1
+    )
+    matching, tl_matching = match(
+        members, dances, backend=MatchBackend.NUMPY, rng=random.Random(seed)
+    )
+    assert_valid_matching(members, dances, matching, tl_matching)
+
+
+def test_numpy_backend_keeps_pre_assigned_tls():
+    members, dances = random_club(120, 15, seed=7, max_score=2)
+    tl_matching = match_tls(members, dances, rng=random.Random(1))
+    assert tl_matching.dances_to_tls
+
+    matching, returned_tls = match(
+        members, dances, tl_matching, backend=MatchBackend.NUMPY, rng=random.Random(2)
+    )
+    assert returned_tls == tl_matching
+    assert_valid_matching(members, dances, matching, tl_matching)
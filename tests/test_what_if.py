@@ -0,0 +1,47 @@
+import pytest
+
+from member_table import MemberTable
+from what_if import Scenario, ScenarioMetrics, run_what_if
+from helpers import random_club
+
+
+def test_no_op_scenarios_match_the_baseline():
+    members, dances = random_club(80, 10, seed=6)
+    table = MemberTable.from_members(members)
+    no_ops = [
+        Scenario(
+            "Same max dances",
+            max_dances={member.name: member.max_dances for member in members[::3]},
+        ),
+        Scenario("No extra seats", capacity_changes={dances[0].name: 0}),
+        Scenario("Already included", included={dances[1].name: True}),
+    ]
+
+    result = run_what_if(table, dances, no_ops, seed=0, max_workers=1)
+
+    for scenario_result in result.scenarios:
+        assert scenario_result.delta == ScenarioMetrics(0, 0, 0, 0, 0)
+        assert scenario_result.metrics == result.baseline
+
+
+def test_scenarios_change_the_metrics():
+    members, dances = random_club(80, 10, seed=6)
+    result = run_what_if(
+        members,
+        dances,
+        [Scenario("More seats", capacity_changes={dance.name: 5 for dance in dances})],
+        seed=0,
+        max_workers=1,
+    )
+    delta = result.scenarios[0].delta
+    # demand outstrips the seats, so every added seat is filled
+    assert delta.seats_filled == 5 * len(dances)
+    assert delta.members_with_top3 > 0
+
+
+def test_unknown_names_are_rejected():
+    members, dances = random_club(10, 3)
+    with pytest.raises(ValueError, match="unknown dance"):
+        run_what_if(members, dances, [Scenario("x", included={"Nope": True})])
+    with pytest.raises(ValueError, match="unknown member"):
+        run_what_if(members, dances, [Scenario("x", max_dances={"Nope": 1})])
@@ -0,0 +1,48 @@
+import pytest
+
+from ensemble import run_ensemble
+from sweep import run_sweep
+from worker_pool import pool_map, worker_context
+from helpers import random_club
+
+
+def _add_context(task):
+    return task + worker_context()
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_pool_map_shares_context_and_keeps_order(max_workers):
+    reports = []
+    results = pool_map(
+        _add_context,
+        list(range(10)),
+        100,
+        "tasks",
+        max_workers=max_workers,
+        progress=lambda *report: reports.append(report),
+    )
+    assert results == list(range(100, 110))
+    assert reports[0] == ("tasks", 0, 10)
+    assert reports[-1] == ("tasks", 10, 10)
+
+
+def test_progress_exception_aborts_the_map():
+    def progress(phase, done, total):
+        if done == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        pool_map(_add_context, list(range(10)), 0, "tasks", 1, progress)
+
+
+def test_pool_matches_single_process_runs():
+    members, dances = random_club(100, 12, seed=2, max_score=3)
+
+    single = run_ensemble(members, dances, 4, seed=3, max_workers=1)
+    pooled = run_ensemble(members, dances, 4, seed=3, max_workers=2)
+    assert pooled.scores == single.scores
+    assert pooled.matching == single.matching
+
+    assert run_sweep(members, dances, seed=1, max_workers=2) == run_sweep(
+        members, dances, seed=1, max_workers=1
+    )
@@ -1,15 +1,53 @@
 import pandas as pd
 import re
-import streamlit as st
 
-from streamlit.runtime.uploaded_file_manager import UploadedFile
+from os import PathLike
+from typing import IO
 from enums import Seniority
+from exports import dance_assignments_table, dancer_assignments_table
+from member_table import MemberTable
 from schemas import Member, Dance, Matching, TLMatching
 from copy import deepcopy
 
+# anything pd.read_csv accepts: a path, or a file-like object such as an upload
+CsvSource = str | PathLike[str] | IO[bytes]
+
+
+RANKING_COLUMN_PATTERN = re.compile(r"Put your rankings here!\s*\[(\d+)\]")
+TL_INTEREST_COLUMN = "Are you interested in TL-ing any dances?"
+TL_PREFERENCE_COLUMN = "Which dances are you interested in TL-ing?"
+TL_SPECIFIC_DANCES_COLUMN = (
+    'If you answered "Specific dances" to the question above, pick them here:'
+)
+CO_TL_WILLINGNESS_COLUMN = "Are you willing to co-TL?"
+CO_TL_SPECIFIC_PEOPLE_COLUMN = (
+    'If you answered "Yes, with specific people" to the question above, pick them here:'
+)
+
+
+def _ranking_columns(columns: pd.Index) -> list[str]:
+    """Ranking columns ordered by the rank in their header, e.g. "... [3]"."""
+    ranked_columns: dict[int, str] = {}
+    for col in columns:
+        match = RANKING_COLUMN_PATTERN.search(str(col))
+        if match:
+            ranked_columns[int(match.group(1))] = col
+    return [col for _, col in sorted(ranked_columns.items())]
+
+
+def _split_names(selections: pd.Series) -> list[set[str]]:
+    """Split comma-separated form selections into sets of stripped names."""
+    split = (
+        selections.fillna("")
+        .astype(str)
+        .str.replace(r"\s*,\s*", ",", regex=True)
+        .str.strip()
+        .str.split(",")
+    )
+    return [{name for name in names if name} for names in split]
+
 
-@st.cache_data
-def process_rankings_csv(rankings_csv: UploadedFile) -> list[Member]:
+def process_rankings_csv(rankings_csv: CsvSource) -> list[Member]:
     """
     Take a rankings CSV file and extract information about members.
     This CSV file is exported from a Google Sheets of Google Form
@@ -21,6 +59,9 @@ def process_rankings_csv(rankings_csv: UploadedFile) -> list[Member]:
     As well as their dance rankings, songs they're interested in TL-ing,
     and people they're willing to co-TL with.
 
+    The ranking columns are resolved once from the header and every other
+    column is parsed as a whole, so large exports load in one pass.
+
     Args:
         rankings_csv: The CSV file of rankings and other information from the Google Form.
 
@@ -28,115 +69,100 @@ def process_rankings_csv(rankings_csv: UploadedFile) -> list[Member]:
         A list of Member objects, representing each member in the CSV file.
     """
     df = pd.read_csv(rankings_csv)
-    members: list[Member] = []
-
-    def extract_dance_rankings(row: pd.Series, max_rank: int) -> list[str]:
-        dance_rankings_dict = {}
-        pattern = re.compile(r"Put your rankings here!\s*\[(\d+)\]")
-        for col in row.index:
-            match = pattern.search(col)
-            if not match:
-                continue
-            dance_name = str(row[col])
-            if not dance_name:
-                continue
-            rank = int(match.group(1))
-            dance_rankings_dict[rank] = dance_name
-        sorted_rankings = sorted(dance_rankings_dict.items())
-        return [dance_name for _, dance_name in sorted_rankings[:max_rank]]
-
-    def extract_dances_willing_to_tl(
-        row: pd.Series, dance_rankings: list[str]
-    ) -> set[str]:
-        # not interested in TL-ing
-        tl_interest = row["Are you interested in TL-ing any dances?"]
-        if tl_interest == "No":
-            return set()
-
-        # willing to TL all
-        tl_preference = row["Which dances are you interested in TL-ing?"]
-        if tl_preference == "Any dance I'm in":
-            return set(dance_rankings)
-
-        # willing to TL specific dances
-        specific_dances = set()
-        dance_selection = row[
-            'If you answered "Specific dances" to the question above, pick them here:'
-        ]
-        dance_names = [name.strip() for name in dance_selection.split(",")]
-        specific_dances.update(dance_names)
-        return specific_dances
-
-    def extract_allowed_co_tls(row: pd.Series, all_member_names: list[str]) -> set[str]:
-        # not interested in TL-ing
-        tl_interest = row["Are you interested in TL-ing any dances?"]
-        if tl_interest == "No":
-            return set()
-
-        # not willing to co-TL
-        co_tl_willingness = row["Are you willing to co-TL?"]
-        if co_tl_willingness == "No":
-            return set()
-
-        # willing to co-TL with anyone
-        if co_tl_willingness == "Yes, with anyone":
-            return set(all_member_names)
-
-        # willing to co-TL with specific people
-        specific_co_tls = set()
-        co_tl_selection = row[
-            'If you answered "Yes, with specific people" to the question above, pick them here:'
-        ]
-        co_tl_names = [name for name in co_tl_selection.split(",")]
-        specific_co_tls.update(co_tl_names)
-        return specific_co_tls
-
-    all_member_names = [row["Name"] for _, row in df.iterrows()]
 
-    for _, row in df.iterrows():
-        name = str(row["Name"])
-        seniority = Seniority[row["Seniority"].upper().replace(" ", "_")]
-        max_dances = int(row["Max Dances"])
-        max_rank = int(row["Max Rank"])
-        max_tl = int(row["Max TL"]) if not pd.isna(row["Max TL"]) else 0
-
-        dance_rankings = extract_dance_rankings(row, max_rank)
-        dances_willing_to_tl = extract_dances_willing_to_tl(row, dance_rankings)
-        allowed_co_tls = extract_allowed_co_tls(row, all_member_names)
+    names = df["Name"].astype(str).tolist()
+    seniorities = [
+        Seniority[value]
+        for value in df["Seniority"].str.upper().str.replace(" ", "_", regex=False)
+    ]
+    max_dances = df["Max Dances"].astype(int).tolist()
+    max_ranks = df["Max Rank"].astype(int).tolist()
+    max_tls = pd.to_numeric(df["Max TL"]).fillna(0).astype(int).tolist()
+
+    # dance rankings: the ranking block as a 2D array, truncated to each
+    # member's max rank, then blanks dropped, so a blank still uses up its rank
+    ranking_block = df[_ranking_columns(df.columns)].to_numpy(dtype=object)
+    missing = pd.isna(ranking_block)
+    dance_rankings = [
+        [str(dance) for dance in row[:max_rank][~row_missing[:max_rank]]]
+        for row, row_missing, max_rank in zip(ranking_block, missing, max_ranks)
+    ]
+
+    # dances willing to TL: none, every ranked dance, or a specific selection
+    not_tl = df[TL_INTEREST_COLUMN].eq("No").tolist()
+    any_dance = df[TL_PREFERENCE_COLUMN].eq("Any dance I'm in").tolist()
+    specific_dances = _split_names(df[TL_SPECIFIC_DANCES_COLUMN])
+    dances_willing_to_tl = [
+        set() if no_tl else set(rankings) if any_ else specific
+        for no_tl, any_, rankings, specific in zip(
+            not_tl, any_dance, dance_rankings, specific_dances
+        )
+    ]
+
+    # allowed co-TLs: nobody, anyone (a flag, not a set of every name), or
+    # specific people
+    co_tl_willingness = df[CO_TL_WILLINGNESS_COLUMN]
+    no_co_tl = df[TL_INTEREST_COLUMN].eq("No") | co_tl_willingness.eq("No")
+    anyone_mask = co_tl_willingness.eq("Yes, with anyone") & ~no_co_tl
+    anyone = anyone_mask.tolist()
+    specific_people = _split_names(df[CO_TL_SPECIFIC_PEOPLE_COLUMN])
+    allowed_co_tls = [
+        set() if no_co or anyone_ else specific
+        for no_co, anyone_, specific in zip(
+            no_co_tl.tolist(), anyone, specific_people
+        )
+    ]
 
-        member = Member(
+    # every field is already parsed and typed, so skip per-row validation
+    return [
+        Member.model_construct(
             name=name,
             seniority=seniority,
-            max_dances=max_dances,
+            max_dances=member_max_dances,
             max_rank=max_rank,
             max_tl=max_tl,
-            dance_rankings=dance_rankings,
-            dances_willing_to_tl=dances_willing_to_tl,
-            allowed_co_tls=allowed_co_tls,
+            dance_rankings=rankings,
+            dances_willing_to_tl=willing_to_tl,
+            allowed_co_tls=co_tls,
+            co_tl_with_anyone=co_tl_anyone,
         )
-        members.append(member)
-
-    return members
+        for (
+            name,
+            seniority,
+            member_max_dances,
+            max_rank,
+            max_tl,
+            rankings,
+            willing_to_tl,
+            co_tls,
+            co_tl_anyone,
+        ) in zip(
+            names,
+            seniorities,
+            max_dances,
+            max_ranks,
+            max_tls,
+            dance_rankings,
+            dances_willing_to_tl,
+            allowed_co_tls,
+            anyone,
+        )
+    ]
 
 
-@st.cache_data
-def process_dances_csv(dances_csv: UploadedFile) -> list[Dance]:
+def process_dances_csv(dances_csv: CsvSource) -> list[Dance]:
     df = pd.read_csv(dances_csv)
-    dances = []
-
-    for _, row in df.iterrows():
-        name = str(row["Dance"])
-        num_dancers = int(row["No. of Dancers"])
-
-        dance = Dance(name=name, num_dancers=num_dancers)
-        dances.append(dance)
-
-    return dances
+    return [
+        Dance(name=name, num_dancers=num_dancers)
+        for name, num_dancers in zip(
+            df["Dance"].astype(str), df["No. of Dancers"].astype(int).tolist()
+        )
+    ]
 
 
 def filter_member_rankings_by_valid_dances(
-    members: list[Member], valid_dances: set[str]
-) -> list[Member]:
+    members: list[Member] | MemberTable, valid_dances: set[str]
+) -> list[Member] | MemberTable:
     """
     filters member dance rankings to only include dances that exist in the valid dances set.
     also filters dances_willing_to_tl to only include valid dances.
@@ -146,8 +172,12 @@ def filter_member_rankings_by_valid_dances(
         valid_dances: set of valid dance names from dances.csv
 
     Returns:
-        list of Member objects with filtered dance rankings
+        list of Member objects with filtered dance rankings, or a filtered
+        MemberTable if a table was given
     """
+    if isinstance(members, MemberTable):
+        return members.filter_dances(valid_dances)
+
     filtered_members = []
 
     for member in members:
@@ -171,6 +201,7 @@ def filter_member_rankings_by_valid_dances(
             dance_rankings=filtered_dance_rankings,
             dances_willing_to_tl=filtered_dances_willing_to_tl,
             allowed_co_tls=member.allowed_co_tls,
+            co_tl_with_anyone=member.co_tl_with_anyone,
             lateness_score=member.lateness_score,
             busyness_score=member.busyness_score,
         )
@@ -187,118 +218,14 @@ def generate_dance_based_csv(
     Ordered by num_dancers descending for each dance.
     Each dancer appears in a separate column.
     """
-    dance_data = []
-
-    # Sort dances by num_dancers descending
-    sorted_dances = sorted(dances, key=lambda d: d.num_dancers, reverse=True)
-
-    # Find maximum number of dancers (excluding TLs) to determine column count
-    max_dancers = max(
-        len(
-            [
-                person
-                for person in matching.dances_to_dancers.get(dance.name, [])
-                if person not in tl_matching.dances_to_tls.get(dance.name, [])
-            ]
-        )
-        for dance in dances
-    )
-
-    for dance in sorted_dances:
-        dance_name = dance.name
-        all_people = matching.dances_to_dancers.get(dance_name, [])
-        tls = tl_matching.dances_to_tls.get(dance_name, [])
-
-        # Separate regular dancers from TLs
-        dancers = [person for person in all_people if person not in tls]
-
-        # Create row data with dance name and dancer count
-        formatted_dance_name = f"{dance_name} ({dance.num_dancers})"
-        row_data = {"Dance": formatted_dance_name}
-
-        # Add TLs column - comma-delimited if multiple TLs
-        tls_str = ", ".join(tls) if tls else ""
-        row_data["TLs"] = tls_str
-
-        # Add each dancer in separate columns, with first column labeled "Dancers"
-        for i, dancer in enumerate(dancers):
-            if i == 0:
-                col_name = "Dancers"
-            else:
-                col_name = f" " * i  # Spaces for unique keys
-            row_data[col_name] = dancer
-
-        # Fill empty columns for dances with fewer dancers
-        for i in range(len(dancers), max_dancers):
-            if i == 0:
-                col_name = "Dancers"
-            else:
-                col_name = f" " * i
-            row_data[col_name] = ""
-
-        dance_data.append(row_data)
-
-    return pd.DataFrame(dance_data)
+    return dance_assignments_table(matching, dances, tl_matching)
 
 
 def generate_dancer_based_csv(
-    matching: Matching, members: list[Member]
+    matching: Matching, members: list[Member] | MemberTable
 ) -> pd.DataFrame:
     """
     Generate dancer-based CSV showing dances per dancer.
     Each dance appears in a separate column.
     """
-    dancer_data = []
-
-    # Create lookup for max_dances by dancer name and dance rankings
-    max_dances_lookup = {member.name: member.max_dances for member in members}
-    dance_rankings_lookup = {member.name: member.dance_rankings for member in members}
-
-    # Find maximum number of dances to determine column count
-    max_dances_count = (
-        max(len(dances) for dances in matching.dancers_to_dances.values())
-        if matching.dancers_to_dances
-        else 0
-    )
-
-    for dancer, dances in sorted(matching.dancers_to_dances.items()):
-        # Get max dances for this dancer
-        dancer_max_dances = max_dances_lookup.get(dancer, 0)
-        num_dances = len(dances)
-
-        # Create row data with bolded dancer name and dance count
-        formatted_dancer_name = f"{dancer} ({num_dances}/{dancer_max_dances})"
-        row_data = {"Dancer": formatted_dancer_name}
-
-        # Get dance rankings for this dancer
-        dancer_rankings = dance_rankings_lookup.get(dancer, [])
-
-        # Find the ranking (1-based) for each assigned dance
-        dance_rankings_assigned = []
-        for dance in dances:
-            try:
-                # Find the index (0-based) of the dance in their rankings and convert to 1-based
-                ranking = dancer_rankings.index(dance) + 1
-                dance_rankings_assigned.append(ranking)
-            except ValueError:
-                # Dance not found in rankings (shouldn't happen in normal operation)
-                dance_rankings_assigned.append("N/A")
-
-        # Sort the rankings and create comma-delimited string
-        dance_rankings_assigned.sort()
-        rankings_str = ",".join(str(r) for r in dance_rankings_assigned)
-        row_data["Rankings"] = rankings_str
-
-        # Add each dance in separate columns with proper column names
-        for i, dance in enumerate(dances):
-            col_name = f"Dance {i + 1}"
-            row_data[col_name] = dance
-
-        # Fill empty columns for dancers with fewer dances
-        for i in range(len(dances), max_dances_count):
-            col_name = f"Dance {i + 1}"
-            row_data[col_name] = ""
-
-        dancer_data.append(row_data)
-
-    return pd.DataFrame(dancer_data)
+    return dancer_assignments_table(matching, members)
@@ -0,0 +1,469 @@
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+import random
+
+import numpy as np
+
+from co_tls import CoTLCompatibility
+from constants import SENIORITY_ORDER
+from instrumentation import ProgressCallback
+from member_table import MemberTable
+from schemas import Member, Dance, Matching, TLMatching
+
+
+@dataclass
+class ArrayProblem:
+    """
+    Members and dances laid out as parallel NumPy arrays.
+
+    `rankings` is a padded (members x rank) matrix of dance IDs, with -1 for
+    missing choices, choices past a member's max rank, and dances that are not
+    in the matching. `willing_to_tl` has the same shape and marks the choices a
+    member is willing to TL. `priority` is a single integer per member that sorts
+    the same way as `(SENIORITY_ORDER, lateness_score, busyness_score)`.
+    """
+
+    member_names: list[str]
+    dance_names: list[str]
+    member_ids: dict[str, int]
+    dance_ids: dict[str, int]
+
+    rankings: np.ndarray
+    willing_to_tl: np.ndarray
+    capacities: np.ndarray
+    max_rank: np.ndarray
+    max_dances: np.ndarray
+    max_tl: np.ndarray
+    seniority: np.ndarray
+    lateness: np.ndarray
+    busyness: np.ndarray
+    priority: np.ndarray
+    co_tls: CoTLCompatibility
+
+    @property
+    def num_rounds(self) -> int:
+        return min(len(self.dance_names), self.rankings.shape[1])
+
+
+def _fold_priority(
+    seniority: np.ndarray, lateness: np.ndarray, busyness: np.ndarray
+) -> np.ndarray:
+    # fold the three priority terms into one sortable integer
+    lateness_span = int(lateness.max(initial=0)) + 1
+    busyness_span = int(busyness.max(initial=0)) + 1
+    return (seniority * lateness_span + lateness) * busyness_span + busyness
+
+
+def _compile_member_table(table: MemberTable, dances: list[Dance]) -> ArrayProblem:
+    # same as compile_arrays, but reads the table's columns and interned IDs
+    # directly instead of going through a row view per member
+    dance_names = [dance.name for dance in dances]
+    dance_ids = {name: i for i, name in enumerate(dance_names)}
+    num_members = len(table)
+    num_table_dances = len(table.dance_names)
+
+    max_rank = np.asarray(table.max_rank, dtype=np.int64)
+    max_tl = np.asarray(table.max_tl, dtype=np.int64)
+    lengths = np.fromiter(
+        (len(rankings) for rankings in table.rankings),
+        dtype=np.int64,
+        count=num_members,
+    )
+    width = min(len(dances), int(lengths.max(initial=0)))
+
+    # every member's rankings end to end, as table dance IDs
+    flat = array("i")
+    for rankings in table.rankings:
+        flat.extend(rankings)
+    table_dance_ids = np.asarray(flat, dtype=np.int64)
+    rows = np.repeat(np.arange(num_members), lengths)
+    columns = np.arange(len(table_dance_ids)) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    keep = columns < width
+    rows, columns, table_dance_ids = rows[keep], columns[keep], table_dance_ids[keep]
+
+    # table dance ID -> problem dance ID, -1 for dances not being matched
+    to_problem_ids = np.fromiter(
+        (dance_ids.get(name, -1) for name in table.dance_names),
+        dtype=np.int64,
+        count=num_table_dances,
+    )
+    rankings = np.full((num_members, width), -1, dtype=np.int64)
+    rankings[rows, columns] = to_problem_ids[table_dance_ids]
+
+    # a choice is a TL choice if (member, table dance ID) is one of the
+    # member's TL dances, compared as one integer key per pair
+    tl_keys = np.fromiter(
+        (
+            member_id * num_table_dances + dance_id
+            for member_id, tl_dances in enumerate(table.tl_dances)
+            if max_tl[member_id] > 0
+            for dance_id in tl_dances
+        ),
+        dtype=np.int64,
+    )
+    willing_to_tl = np.zeros((num_members, width), dtype=bool)
+    willing_to_tl[rows, columns] = np.isin(
+        rows * num_table_dances + table_dance_ids, tl_keys
+    )
+
+    rankings[np.arange(width)[None, :] >= max_rank[:, None]] = -1
+    willing_to_tl &= rankings >= 0
+
+    seniority = np.fromiter(
+        (SENIORITY_ORDER[seniority] for seniority in table.seniority),
+        dtype=np.int64,
+        count=num_members,
+    )
+    lateness = np.asarray(table.lateness_score, dtype=np.int64)
+    busyness = np.asarray(table.busyness_score, dtype=np.int64)
+
+    return ArrayProblem(
+        member_names=table.names[:],
+        dance_names=dance_names,
+        member_ids=dict(table.member_ids),
+        dance_ids=dance_ids,
+        rankings=rankings,
+        willing_to_tl=willing_to_tl,
+        capacities=np.fromiter(
+            (dance.num_dancers for dance in dances), dtype=np.int64, count=len(dances)
+        ),
+        max_rank=max_rank,
+        max_dances=np.asarray(table.max_dances, dtype=np.int64),
+        max_tl=max_tl,
+        seniority=seniority,
+        lateness=lateness,
+        busyness=busyness,
+        priority=_fold_priority(seniority, lateness, busyness),
+        co_tls=CoTLCompatibility.build(
+            table.co_tl_anyone,
+            (
+                [person_id for person_id in co_tls if person_id < num_members]
+                for co_tls in table.co_tls
+            ),
+        ),
+    )
+
+
+def compile_arrays(
+    members: list[Member] | MemberTable, dances: list[Dance]
+) -> ArrayProblem:
+    if isinstance(members, MemberTable):
+        return _compile_member_table(members, dances)
+
+    dance_names = [dance.name for dance in dances]
+    dance_ids = {name: i for i, name in enumerate(dance_names)}
+    member_names = [member.name for member in members]
+    member_ids = {name: i for i, name in enumerate(member_names)}
+
+    num_members = len(members)
+    max_rank = np.fromiter(
+        (member.max_rank for member in members), dtype=np.int64, count=num_members
+    )
+    width = min(
+        len(dances),
+        max((len(member.dance_rankings) for member in members), default=0),
+    )
+    rankings = np.full((num_members, width), -1, dtype=np.int64)
+    willing_to_tl = np.zeros((num_members, width), dtype=bool)
+    for member_id, member in enumerate(members):
+        row = [dance_ids.get(name, -1) for name in member.dance_rankings[:width]]
+        rankings[member_id, : len(row)] = row
+        if member.max_tl > 0 and member.dances_willing_to_tl:
+            willing_to_tl[member_id, : len(row)] = [
+                name in member.dances_willing_to_tl
+                for name in member.dance_rankings[:width]
+            ]
+    rankings[np.arange(width)[None, :] >= max_rank[:, None]] = -1
+    willing_to_tl &= rankings >= 0
+
+    seniority = np.fromiter(
+        (SENIORITY_ORDER[member.seniority] for member in members),
+        dtype=np.int64,
+        count=num_members,
+    )
+    lateness = np.fromiter(
+        (member.lateness_score for member in members), dtype=np.int64, count=num_members
+    )
+    busyness = np.fromiter(
+        (member.busyness_score for member in members), dtype=np.int64, count=num_members
+    )
+    return ArrayProblem(
+        member_names=member_names,
+        dance_names=dance_names,
+        member_ids=member_ids,
+        dance_ids=dance_ids,
+        rankings=rankings,
+        willing_to_tl=willing_to_tl,
+        capacities=np.fromiter(
+            (dance.num_dancers for dance in dances), dtype=np.int64, count=len(dances)
+        ),
+        max_rank=max_rank,
+        max_dances=np.fromiter(
+            (member.max_dances for member in members),
+            dtype=np.int64,
+            count=num_members,
+        ),
+        max_tl=np.fromiter(
+            (member.max_tl for member in members), dtype=np.int64, count=num_members
+        ),
+        seniority=seniority,
+        lateness=lateness,
+        busyness=busyness,
+        priority=_fold_priority(seniority, lateness, busyness),
+        co_tls=CoTLCompatibility.build(
+            (member.co_tl_with_anyone for member in members),
+            (
+                [
+                    member_ids[name]
+                    for name in member.allowed_co_tls
+                    if name in member_ids
+                ]
+                for member in members
+            ),
+        ),
+    )
+
+
+def _new_rng(rng: random.Random | None = None) -> np.random.Generator:
+    # draw the seed from the caller's (or the global) RNG so a seed still
+    # reproduces a run
+    return np.random.default_rng((rng or random).getrandbits(64))
+
+
+def _run_tl_rounds(
+    problem: ArrayProblem,
+    rng: np.random.Generator,
+    progress: ProgressCallback | None = None,
+) -> list[list[int]]:
+    num_members = len(problem.member_names)
+    dance_tls: list[list[int]] = [[] for _ in problem.dance_names]
+    tl_counts = np.zeros(len(problem.dance_names), dtype=np.int64)
+    loads = np.zeros(num_members, dtype=np.int64)
+    limits = np.minimum(problem.max_dances, problem.max_tl)
+    co_tls = problem.co_tls
+
+    for rank in range(problem.num_rounds):
+        if progress is not None:
+            progress("tl", rank, problem.num_rounds)
+        dance_ids = problem.rankings[:, rank]
+        mask = problem.willing_to_tl[:, rank] & (loads < limits)
+        mask &= tl_counts[np.maximum(dance_ids, 0)] < problem.capacities[
+            np.maximum(dance_ids, 0)
+        ]
+        candidate_ids = np.flatnonzero(mask)
+        if candidate_ids.size == 0:
+            continue
+
+        # group candidates by dance, keeping member order within each dance
+        candidate_dances = dance_ids[candidate_ids]
+        order = np.argsort(candidate_dances, kind="stable")
+        candidate_ids = candidate_ids[order]
+        candidate_dances = candidate_dances[order]
+        group_dances, group_starts = np.unique(candidate_dances, return_index=True)
+        group_ends = np.append(group_starts[1:], candidate_ids.size)
+
+        for dance_id, start, end in zip(
+            group_dances.tolist(), group_starts.tolist(), group_ends.tolist()
+        ):
+            tl_members = candidate_ids[start:end].tolist()
+            existing_tls = dance_tls[dance_id]
+            if len(existing_tls) > 2:
+                raise ValueError("Can't assign more than 2 TLs per dance.")
+            if len(existing_tls) == 2:
+                continue
+
+            if existing_tls:
+                first_tl = existing_tls[0]
+            else:
+                first_tl = tl_members[int(rng.integers(len(tl_members)))]
+                existing_tls.append(first_tl)
+                loads[first_tl] += 1
+                tl_counts[dance_id] += 1
+
+            partners = co_tls.partners(first_tl)
+            if not partners:
+                continue
+            second_tl_members = [c for c in tl_members if partners >> c & 1]
+            if not second_tl_members:
+                continue
+            second_tl = second_tl_members[int(rng.integers(len(second_tl_members)))]
+            existing_tls.append(second_tl)
+            loads[second_tl] += 1
+            tl_counts[dance_id] += 1
+
+    if progress is not None:
+        progress("tl", problem.num_rounds, problem.num_rounds)
+    return dance_tls
+
+
+def _tl_matching_to_ids(
+    problem: ArrayProblem, tl_matching: TLMatching
+) -> list[list[int]]:
+    dance_tls: list[list[int]] = [[] for _ in problem.dance_names]
+    for dance_name, tl_names in tl_matching.dances_to_tls.items():
+        dance_id = problem.dance_ids.get(dance_name)
+        if dance_id is None:
+            continue
+        dance_tls[dance_id] = [
+            problem.member_ids[name] for name in tl_names if name in problem.member_ids
+        ]
+    return dance_tls
+
+
+def _to_tl_matching(problem: ArrayProblem, dance_tls: list[list[int]]) -> TLMatching:
+    member_names = problem.member_names
+    dances_to_tls: dict[str, list[str]] = defaultdict(list)
+    tls_to_dances: dict[str, list[str]] = defaultdict(list)
+    for dance_id, tl_ids in enumerate(dance_tls):
+        dance_name = problem.dance_names[dance_id]
+        for member_id in tl_ids:
+            dances_to_tls[dance_name].append(member_names[member_id])
+            tls_to_dances[member_names[member_id]].append(dance_name)
+    return TLMatching(dances_to_tls, tls_to_dances)
+
+
+def _run_rank_rounds(
+    problem: ArrayProblem,
+    dance_tls: list[list[int]],
+    rng: np.random.Generator,
+    progress: ProgressCallback | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    num_members = len(problem.member_names)
+    rankings = problem.rankings
+    capacities = problem.capacities
+    max_dances = problem.max_dances
+    priority = problem.priority
+
+    tl_members = np.fromiter(
+        (m for tl_ids in dance_tls for m in tl_ids), dtype=np.int64
+    )
+    tl_dances = np.fromiter(
+        (d for d, tl_ids in enumerate(dance_tls) for _ in tl_ids), dtype=np.int64
+    )
+    loads = np.bincount(tl_members, minlength=num_members)
+    dance_loads = np.bincount(tl_dances, minlength=len(capacities))
+
+    # members x dances: who already has a seat in which dance, so a TL or a
+    # member who ranked a dance twice can't be assigned to it again
+    in_dance = np.zeros((num_members, len(capacities)), dtype=bool)
+    in_dance[tl_members, tl_dances] = True
+    member_range = np.arange(num_members)
+
+    assigned_members = [tl_members]
+    assigned_dances = [tl_dances]
+
+    for rank in range(problem.num_rounds):
+        if progress is not None:
+            progress("rank", rank, problem.num_rounds)
+        dance_ids = rankings[:, rank]
+        safe_dance_ids = np.maximum(dance_ids, 0)
+        mask = (
+            (dance_ids >= 0)
+            & ~in_dance[member_range, safe_dance_ids]
+            & (loads < max_dances)
+            & (dance_loads[safe_dance_ids] < capacities[safe_dance_ids])
+        )
+        candidate_ids = np.flatnonzero(mask)
+        if candidate_ids.size == 0:
+            continue
+
+        # sort by dance, then priority, with random tie-breaking inside a priority
+        candidate_dances = dance_ids[candidate_ids]
+        order = np.lexsort(
+            (
+                rng.random(candidate_ids.size),
+                priority[candidate_ids],
+                candidate_dances,
+            )
+        )
+        candidate_ids = candidate_ids[order]
+        candidate_dances = candidate_dances[order]
+
+        # position of each candidate within its dance's group
+        group_sizes = np.bincount(candidate_dances, minlength=len(capacities))
+        group_starts = np.cumsum(group_sizes) - group_sizes
+        positions = np.arange(candidate_ids.size) - group_starts[candidate_dances]
+        selected = positions < (capacities - dance_loads)[candidate_dances]
+
+        selected_members = candidate_ids[selected]
+        selected_dances = candidate_dances[selected]
+        loads[selected_members] += 1
+        in_dance[selected_members, selected_dances] = True
+        dance_loads += np.bincount(selected_dances, minlength=len(capacities))
+        assigned_members.append(selected_members)
+        assigned_dances.append(selected_dances)
+
+    if progress is not None:
+        progress("rank", problem.num_rounds, problem.num_rounds)
+    return np.concatenate(assigned_members), np.concatenate(assigned_dances)
+
+
+def _to_matching(
+    problem: ArrayProblem, assigned_members: np.ndarray, assigned_dances: np.ndarray
+) -> Matching:
+    member_names = problem.member_names
+    dance_names = problem.dance_names
+
+    dances_to_dancers: dict[str, list[str]] = {name: [] for name in dance_names}
+    by_dance = np.argsort(assigned_dances, kind="stable")
+    for member_id, dance_id in zip(
+        assigned_members[by_dance].tolist(), assigned_dances[by_dance].tolist()
+    ):
+        dances_to_dancers[dance_names[dance_id]].append(member_names[member_id])
+
+    dancers_to_dances: dict[str, list[str]] = {name: [] for name in member_names}
+    by_member = np.argsort(assigned_members, kind="stable")
+    for member_id, dance_id in zip(
+        assigned_members[by_member].tolist(), assigned_dances[by_member].tolist()
+    ):
+        dancers_to_dances[member_names[member_id]].append(dance_names[dance_id])
+
+    return Matching(dances_to_dancers, dancers_to_dances)
+
+
+def match_tls_vectorized(
+    members: list[Member],
+    dances: list[Dance],
+    rng: random.Random | None = None,
+    progress: ProgressCallback | None = None,
+) -> TLMatching:
+    problem = compile_arrays(members, dances)
+    return _to_tl_matching(problem, _run_tl_rounds(problem, _new_rng(rng), progress))
+
+
+def match_vectorized(
+    members: list[Member],
+    dances: list[Dance],
+    tl_matching: TLMatching | None = None,
+    rng: random.Random | None = None,
+    progress: ProgressCallback | None = None,
+) -> tuple[Matching, TLMatching]:
+    """
+    NumPy implementation of `services.match`. Each rank round is a handful of
+    masked array operations over all members instead of a Python loop, which
+    keeps clubs with tens of thousands of members well under a second.
+
+    Selection follows the same rules as the pure-Python matcher, but ties are
+    broken with a NumPy generator, so the same seed gives a different (equally
+    valid) matching than the Python backend.
+    """
+    problem = compile_arrays(members, dances)
+    np_rng = _new_rng(rng)
+
+    if not tl_matching:
+        dance_tls = _run_tl_rounds(problem, np_rng, progress)
+        tl_matching = _to_tl_matching(problem, dance_tls)
+    else:
+        dance_tls = _tl_matching_to_ids(problem, tl_matching)
+
+    assigned_members, assigned_dances = _run_rank_rounds(
+        problem, dance_tls, np_rng, progress
+    )
+
+    return (
+        _to_matching(problem, assigned_members, assigned_dances),
+        tl_matching,
+    )
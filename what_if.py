@@ -0,0 +1,223 @@
+from dataclasses import dataclass, field
+import random
+from typing import NamedTuple
+
+from dance_index import DanceMemberIndex, build_dance_member_index, set_dance_inclusion
+from engine import CompiledProblem, compile_problem, run_rank_rounds, run_tl_rounds
+from incremental import update_problem
+from instrumentation import ProgressCallback
+from member_table import MemberTable
+from metrics import satisfaction_report
+from schemas import Dance, Member
+from worker_pool import pool_map, worker_context
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    A set of changes to try on top of the current roster and dances.
+
+    Attributes:
+        name: Label shown with the scenario's results.
+        capacity_changes: Dance name -> seats to add (or remove, if negative).
+        included: Dance name -> whether the dance is included in the matching.
+        max_dances: Member name -> new max_dances.
+    """
+
+    name: str
+    capacity_changes: dict[str, int] = field(default_factory=dict)
+    included: dict[str, bool] = field(default_factory=dict)
+    max_dances: dict[str, int] = field(default_factory=dict)
+
+
+class ScenarioMetrics(NamedTuple):
+    # averaged over the scenario's seeded runs
+    members_with_top1: float
+    members_with_top3: float
+    members_near_max_dances: float
+    seats_filled: float
+    open_seats: float
+
+
+class ScenarioResult(NamedTuple):
+    scenario: Scenario
+    metrics: ScenarioMetrics
+    # metrics minus the baseline's
+    delta: ScenarioMetrics
+
+
+class WhatIfResult(NamedTuple):
+    baseline: ScenarioMetrics
+    scenarios: list[ScenarioResult]
+
+
+class _Baseline(NamedTuple):
+    problem: CompiledProblem
+    members: MemberTable
+    original: MemberTable
+    index: DanceMemberIndex
+    dances: list[Dance]
+
+
+def _apply(
+    baseline: _Baseline, scenario: Scenario
+) -> tuple[CompiledProblem, MemberTable, list[Dance]]:
+    # copies of the baseline with the scenario's changes, leaving it untouched
+    problem = baseline.problem.copy()
+    members = baseline.members.snapshot()
+    dances_index = {dance.name: dance.model_copy() for dance in baseline.dances}
+
+    changed_members = set_dance_inclusion(
+        members, baseline.original, baseline.index, dances_index, scenario.included
+    )
+    for name, change in scenario.capacity_changes.items():
+        dance = dances_index[name]
+        dance.num_dancers = max(0, dance.num_dancers + change)
+    for name, max_dances in scenario.max_dances.items():
+        members[name].max_dances = max_dances
+        changed_members.add(name)
+
+    included_dances = [dance for dance in dances_index.values() if dance.included]
+    update_problem(
+        problem,
+        members,
+        included_dances,
+        changed_members,
+        set(scenario.included) | set(scenario.capacity_changes),
+    )
+    return problem, members, included_dances
+
+
+def _evaluate(task: tuple[int, Scenario, list[int]]) -> tuple[int, ScenarioMetrics]:
+    index, scenario, seeds = task
+    problem, members, dances = _apply(worker_context(), scenario)
+    totals = [0, 0, 0, 0, 0]
+    for seed in seeds:
+        rng = random.Random(seed)
+        state = problem.new_state()
+        run_tl_rounds(problem, state, rng)
+        run_rank_rounds(problem, state, rng)
+        matching = state.to_matching(problem)
+        report = satisfaction_report(matching, members, dances)
+        open_seats = sum(max(0, seats) for seats in report.empty_seats.values())
+        row = (
+            report.members_with_top1,
+            report.members_with_top3,
+            report.members_near_max_dances,
+            sum(dance.num_dancers for dance in dances) - open_seats,
+            open_seats,
+        )
+        for i, value in enumerate(row):
+            totals[i] += value
+    return index, ScenarioMetrics(*(total / len(seeds) for total in totals))
+
+
+def _validate(
+    scenario: Scenario, members: MemberTable, dances_index: dict[str, Dance]
+) -> None:
+    for name in (*scenario.capacity_changes, *scenario.included):
+        if name not in dances_index:
+            raise ValueError(f"Scenario {scenario.name!r}: unknown dance {name!r}.")
+    for name, max_dances in scenario.max_dances.items():
+        if name not in members:
+            raise ValueError(f"Scenario {scenario.name!r}: unknown member {name!r}.")
+        if max_dances < 0:
+            raise ValueError(
+                f"Scenario {scenario.name!r}: max_dances of {name!r} is negative."
+            )
+
+
+def run_what_if(
+    members: list[Member] | MemberTable,
+    dances: list[Dance],
+    scenarios: list[Scenario],
+    original: MemberTable | None = None,
+    index: DanceMemberIndex | None = None,
+    runs_per_scenario: int = 3,
+    seed: int | None = None,
+    max_workers: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> WhatIfResult:
+    """
+    Match each scenario across a process pool (see `pool_map`) and compare its
+    satisfaction with the current roster and dances, the baseline.
+
+    The baseline problem is compiled once; a scenario copies it and patches in
+    only the dances and members it touches. The baseline and every scenario
+    are run with seeds `seed` to `seed + runs_per_scenario - 1`.
+
+    Args:
+        members: The current roster.
+        dances: Every dance, with their current capacity and `included` flag.
+        scenarios: The changes to evaluate.
+        original: The roster as uploaded, which including a dance restores
+            rankings from. Defaults to `members`, in which case included dances
+            only gain the members who still rank them.
+        index: `build_dance_member_index(original)`, built when omitted.
+        runs_per_scenario: Seeded runs averaged per scenario.
+        seed: First seed. Random when omitted.
+        max_workers: Worker processes to use. Defaults to the number of CPUs.
+        progress: Called as `progress("scenarios", done, num_scenarios)`, the
+            baseline included.
+
+    Returns:
+        The baseline's metrics, and each scenario's metrics and their
+        difference from the baseline, in the order given.
+
+    Raises:
+        ValueError: If a scenario names an unknown dance or member.
+    """
+    if runs_per_scenario < 1:
+        raise ValueError("runs_per_scenario must be at least 1.")
+    if not isinstance(members, MemberTable):
+        members = MemberTable.from_members(members)
+    if original is None:
+        original = members
+    if index is None:
+        index = build_dance_member_index(original)
+    dances_index = {dance.name: dance for dance in dances}
+    for scenario in scenarios:
+        _validate(scenario, members, dances_index)
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    seeds = [seed + i for i in range(runs_per_scenario)]
+
+    included_dances = [dance for dance in dances if dance.included]
+    baseline = _Baseline(
+        problem=compile_problem(members, included_dances),
+        members=members,
+        original=original,
+        index=index,
+        dances=dances,
+    )
+    # the baseline runs as a scenario without changes, at index 0
+    tasks = [
+        (i, scenario, seeds)
+        for i, scenario in enumerate([Scenario("Baseline"), *scenarios])
+    ]
+    results = pool_map(
+        _evaluate,
+        tasks,
+        baseline,
+        "scenarios",
+        max_workers=max_workers,
+        progress=progress,
+    )
+
+    baseline_metrics = results[0][1]
+    return WhatIfResult(
+        baseline=baseline_metrics,
+        scenarios=[
+            ScenarioResult(
+                scenario=scenarios[i - 1],
+                metrics=metrics,
+                delta=ScenarioMetrics(
+                    *(
+                        value - base
+                        for value, base in zip(metrics, baseline_metrics)
+                    )
+                ),
+            )
+            for i, metrics in results[1:]
+        ],
+    )
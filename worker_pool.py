@@ -0,0 +1,82 @@
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import os
+from typing import Any, TypeVar
+
+from instrumentation import ProgressCallback
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# the context shared by every task in a worker process, set once by
+# _init_worker
+_worker_context: Any = None
+
+
+def _init_worker(context: Any) -> None:
+    global _worker_context
+    _worker_context = context
+
+
+def worker_context() -> Any:
+    """The `context` passed to the `pool_map` call running the current task."""
+    return _worker_context
+
+
+def pool_map(
+    fn: Callable[[T], R],
+    tasks: Sequence[T],
+    context: Any,
+    phase: str,
+    max_workers: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> list[R]:
+    """
+    Run `fn` on every task across a process pool whose workers share `context`.
+
+    The context, usually a roster or a compiled problem, is pickled once per
+    worker by the pool's initializer instead of once per task, and `fn` reads
+    it with `worker_context()`. Tasks are sent to the workers in chunks of
+    about a quarter of each worker's share, and results come back in task
+    order whichever worker finishes first.
+
+    With a single worker the tasks run in this process, without a pool.
+
+    Args:
+        fn: A module-level function, so worker processes can unpickle it.
+        tasks: Arguments for `fn`, one per call.
+        context: Read-only inputs every task needs.
+        phase: Phase name for progress reports.
+        max_workers: Worker processes to use. Defaults to the number of CPUs.
+        progress: Called as `progress(phase, tasks_done, num_tasks)` as results
+            come in. An exception raised from it cancels the queued tasks.
+
+    Returns:
+        The results of `fn`, in task order.
+    """
+    results: list[R] = []
+    if progress is not None:
+        progress(phase, 0, len(tasks))
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        _init_worker(context)
+        for task in tasks:
+            results.append(fn(task))
+            if progress is not None:
+                progress(phase, len(results), len(tasks))
+        return results
+
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(context,)
+    )
+    try:
+        chunksize = max(1, len(tasks) // (max_workers * 4))
+        for result in pool.map(fn, tasks, chunksize=chunksize):
+            results.append(result)
+            if progress is not None:
+                progress(phase, len(results), len(tasks))
+    finally:
+        # don't wait for queued tasks if progress aborted the run
+        pool.shutdown(cancel_futures=True)
+    return results